@@ -1,48 +1,274 @@
+from functools import cached_property
+
+from django.conf import settings
 from django.contrib import admin
-from .models import Customer, Branch, Account, Card, Loan, Transaction
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Max, Q
+from .models import (
+    Customer, Branch, Account, Card, Loan, Transaction, DailyBalanceSnapshot,
+    JournalEntry, BalanceCheckpoint,
+)
+from .pagination import KeysetPagination
+
+CURSOR_VAR = "cursor"
+
+
+def performance_mode():
+    return getattr(settings, "BANKING_ADMIN_PERFORMANCE_MODE", True)
+
+
+def estimated_count(model):
+    """
+    Rough row count of ``model``'s table without scanning it: the planner's
+    estimate on PostgreSQL, the highest primary key elsewhere (an index
+    seek; deleted rows are still counted).
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 until the table is first analyzed
+        return row[0] if row and row[0] >= 0 else None
+    return model._default_manager.aggregate(top=Max("pk"))["top"] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts only what is cheap to count: below ``BANKING_ADMIN_EXACT_COUNT_LIMIT``
+    rows exactly, above it an estimate for the whole table or the capped
+    count (``limit`` meaning "more than that") for a filtered one.
+    """
+
+    @cached_property
+    def count(self):
+        limit = getattr(settings, "BANKING_ADMIN_EXACT_COUNT_LIMIT", 1000)
+        queryset = self.object_list
+        self.estimated = self.capped = False
+        if not queryset.query.has_filters():
+            estimate = estimated_count(queryset.model)
+            if estimate is not None and estimate > limit:
+                self.estimated = True
+                return estimate
+        count = queryset.order_by()[:limit + 1].count()
+        if count > limit:
+            self.capped = True
+            return limit
+        return count
+
+
+class CursorChangeList(ChangeList):
+    """
+    Changelist paged by ``KeysetPagination`` on the admin's
+    ``cursor_ordering``: ``?cursor=`` costs one index seek on any page, where
+    ``?p=<n>`` would scan the ``OFFSET`` rows before it.
+    """
+    cursor_paged = True
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        super().__init__(request, *args, **kwargs)
+        # filter and search links start again from the first page
+        self.params.pop(CURSOR_VAR, None)
+        self.filter_params.pop(CURSOR_VAR, None)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_ordering(self, request, queryset):
+        return list(self.model_admin.cursor_ordering)
+
+    def get_results(self, request):
+        keyset = KeysetPagination()
+        keyset.ordering = self.model_admin.cursor_ordering
+        fields = keyset._fields(self.queryset)
+        values, reverse = None, False
+        if self.cursor:
+            try:
+                values, reverse = keyset.load_cursor(self.cursor, fields)
+            except ValueError as exc:
+                raise IncorrectLookupParameters(exc)
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(keyset.seek(fields, values, reverse))
+        if reverse:
+            queryset = queryset.reverse()
+        size = self.list_per_page
+        rows = list(queryset[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        def link(row, reverse):
+            cursor = keyset.dump_cursor(keyset.row_values(row, fields), reverse)
+            return self.get_query_string({CURSOR_VAR: cursor})
+
+        newer = has_more if reverse else values is not None
+        older = has_more or reverse
+        self.newer_url = link(rows[0], True) if newer and rows else None
+        self.older_url = link(rows[-1], False) if older and rows else None
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, size)
+        self.result_count = paginator.count
+        self.count_estimated = paginator.estimated
+        self.count_capped = paginator.capped
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = rows
+        self.can_show_all = False
+        self.show_all = False
+        self.multi_page = bool(self.newer_url or self.older_url)
+        self.paginator = paginator
+
+
+class PerformanceModeMixin:
+    """
+    Changelists that stay fast on tables with millions of rows, while
+    ``BANKING_ADMIN_PERFORMANCE_MODE`` is on: estimated or capped counts,
+    cursor paging on ``cursor_ordering`` (an indexed ordering ending in the
+    primary key) and search limited to index-backed lookups. Search fields
+    must be ``=field`` (exact) or ``^field`` (prefix, as a range on the
+    field's index); both are case-sensitive here.
+    """
+    change_list_template = "admin/banking/cursor_change_list.html"
+    cursor_ordering = ("-created_at", "-id")
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList if performance_mode() else super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator = self.paginator if performance_mode() else Paginator
+        return paginator(queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_sortable_by(self, request):
+        # the cursor fixes the order
+        return () if performance_mode() else super().get_sortable_by(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not performance_mode() or not term:
+            return super().get_search_results(request, queryset, search_term)
+        condition = Q(pk__in=[])
+        for spec in self.get_search_fields(request):
+            name = spec.lstrip("=^")
+            try:
+                value = self.model._meta.get_field(name).to_python(term)
+            except ValidationError:
+                continue
+            if spec.startswith("^"):
+                condition |= Q(**{f"{name}__gte": value, f"{name}__lt": f"{value}\U0010ffff"})
+            else:
+                condition |= Q(**{name: value})
+        return queryset.filter(condition), False
+
+
+class LedgerReadOnlyMixin:
+    """
+    Ledger rows are written by the posting engine (posting.py) only; added,
+    changed or deleted here they would disagree with balances, checkpoints
+    and ``reconcile_ledger``.
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(PerformanceModeMixin, admin.ModelAdmin):
     list_display = ("first_name", "last_name", "email", "phone", "created_at")
-    search_fields = ("first_name", "last_name", "email", "phone")
+    search_fields = ("^email", "=phone")
 
 
 @admin.register(Branch)
-class BranchAdmin(admin.ModelAdmin):
+class BranchAdmin(PerformanceModeMixin, admin.ModelAdmin):
     list_display = ("name", "code", "city")
-    search_fields = ("name", "code", "city")
+    search_fields = ("^code",)
 
 
 @admin.register(Account)
-class AccountAdmin(admin.ModelAdmin):
+class AccountAdmin(PerformanceModeMixin, admin.ModelAdmin):
     list_display = (
         "account_number", "customer", "branch", "account_type",
         "balance", "is_active"
     )
-    search_fields = ("account_number",)
+    search_fields = ("^account_number",)
     list_filter = ("account_type", "is_active")
+    list_select_related = ("customer", "branch")
+    autocomplete_fields = ("customer", "branch")
+
+    def get_readonly_fields(self, request, obj=None):
+        # set when the account is opened, then moved only by postings
+        readonly = super().get_readonly_fields(request, obj)
+        return (*readonly, "balance") if obj is not None else readonly
 
 
 @admin.register(Card)
-class CardAdmin(admin.ModelAdmin):
+class CardAdmin(PerformanceModeMixin, admin.ModelAdmin):
     list_display = ("card_number", "account", "card_type", "expiry_date", "is_active")
-    search_fields = ("card_number",)
+    search_fields = ("^card_number",)
+    list_select_related = ("account",)
+    autocomplete_fields = ("account",)
 
 
 @admin.register(Loan)
-class LoanAdmin(admin.ModelAdmin):
+class LoanAdmin(PerformanceModeMixin, admin.ModelAdmin):
     list_display = (
         "id", "customer", "principal_amount", "interest_rate",
         "status", "start_date"
     )
+    search_fields = ("=id",)
     list_filter = ("status",)
+    list_select_related = ("customer",)
+    autocomplete_fields = ("customer",)
 
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(LedgerReadOnlyMixin, PerformanceModeMixin, admin.ModelAdmin):
     list_display = (
         "id", "account", "txn_type", "amount", "reference", "performed_at"
     )
-    search_fields = ("reference",)
+    search_fields = ("^reference",)
     list_filter = ("txn_type",)
+    list_select_related = ("account",)
+    autocomplete_fields = ("account",)
+    raw_id_fields = ("entry",)
+    cursor_ordering = ("-performed_at", "-id")
+
+
+@admin.register(DailyBalanceSnapshot)
+class DailyBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = (
+        "account", "date", "closing_balance", "deposit_total",
+        "withdrawal_total", "txn_count"
+    )
+    list_filter = ("date",)
+    raw_id_fields = ("account",)
+
+
+@admin.register(JournalEntry)
+class JournalEntryAdmin(LedgerReadOnlyMixin, admin.ModelAdmin):
+    list_display = ("id", "entry_type", "reference", "posted_at")
+    search_fields = ("reference",)
+    list_filter = ("entry_type",)
+
+
+@admin.register(BalanceCheckpoint)
+class BalanceCheckpointAdmin(LedgerReadOnlyMixin, admin.ModelAdmin):
+    list_display = ("account", "last_transaction_id", "balance", "created_at")
+    raw_id_fields = ("account",)
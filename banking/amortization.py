@@ -0,0 +1,205 @@
+"""
+Loan amortization and interest accrual.
+
+Loans are level-payment annuities: monthly rate ``r = interest_rate / 1200``,
+one payment per month on the start date's day of month (clamped to the end
+of shorter months) for ``term_months`` months, payment
+``M = P * r / (1 - (1 + r) ** -n)`` (``P / n`` at 0%).
+
+Rounding rules. Arithmetic runs in binary floating point on unrounded
+values; money is quantized to cents (ROUND_HALF_UP) only when a figure is
+emitted:
+
+* schedule: the payment is quantized once; each month's interest is the
+  quantized unrounded interest, principal is payment minus interest and the
+  balance is carried in exact Decimal subtraction, so every row satisfies
+  ``payment = interest + principal``. The final row pays off whatever is
+  left, so principal sums to exactly the loan amount.
+* portfolio: outstanding balances come from the closed form
+  ``B_k = P(1+r)^k - M((1+r)^k - 1)/r`` after ``k`` payments, without
+  walking months, over groups of loans with identical terms. Totals are
+  summed unrounded and quantized at the end.
+"""
+import calendar
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from .models import Loan
+
+CENT = Decimal('0.01')
+
+
+def money(value):
+    """Quantize a float or Decimal amount to cents, half up."""
+    if isinstance(value, float):
+        value = Decimal(repr(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def default_term():
+    return getattr(settings, 'BANKING_LOAN_DEFAULT_TERM_MONTHS', 12)
+
+
+def term_months(start, end, default=None):
+    """Whole months from ``start`` to ``end``, counting a partial month as one."""
+    if end is None:
+        return default or default_term()
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if end.day > start.day:
+        months += 1
+    return max(months, 1)
+
+
+def payments_due(start, as_of, term):
+    """How many of the ``term`` monthly payments fall due on or before ``as_of``."""
+    k = (as_of.year - start.year) * 12 + as_of.month - start.month
+    if k > 0 and add_months(start, k) > as_of:
+        k -= 1
+    return min(max(k, 0), term)
+
+
+def monthly_payment(principal, monthly_rate, term):
+    if monthly_rate == 0:
+        return principal / term
+    return principal * monthly_rate / (1 - (1 + monthly_rate) ** -term)
+
+
+def schedule(loan):
+    """Amortization schedule of ``loan`` following the rounding rules above."""
+    principal = Decimal(loan.principal_amount)
+    rate = float(loan.interest_rate) / 1200
+    term = term_months(loan.start_date, loan.end_date)
+    payment = money(monthly_payment(float(principal), rate, term))
+
+    rows, balance = [], principal
+    total_interest = Decimal('0.00')
+    for n in range(1, term + 1):
+        interest = money(float(balance) * rate)
+        if n == term:
+            paid_principal = balance
+        else:
+            paid_principal = min(payment - interest, balance)
+        balance -= paid_principal
+        total_interest += interest
+        rows.append({
+            'number': n,
+            'due_date': add_months(loan.start_date, n).isoformat(),
+            'payment': str(interest + paid_principal),
+            'interest': str(interest),
+            'principal': str(paid_principal),
+            'balance': str(balance),
+        })
+    return {
+        'loan': loan.pk,
+        'principal_amount': str(money(principal)),
+        'interest_rate': str(loan.interest_rate),
+        'term_months': term,
+        'monthly_payment': str(payment),
+        'total_interest': str(total_interest),
+        'total_paid': str(money(principal) + total_interest),
+        'schedule': rows,
+    }
+
+
+@lru_cache(maxsize=65536)
+def _factors(monthly_rate, term, k):
+    """Payment and balance after ``k`` payments, per unit of principal."""
+    payment = monthly_payment(1.0, monthly_rate, term)
+    if k == term:
+        balance = 0.0
+    elif monthly_rate == 0:
+        balance = 1.0 - payment * k
+    else:
+        growth = (1 + monthly_rate) ** k
+        balance = growth - payment * (growth - 1) / monthly_rate
+    return payment, balance
+
+
+def summarize_terms(groups, as_of):
+    """
+    Unrounded totals for ``(annual_rate, start_date, end_date,
+    principal_sum, loan_count)`` groups as of ``as_of``.
+
+    Payment, balance, accrued and paid interest are all linear in the
+    principal, so loans sharing rate and dates are evaluated once on their
+    summed principal, and the closed-form factors are shared between groups
+    with the same rate, term and payments made.
+    """
+    default = default_term()
+    timings = {}  # (start, end) -> (term, payments made, fraction of current period elapsed)
+    principal_total = outstanding_total = accrued_total = paid_interest_total = payments_total = 0.0
+    count = 0
+    for annual_rate, start, end, principal, loans in groups:
+        timing = timings.get((start, end))
+        if timing is None:
+            term = term_months(start, end, default)
+            k = payments_due(start, as_of, term)
+            elapsed = 0.0
+            if k < term:
+                last_due, next_due = add_months(start, k), add_months(start, k + 1)
+                elapsed = (as_of - last_due).days / (next_due - last_due).days
+            timing = timings[start, end] = (term, k, elapsed)
+        term, k, elapsed = timing
+
+        principal = float(principal)
+        rate = float(annual_rate) / 1200
+        payment, balance = _factors(rate, term, k)
+        payment, balance = payment * principal, balance * principal
+        if k < term:
+            accrued_total += balance * rate * elapsed
+            payments_total += payment
+        count += loans
+        principal_total += principal
+        outstanding_total += balance
+        paid_interest_total += payment * k - (principal - balance)
+    return {
+        'loans': count,
+        'principal': principal_total,
+        'outstanding_principal': outstanding_total,
+        'accrued_interest': accrued_total,
+        'interest_paid': paid_interest_total,
+        'monthly_payments': payments_total,
+    }
+
+
+def portfolio_summary(queryset=None, as_of=None, chunk_size=20000):
+    """
+    Totals over the active (approved) loan book. The database groups loans
+    with identical terms and sums their principal; each group is then
+    evaluated in closed form without walking individual months.
+    """
+    as_of = as_of or date.today()
+    if queryset is None:
+        queryset = Loan.objects.all()
+    by_status = {
+        row['status']: row['count']
+        for row in queryset.order_by().values('status').annotate(count=Count('pk'))
+    }
+    groups = (
+        queryset.filter(status=Loan.APPROVED, start_date__lte=as_of)
+        .order_by().values_list('interest_rate', 'start_date', 'end_date')
+        .annotate(principal=Sum('principal_amount'), loans=Count('pk'))
+        .iterator(chunk_size=chunk_size)
+    )
+    totals = summarize_terms(groups, as_of)
+    return {
+        'as_of': as_of.isoformat(),
+        'loans_by_status': {status: by_status.get(status, 0) for status, _ in Loan.STATUSES},
+        'active_loans': totals['loans'],
+        **{
+            name: str(money(totals[name]))
+            for name in (
+                'principal', 'outstanding_principal', 'accrued_interest', 'interest_paid', 'monthly_payments',
+            )
+        },
+    }
@@ -0,0 +1,351 @@
+"""
+Cold storage for old transactions.
+
+``archive_transactions`` moves postings performed before a cutoff out of the
+Transaction table into gzip NDJSON segment files under
+``BANKING_ARCHIVE_DIR``, at ``<account>/<YYYY-MM>/<first id>-<last id>.ndjson.gz``:
+one or more per account and month. Each file is indexed by an ArchiveSegment
+row holding its id and time range, row count, deposit and withdrawal totals
+and checksum, so a read only opens the files its date range cuts through.
+
+Each account's archive is a prefix of its postings by id: a posting is only
+archived together with every earlier posting of its account, so a
+back-dated posting stays in the table until the postings after it age too.
+The transaction that deletes archived postings also records a
+BalanceCheckpoint at the last archived id when no checkpoint covers it yet,
+so ``ledger_balance`` never needs them and ``reconcile`` takes them from the
+segment totals. ``Account.balance`` is never written.
+
+Crash safety: a chunk's files are written under temporary names, fsynced and
+renamed into place before the database transaction that records their
+ArchiveSegment rows and deletes their postings. A crash before that commit
+leaves files no row points to, which the next run sweeps, and the postings
+are still in the table. A crash after it leaves a complete archive. A lock
+file keeps a second run from sweeping the files of one still in progress.
+
+``movement`` and ``rows`` read the archive back for statements and
+transaction lists. Archived postings cannot be fetched by id, and their
+references no longer block reuse; ``credit_interest`` therefore refuses
+periods that reach behind ``horizon``.
+"""
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Max, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .amortization import money
+from .models import Account, ArchiveSegment, BalanceCheckpoint, Transaction
+from .posting import signed_amount
+
+# attnames, so a decoded row works both as a ``.values()`` row and as model kwargs
+COLUMNS = (
+    'id', 'account_id', 'txn_type', 'amount', 'reference', 'performed_at', 'entry_id', 'created_at', 'updated_at',
+)
+_DATETIMES = ('performed_at', 'created_at', 'updated_at')
+SUFFIX = '.ndjson.gz'
+# postings are deleted this many ids per statement
+DELETE_BATCH = 500
+
+_ID, _ACCOUNT, _TYPE, _AMOUNT, _PERFORMED = 0, 1, 2, 3, 5
+
+
+class ArchiveError(Exception):
+    """A segment is missing or corrupt, another run holds the lock, or a chunk raced a posting."""
+
+
+def archive_dir():
+    return Path(getattr(settings, 'BANKING_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive'))
+
+
+def _encode(row):
+    record = dict(zip(COLUMNS, row))
+    record['amount'] = str(record['amount'])
+    for name in _DATETIMES:
+        record[name] = record[name].isoformat()
+    return json.dumps(record, separators=(',', ':'))
+
+
+def _decode(line):
+    record = json.loads(line)
+    record['amount'] = Decimal(record['amount'])
+    for name in _DATETIMES:
+        record[name] = parse_datetime(record[name])
+    return record
+
+
+def _order(record):
+    return record['performed_at'], record['id']
+
+
+def read_segment(segment):
+    """Rows of ``segment`` as dicts keyed by COLUMNS, ordered by ``(performed_at, id)``."""
+    path = archive_dir() / segment.path
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        raise ArchiveError(f'Archive segment {segment.path} is missing')
+    if hashlib.sha256(data).hexdigest() != segment.sha256:
+        raise ArchiveError(f'Archive segment {segment.path} does not match its checksum')
+    return [_decode(line) for line in gzip.decompress(data).decode('utf-8').splitlines()]
+
+
+def horizon():
+    """``performed_at`` of the newest archived posting, or None while nothing is archived."""
+    return ArchiveSegment.objects.aggregate(latest=Max('last_performed_at'))['latest']
+
+
+def _overlapping(account_id, start, end):
+    segments = ArchiveSegment.objects.filter(account_id=account_id)
+    if start is not None:
+        segments = segments.filter(last_performed_at__gte=start)
+    if end is not None:
+        segments = segments.filter(first_performed_at__lt=end)
+    return segments
+
+
+def _within(record, start, end):
+    moment = record['performed_at']
+    return (start is None or moment >= start) and (end is None or moment < end)
+
+
+def movement(account_id, start=None, end=None):
+    """
+    Net archived movement of an account performed in ``[start, end)``, from
+    segment totals except for segments that straddle a bound.
+    """
+    total = Decimal('0.00')
+    for segment in _overlapping(account_id, start, end):
+        inside = (
+            (start is None or segment.first_performed_at >= start)
+            and (end is None or segment.last_performed_at < end)
+        )
+        if inside:
+            total += segment.deposit_total - segment.withdrawal_total
+            continue
+        for record in read_segment(segment):
+            if _within(record, start, end):
+                total += signed_amount(record['txn_type'], record['amount'])
+    return total
+
+
+def rows(account_id, start=None, end=None, descending=False):
+    """
+    Archived postings of an account performed in ``[start, end)``, ordered by
+    ``(performed_at, id)``. Segments are read one at a time as the iteration
+    reaches them; a row is yielded once no unread segment can hold an
+    earlier one (a later one, when ``descending``).
+    """
+    edge = 'last_performed_at' if descending else 'first_performed_at'
+    segments = list(_overlapping(account_id, start, end).order_by(f'-{edge}' if descending else edge, 'first_id'))
+    pending = []
+    for index, segment in enumerate(segments):
+        pending += [record for record in read_segment(segment) if _within(record, start, end)]
+        pending.sort(key=_order, reverse=descending)
+        if index + 1 < len(segments):
+            bound = getattr(segments[index + 1], edge)
+            ready = 0
+            while ready < len(pending) and (
+                pending[ready]['performed_at'] > bound if descending else pending[ready]['performed_at'] < bound
+            ):
+                ready += 1
+        else:
+            ready = len(pending)
+        yield from pending[:ready]
+        del pending[:ready]
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + '.tmp')
+    with open(temporary, 'wb') as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+    _fsync_dir(path.parent)
+
+
+def _month(moment):
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def _segment(account_id, month, group):
+    """The ArchiveSegment for ``group`` (value tuples in COLUMNS order) and its file contents."""
+    group = sorted(group, key=itemgetter(_PERFORMED, _ID))
+    data = gzip.compress(''.join(_encode(row) + '\n' for row in group).encode('utf-8'), mtime=0)
+    ids = [row[_ID] for row in group]
+    totals = {Transaction.DEPOSIT: Decimal('0.00'), Transaction.WITHDRAW: Decimal('0.00')}
+    for row in group:
+        totals[row[_TYPE]] += row[_AMOUNT]
+    segment = ArchiveSegment(
+        account_id=account_id, month=month,
+        path=f'{account_id}/{month:%Y-%m}/{min(ids)}-{max(ids)}{SUFFIX}',
+        first_id=min(ids), last_id=max(ids),
+        first_performed_at=group[0][_PERFORMED], last_performed_at=group[-1][_PERFORMED],
+        row_count=len(group),
+        deposit_total=totals[Transaction.DEPOSIT], withdrawal_total=totals[Transaction.WITHDRAW],
+        sha256=hashlib.sha256(data).hexdigest(),
+    )
+    return segment, data
+
+
+def _candidates(cutoff, after, size):
+    """The next ``size`` postings before ``cutoff`` in ``(account, id)`` order after ``after``."""
+    old = Transaction.objects.filter(performed_at__lt=cutoff)
+    if after is not None:
+        account_id, txn_id = after
+        old = old.filter(Q(account_id__gt=account_id) | Q(account_id=account_id, id__gt=txn_id))
+    return list(old.order_by('account_id', 'id').values_list(*COLUMNS)[:size])
+
+
+def _prefixes(chunk, cutoff):
+    """Drop the postings of ``chunk`` that come after a newer posting of the same account."""
+    accounts = {row[_ACCOUNT] for row in chunk}
+    newer = dict(
+        Transaction.objects.filter(account_id__in=accounts, performed_at__gte=cutoff)
+        .values('account_id').annotate(first=Min('id')).order_by().values_list('account_id', 'first')
+    )
+    return [row for row in chunk if row[_ACCOUNT] not in newer or row[_ID] < newer[row[_ACCOUNT]]]
+
+
+def _checkpoints(kept):
+    """Checkpoints at each account's last archived id, where the latest one stops short of it."""
+    accounts = sorted({row[_ACCOUNT] for row in kept})
+    latest = {
+        account_id: (last_id, balance)
+        for account_id, last_id, balance in BalanceCheckpoint.objects.filter(
+            account__in=accounts,
+            last_transaction_id=Subquery(
+                BalanceCheckpoint.objects.filter(account=OuterRef('account'))
+                .order_by('-last_transaction_id').values('last_transaction_id')[:1]
+            ),
+        ).values_list('account', 'last_transaction_id', 'balance')
+    }
+    checkpoints = []
+    for account_id, group in groupby(kept, key=itemgetter(_ACCOUNT)):
+        group = list(group)
+        last_id, balance = latest.get(account_id, (0, Decimal('0.00')))
+        boundary = group[-1][_ID]
+        if last_id >= boundary:
+            continue
+        # postings up to last_id were checkpointed; every later one up to the
+        # boundary is in this chunk, since earlier runs checkpointed theirs
+        for row in group:
+            if row[_ID] > last_id:
+                balance += signed_amount(row[_TYPE], row[_AMOUNT])
+        checkpoints.append(BalanceCheckpoint(
+            account_id=account_id, last_transaction_id=boundary, balance=money(balance),
+        ))
+    return checkpoints
+
+
+def _archive_chunk(directory, kept):
+    """Write the segments for ``kept`` then index them and delete their postings in one transaction."""
+    written = []
+    try:
+        groups = {}
+        for row in kept:
+            groups.setdefault((row[_ACCOUNT], _month(row[_PERFORMED])), []).append(row)
+        segments = []
+        for (account_id, month), group in groups.items():
+            segment, data = _segment(account_id, month, group)
+            _write(directory / segment.path, data)
+            written.append(directory / segment.path)
+            segments.append(segment)
+
+        boundaries = {}
+        for row in kept:
+            boundaries[row[_ACCOUNT]] = row[_ID]
+        with db_transaction.atomic():
+            # postings lock their account too, so none is in flight below a boundary
+            list(Account.objects.select_for_update().filter(pk__in=boundaries).order_by('pk').values_list('pk'))
+            BalanceCheckpoint.objects.bulk_create(_checkpoints(kept))
+            ArchiveSegment.objects.bulk_create(segments)
+            ids = [row[_ID] for row in kept]
+            for start in range(0, len(ids), DELETE_BATCH):
+                Transaction.objects.filter(pk__in=ids[start:start + DELETE_BATCH]).delete()
+            remaining = (
+                Transaction.objects.filter(account_id__in=boundaries)
+                .values('account_id').annotate(first=Min('id')).order_by().values_list('account_id', 'first')
+            )
+            for account_id, first in remaining:
+                if first <= boundaries[account_id]:
+                    raise ArchiveError(
+                        f'Account {account_id} gained posting #{first} below archived #{boundaries[account_id]}; rerun'
+                    )
+    except BaseException:
+        for path in written:
+            path.unlink(missing_ok=True)
+        raise
+    return segments
+
+
+def sweep(directory=None):
+    """Delete segment and temporary files no ArchiveSegment row points to. Returns how many."""
+    directory = directory or archive_dir()
+    known = set(ArchiveSegment.objects.values_list('path', flat=True))
+    removed = 0
+    for path in directory.rglob('*'):
+        if not path.is_file() or not (path.name.endswith(SUFFIX) or path.name.endswith('.tmp')):
+            continue
+        if path.relative_to(directory).as_posix() not in known:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+@contextmanager
+def _locked(directory):
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / '.lock', 'w') as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ArchiveError(f'Another archive run holds {directory / ".lock"}')
+        yield
+
+
+def archive_transactions(cutoff, chunk_size=5000, progress=None):
+    """
+    Move postings performed before ``cutoff`` into segment files, reading
+    ``chunk_size`` at a time. Returns counts of ``transactions`` archived,
+    ``segments`` written and orphaned files ``swept``. ``progress`` is
+    called with the counts after each chunk.
+    """
+    directory = archive_dir()
+    counts = {'transactions': 0, 'segments': 0, 'swept': 0}
+    with _locked(directory):
+        counts['swept'] = sweep(directory)
+        after = None
+        while True:
+            chunk = _candidates(cutoff, after, chunk_size)
+            if not chunk:
+                break
+            after = chunk[-1][_ACCOUNT], chunk[-1][_ID]
+            kept = _prefixes(chunk, cutoff)
+            if kept:
+                counts['segments'] += len(_archive_chunk(directory, kept))
+                counts['transactions'] += len(kept)
+            if progress is not None:
+                progress(counts)
+    return counts
@@ -0,0 +1,136 @@
+"""
+Async read endpoints for ASGI deployments.
+
+DRF views are synchronous, so these are plain Django async views built on
+the async ORM (``aget``, ``aiterator``, ``async for``). Under an ASGI server
+a slow list or statement waits on the database without pinning a worker
+thread. Responses have the same shape as their DRF counterparts: rows go
+through the same FieldPlan as FastListMixin and lists use the same keyset
+cursors.
+"""
+import base64
+import binascii
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import aauthenticate
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.request import Request
+
+from .authentication import atoken_user
+from .fast_serializers import plan_for
+from .filters import parse_int
+from .models import Account, Transaction
+from .overview import aoverview, recent_limit
+from .pagination import CreatedAtKeysetPagination, PerformedAtKeysetPagination
+from .serializers import AccountSerializer, TransactionSerializer
+from .statements import ASYNC_RENDERERS, astatement_rows, parse_bound
+
+
+async def _authenticate(request):
+    """Session user, else ``Token`` or HTTP Basic credentials, mirroring the DRF defaults."""
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    scheme, credentials = scheme.lower(), credentials.strip()
+    if scheme == 'token' and credentials:
+        return await atoken_user(credentials)
+    if scheme != 'basic' or not credentials:
+        return None
+    try:
+        username, _, password = base64.b64decode(credentials).decode('utf-8').partition(':')
+    except (binascii.Error, UnicodeDecodeError):
+        return None
+    user = await aauthenticate(request, username=username, password=password)
+    return user if user is not None and user.is_active else None
+
+
+def async_api_view(view):
+    """Authenticated, GET-only async view with DRF-style error bodies."""
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await _authenticate(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': exceptions.NotAuthenticated.default_detail}, status=403,
+            )
+        request.user = user
+        try:
+            return await view(request, *args, **kwargs)
+        except ObjectDoesNotExist:
+            return JsonResponse({'detail': exceptions.NotFound.default_detail}, status=404)
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            return JsonResponse(detail, status=exc.status_code, safe=False)
+    return wrapper
+
+
+async def _row(queryset, serializer_class, **lookup):
+    plan = plan_for(serializer_class)
+    return plan.render([await queryset.values(*set(plan.columns)).aget(**lookup)])[0]
+
+
+async def _page(request, queryset, serializer_class, paginator):
+    plan = plan_for(serializer_class)
+    rows = await paginator.apaginate_queryset(queryset.values(*set(plan.columns)), Request(request))
+    return JsonResponse(paginator.get_paginated_data(plan.render(rows)))
+
+
+@async_api_view
+async def account_list(request):
+    return await _page(request, Account.objects.all(), AccountSerializer, CreatedAtKeysetPagination())
+
+
+@async_api_view
+async def account_detail(request, pk):
+    return JsonResponse(await _row(Account.objects.all(), AccountSerializer, pk=pk))
+
+
+@async_api_view
+async def account_statement(request, pk):
+    """Streaming statement, same parameters as ``/api/accounts/{id}/statement/``."""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in ASYNC_RENDERERS:
+        return JsonResponse({'format': f"Expected one of: {', '.join(ASYNC_RENDERERS)}"}, status=400)
+    start = parse_bound(request.GET.get('from'), 'from')
+    end = parse_bound(request.GET.get('to'), 'to', end=True)
+    account = await Account.objects.aget(pk=pk)
+
+    content_type, render = ASYNC_RENDERERS[fmt]
+    chunk_size = getattr(settings, 'BANKING_STATEMENT_CHUNK_SIZE', 2000)
+    response = StreamingHttpResponse(
+        render(astatement_rows(account, start, end, chunk_size)), content_type=content_type,
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="statement-{account.account_number}.{fmt}"'
+    )
+    return response
+
+
+@async_api_view
+async def transaction_list(request):
+    """Newest first; ``?account=<id>`` narrows to one account."""
+    queryset = Transaction.objects.all()
+    account = request.GET.get('account')
+    if account is not None:
+        try:
+            queryset = queryset.filter(account_id=parse_int(account))
+        except ValueError:
+            return JsonResponse({'account': 'Expected an account id'}, status=400)
+    return await _page(request, queryset, TransactionSerializer, PerformedAtKeysetPagination())
+
+
+@async_api_view
+async def transaction_detail(request, pk):
+    return JsonResponse(await _row(Transaction.objects.all(), TransactionSerializer, pk=pk))
+
+
+@async_api_view
+async def customer_overview(request, pk):
+    """Same document as ``/api/customers/{id}/overview/``, read with the async ORM."""
+    return JsonResponse(await aoverview(pk, recent_limit(request.GET)))
@@ -0,0 +1,114 @@
+"""
+Token authentication with a process-local cache of validated tokens.
+
+``CachedTokenAuthentication`` accepts ``Authorization: Token <key>`` like
+DRF's TokenAuthentication. It also remembers each validated token, with its
+user, in an LRU of ``BANKING_TOKEN_CACHE_SIZE`` entries for
+``BANKING_TOKEN_CACHE_TTL`` seconds. A repeat request therefore costs a
+dictionary lookup instead of a query. Compared with Basic auth, it also
+skips a PBKDF2 password check on every call.
+
+``atoken_user`` is the same lookup for the async views (async_views.py).
+
+Revoking or rotating a token, or saving its user, drops the affected
+entries in this process at once (signals.py). Other processes stop
+accepting a revoked token within the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class TokenCache:
+    """LRU of validated ``Token`` rows (user loaded) with a TTL per entry."""
+
+    def __init__(self, size=None):
+        self.size = size or _setting('BANKING_TOKEN_CACHE_SIZE', 10000)
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.entries = OrderedDict()
+            self.by_user = {}
+            # bumped on every invalidation, so a lookup that raced one does not
+            # put back what was just dropped
+            self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            token, expires = entry
+            if expires <= time.monotonic():
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return token
+
+    def put(self, token, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self.entries[token.key] = (token, time.monotonic() + _setting('BANKING_TOKEN_CACHE_TTL', 60))
+            self.entries.move_to_end(token.key)
+            self.by_user.setdefault(token.user_id, set()).add(token.key)
+            while len(self.entries) > self.size:
+                self._drop(next(iter(self.entries)))
+
+    def _drop(self, key):
+        token, _ = self.entries.pop(key)
+        keys = self.by_user.get(token.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_user[token.user_id]
+
+    def discard(self, key):
+        with self._lock:
+            self.generation += 1
+            if key in self.entries:
+                self._drop(key)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            self.generation += 1
+            for key in list(self.by_user.get(user_id, ())):
+                self._drop(key)
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            generation = token_cache.generation
+            user, token = super().authenticate_credentials(key)
+            token_cache.put(token, generation)
+        return token.user, token
+
+
+async def atoken_user(key):
+    """Active user owning token ``key``, through ``token_cache``, or None."""
+    token = token_cache.get(key)
+    if token is None:
+        generation = token_cache.generation
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        if not token.user.is_active:
+            return None
+        token_cache.put(token, generation)
+    return token.user
@@ -0,0 +1,138 @@
+"""
+Read-through response cache for slow-changing resources.
+
+Serialized retrieve/list payloads are stored in the Django cache named by
+``BANKING_CACHE_ALIAS`` (LocMemCache by default, which is per-process and
+LRU-culled at ``MAX_ENTRIES``; point the alias at a file-based or shared
+backend to share entries across workers). Detail entries are deleted when
+their row changes; list entries are keyed on a per-model generation number
+that is bumped on every change, so stale pages are simply never read again.
+A payload is only stored if that generation did not move while it was
+being produced, so a read racing a write cannot store the old row after
+the write's invalidation has run.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction as db_transaction
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from .conditional import not_modified, set_validators
+
+
+class CacheStats:
+    """Process-local hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = self.invalidations = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def invalidated(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'BANKING_CACHE_ALIAS', 'default')]
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _generation_key(model):
+    return f'banking:{_label(model)}:gen'
+
+
+def detail_key(model, pk):
+    return f'banking:{_label(model)}:detail:{pk}'
+
+
+def _generation(model):
+    return get_cache().get_or_set(_generation_key(model), 0, timeout=None)
+
+
+def list_key(model, request):
+    generation = _generation(model)
+    url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    return f'banking:{_label(model)}:list:{generation}:{url}'
+
+
+def _invalidate(model, pk):
+    cache = get_cache()
+    if pk is not None:
+        cache.delete(detail_key(model, pk))
+    try:
+        cache.incr(_generation_key(model))
+    except ValueError:
+        cache.set(_generation_key(model), 1, timeout=None)
+    stats.invalidated()
+
+
+def invalidate(model, pk=None):
+    """
+    Drop the cached detail entry for ``pk`` and every cached list of ``model``.
+    Runs now and again on commit so that a read racing the write cannot put
+    the pre-commit row back into the cache.
+    """
+    _invalidate(model, pk)
+    db_transaction.on_commit(lambda: _invalidate(model, pk))
+
+
+class CachedReadMixin:
+    """ViewSet mixin serving ``retrieve`` and ``list`` through the response cache."""
+
+    def _cached(self, key, produce):
+        """
+        Serve ``key`` from the cache, or produce and store it. Validators are
+        stored with the payload so a matching conditional GET on a hit is a
+        304 without touching the database.
+        """
+        cache = get_cache()
+        entry = cache.get(key)
+        stats.record(hit=entry is not None)
+        if entry is not None:
+            data, etag, last_modified = entry
+            response = not_modified(self.request, etag, last_modified) if etag else None
+            return set_validators(response or Response(data), etag, last_modified)
+        generation = _generation(self.queryset.model)
+        response = produce()
+        # a change invalidated while producing may not be in this payload
+        if response.status_code == 200 and _generation(self.queryset.model) == generation:
+            last_modified = parse_http_date_safe(response.get('Last-Modified', ''))
+            cache.set(key, (response.data, response.get('ETag'), last_modified))
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        key = detail_key(self.queryset.model, kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return self._cached(key, lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs))
+
+    def list(self, request, *args, **kwargs):
+        key = list_key(self.queryset.model, request)
+        return self._cached(key, lambda: super(CachedReadMixin, self).list(request, *args, **kwargs))
@@ -0,0 +1,226 @@
+"""
+Card payment authorization.
+
+``authorize`` decides a card payment in one call. It checks the card
+(active, not expired) and its account (active) against ``card_index``, an
+in-process map from card number to the card's state and account. The
+available balance is checked by posting the withdrawal itself:
+``apply_posting`` is a single guarded UPDATE plus the Transaction INSERT in
+one atomic block, so the approval and the debit cannot drift apart.
+
+The index is loaded by one query when the server starts (``warm``, from
+wsgi.py/asgi.py) or else on first use, and then kept current by the Card and
+Account signals (signals.py). Each change re-reads the affected rows once its
+transaction commits, so a rolled-back change never reaches it. Signals only
+fire in the process that saved, and not at all for queryset ``update()``
+calls, so the index can lag changes made elsewhere. It is never trusted
+alone: an approval's guarded UPDATE re-checks the account and the card
+(active, not expired), and a state-based decline of an indexed card is
+confirmed by re-reading that one card before it is returned. Either way the
+stale entry is refreshed. An unknown number never costs a query of its own,
+so guessing card numbers cannot turn into database load: cards issued in
+other processes are picked up by one query for ids above the highest one
+indexed, run at most every ``BANKING_CARD_INDEX_SWEEP_SECONDS``.
+
+Card and account velocity rules (velocity.py) are checked before posting.
+"""
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Card, Transaction
+from .posting import CardUnusable, InsufficientFunds, PostingError, post_transaction
+from .velocity import ACCOUNT, CARD, limits as velocity_limits
+
+CardState = namedtuple('CardState', 'card_id account_id card_active expiry_date account_active')
+
+APPROVED = 'approved'
+UNKNOWN_CARD = 'unknown_card'
+CARD_INACTIVE = 'card_inactive'
+CARD_EXPIRED = 'card_expired'
+ACCOUNT_INACTIVE = 'account_inactive'
+INSUFFICIENT_FUNDS = 'insufficient_funds'
+DUPLICATE_REFERENCE = 'duplicate_reference'
+VELOCITY_LIMIT = 'velocity_limit'
+
+_FIELDS = ('pk', 'account_id', 'is_active', 'expiry_date', 'account__is_active', 'card_number')
+
+
+class CardIndex:
+    """Card number -> CardState for every card, loaded lazily."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forget everything; the next lookup reloads the whole index."""
+        with self._lock:
+            self.by_number = None
+            self.numbers = {}
+            self.by_account = {}
+            self.last_id = 0
+            self.swept_at = None
+
+    def _load(self):
+        by_number, numbers, by_account = {}, {}, {}
+        for card_id, account_id, card_active, expiry_date, account_active, number in (
+            Card.objects.values_list(*_FIELDS).iterator(chunk_size=5000)
+        ):
+            by_number[number] = CardState(card_id, account_id, card_active, expiry_date, account_active)
+            numbers[card_id] = number
+            by_account[account_id] = card_id
+        # lookups read without the lock; publish the finished maps at once
+        self.numbers, self.by_account = numbers, by_account
+        self.last_id = max(numbers, default=0)
+        self.swept_at = time.monotonic()
+        self.by_number = by_number
+
+    def load(self):
+        with self._lock:
+            self._load()
+
+    def get(self, card_number):
+        by_number = self.by_number
+        if by_number is None:
+            with self._lock:
+                if self.by_number is None:
+                    self._load()
+            by_number = self.by_number
+        return by_number.get(card_number)
+
+    def _put(self, card_id, account_id, card_active, expiry_date, account_active, number):
+        old = self.numbers.get(card_id)
+        if old is not None and old != number:
+            self._drop(card_id)
+        elif old is not None:
+            self.by_account.pop(self.by_number[old].account_id, None)
+        # a single assignment, so concurrent lookups see the old or the new state
+        self.by_number[number] = CardState(card_id, account_id, card_active, expiry_date, account_active)
+        self.numbers[card_id] = number
+        self.by_account[account_id] = card_id
+        self.last_id = max(self.last_id, card_id)
+
+    def _drop(self, card_id):
+        number = self.numbers.pop(card_id, None)
+        if number is not None:
+            self.by_account.pop(self.by_number.pop(number).account_id, None)
+
+    def refresh(self, card_ids=(), account_ids=(), card_numbers=()):
+        """Re-read the given cards, by id or number, and the cards of the given accounts, from the database."""
+        with self._lock:
+            if self.by_number is None:
+                return
+            card_ids = (
+                set(card_ids)
+                | {self.by_account[a] for a in account_ids if a in self.by_account}
+                | {self.by_number[n].card_id for n in card_numbers if n in self.by_number}
+            )
+            found = set()
+            rows = Card.objects.filter(
+                Q(pk__in=card_ids) | Q(account_id__in=account_ids) | Q(card_number__in=card_numbers)
+            )
+            for row in rows.values_list(*_FIELDS):
+                self._put(*row)
+                found.add(row[0])
+            for card_id in card_ids - found:
+                self._drop(card_id)
+
+    def sweep(self, interval):
+        """
+        Add the cards created since the highest indexed id, unless the last
+        load or sweep was less than ``interval`` seconds ago.
+        """
+        swept_at = self.swept_at
+        if swept_at is not None and time.monotonic() - swept_at < interval:
+            return
+        with self._lock:
+            if self.by_number is None or time.monotonic() - self.swept_at < interval:
+                return
+            self.swept_at = time.monotonic()
+            for row in Card.objects.filter(pk__gt=self.last_id).values_list(*_FIELDS):
+                self._put(*row)
+
+
+card_index = CardIndex()
+
+
+def warm():
+    """
+    Load ``card_index`` as the server starts, unless
+    ``BANKING_CARD_INDEX_PRELOAD`` is off, so no authorization pays for it.
+    """
+    if not getattr(settings, 'BANKING_CARD_INDEX_PRELOAD', True):
+        return
+    try:
+        card_index.load()
+    except DatabaseError:
+        # not migrated yet: load on first use instead
+        card_index.clear()
+    finally:
+        # forking servers must not share this connection with their workers
+        connections.close_all()
+
+
+def decide(state, today):
+    """The decline reason for ``state`` as of ``today``, or None if the card may be charged."""
+    if state is None:
+        return UNKNOWN_CARD
+    if not state.card_active:
+        return CARD_INACTIVE
+    if state.expiry_date < today:
+        return CARD_EXPIRED
+    if not state.account_active:
+        return ACCOUNT_INACTIVE
+    return None
+
+
+def authorize(card_number, amount, reference=None):
+    """
+    Authorize and post a card payment of ``amount``. Returns
+    ``(reason, state, transaction)``: ``reason`` is APPROVED or a decline
+    code, and ``transaction`` is the posted withdrawal when approved.
+    """
+    today = timezone.localdate()
+    state = card_index.get(card_number)
+    if state is None:
+        # no per-number query, or every guessed number would cost one
+        card_index.sweep(getattr(settings, 'BANKING_CARD_INDEX_SWEEP_SECONDS', 5))
+        state = card_index.get(card_number)
+    elif decide(state, today) is not None:
+        # the change behind it may have been reverted in another process
+        card_index.refresh(card_numbers=[card_number])
+        state = card_index.get(card_number)
+    reason = decide(state, today)
+    if reason is not None:
+        return reason, state, None
+    if (
+        velocity_limits.check(CARD, state.card_id, Transaction.WITHDRAW, amount)
+        or velocity_limits.check(ACCOUNT, state.account_id, Transaction.WITHDRAW, amount)
+    ):
+        return VELOCITY_LIMIT, state, None
+    try:
+        transaction = post_transaction(
+            state.account_id, Transaction.WITHDRAW, amount, reference or f'CARD-{uuid.uuid4().hex[:24]}',
+            card_id=state.card_id,
+        )
+    except InsufficientFunds:
+        return INSUFFICIENT_FUNDS, state, None
+    except PostingError as exc:
+        # the index lagged a change to the card or account made elsewhere
+        card_index.refresh(card_ids=[state.card_id], account_ids=[state.account_id])
+        if isinstance(exc, CardUnusable):
+            fresh = card_index.get(card_number)
+            return decide(fresh, today) or CARD_INACTIVE, fresh, None
+        return ACCOUNT_INACTIVE, state, None
+    except IntegrityError:
+        return DUPLICATE_REFERENCE, state, None
+    event = (state.card_id, Transaction.WITHDRAW, amount, transaction.performed_at)
+    db_transaction.on_commit(lambda: velocity_limits.record(CARD, [event]))
+    return APPROVED, state, transaction
@@ -0,0 +1,92 @@
+"""
+Conditional GET for API reads.
+
+Validators come from ``TimeStampedModel.updated_at``: a detail ETag is the
+row's ``updated_at``; a keyset-paged list ETag is the ``(id, updated_at)`` of
+the requested page's rows (and the row after them, which decides ``next``)
+plus the query string, read with the same index seek as the page itself.
+Unpaginated lists fall back to ``Max(updated_at)`` and ``Count``. A matching
+``If-None-Match``/``If-Modified-Since`` returns 304 before anything is
+serialized.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .pagination import KeysetPagination
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return 'W/' + quote_etag(digest)
+
+
+def set_validators(response, etag, last_modified):
+    if etag:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304/412 response when the request's preconditions say so, else None."""
+    return get_conditional_response(
+        getattr(request, '_request', request), etag=etag, last_modified=last_modified,
+    )
+
+
+class ConditionalGetMixin:
+    """ViewSet mixin adding ETag/Last-Modified and 304s to ``retrieve`` and ``list``."""
+
+    def detail_validators(self, request, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset()
+        updated_at = (
+            queryset.filter(**{self.lookup_field: kwargs[lookup]})
+            .values_list('updated_at', flat=True).first()
+        )
+        if updated_at is None:
+            return None, None
+        label = queryset.model._meta.label_lower
+        return make_etag(label, kwargs[lookup], updated_at.isoformat()), int(updated_at.timestamp())
+
+    def list_validators(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        label = queryset.model._meta.label_lower
+        if isinstance(self.paginator, KeysetPagination):
+            # an aggregate over the whole filtered table would cost more than the page
+            page = list(self.paginator._page_queryset(queryset, request).values_list('pk', 'updated_at'))
+            latest = max((updated_at for _, updated_at in page), default=None)
+            rows = (f'{pk}@{updated_at.isoformat()}' for pk, updated_at in page)
+            etag = make_etag(label, request.get_full_path(), *rows)
+        else:
+            summary = queryset.order_by().aggregate(latest=Max('updated_at'), rows=Count('pk'))
+            latest = summary['latest']
+            etag = make_etag(label, request.get_full_path(), latest.isoformat() if latest else '', summary['rows'])
+        return etag, int(latest.timestamp()) if latest else None
+
+    def _conditional(self, request, validators, produce):
+        etag, last_modified = validators
+        if etag is None:
+            return produce()
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = produce()
+        if response.status_code in (200, 304):
+            set_validators(response, etag, last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(
+            request, self.detail_validators(request, **kwargs),
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(
+            request, self.list_validators(request),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
@@ -0,0 +1,134 @@
+"""
+Read-path serialization for list endpoints.
+
+A ``FieldPlan`` is built once per serializer class from its declared fields
+and turns ``.values()`` rows straight into the dicts the ModelSerializer
+would have produced: same keys, same order, same string formats. Serializers
+with fields the plan does not understand fall back to the regular path.
+"""
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, fields as drf_fields, relations
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def _decimal(field):
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        return f'{value.quantize(exponent, rounding=rounding, context=context):f}'
+    return convert
+
+
+def _datetime(value, tz):
+    if tz is not None and value.tzinfo is not None:
+        value = value.astimezone(tz)
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+def _date(value):
+    return value.isoformat()
+
+
+def _is_iso(output_format):
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+class FieldPlan:
+    """Column list plus per-field converters for one serializer class."""
+
+    def __init__(self, names, columns, converters):
+        self.names = names
+        self.columns = columns
+        self.converters = converters
+
+    def render(self, rows):
+        # resolved once per call; DateTimeField looks it up for every value
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        plan = [
+            (name, column, (lambda v: _datetime(v, tz)) if convert is _datetime else convert)
+            for name, column, convert in zip(self.names, self.columns, self.converters)
+        ]
+        out = []
+        for row in rows:
+            item = {}
+            for name, column, convert in plan:
+                value = row[column]
+                item[name] = value if convert is None or value is None else convert(value)
+            out.append(item)
+        return out
+
+
+@lru_cache(maxsize=None)
+def plan_for(serializer_class):
+    """Build the FieldPlan for ``serializer_class``, or None if it is not plain."""
+    model = serializer_class.Meta.model
+    names, columns, converters = [], [], []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if '.' in field.source or field.source == '*':
+            return None
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            column, convert = model._meta.get_field(field.source).attname, None
+        elif isinstance(field, relations.RelatedField):
+            return None
+        elif getattr(field, 'localize', False) or getattr(field, 'normalize_output', False):
+            return None
+        elif isinstance(field, drf_fields.DecimalField):
+            if not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING):
+                return None
+            column, convert = field.source, _decimal(field)
+        elif isinstance(field, drf_fields.DateTimeField):
+            if not _is_iso(getattr(field, 'format', api_settings.DATETIME_FORMAT)):
+                return None
+            column, convert = field.source, _datetime
+        elif isinstance(field, drf_fields.DateField):
+            if not _is_iso(getattr(field, 'format', api_settings.DATE_FORMAT)):
+                return None
+            column, convert = field.source, _date
+        elif isinstance(field, (drf_fields.CharField, drf_fields.IntegerField,
+                                drf_fields.BooleanField, drf_fields.ChoiceField)):
+            column, convert = field.source, None
+        else:
+            return None
+        names.append(name)
+        columns.append(column)
+        converters.append(convert)
+    return FieldPlan(names, columns, converters)
+
+
+class FastListMixin:
+    """
+    ViewSet mixin rendering ``list`` from ``.values()`` rows through a
+    FieldPlan. Only used for JSON responses; the browsable API and any
+    serializer the plan cannot express take the regular path.
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = plan_for(self.get_serializer_class())
+        if (
+            plan is None
+            or not getattr(settings, 'BANKING_FAST_LIST', True)
+            or not isinstance(request.accepted_renderer, JSONRenderer)
+        ):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values(*set(plan.columns))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(plan.render(page))
+        else:
+            response = Response(plan.render(queryset))
+        response.plain_json = True
+        return response
@@ -0,0 +1,176 @@
+"""
+Query-parameter filtering that only runs queries an index can answer.
+
+A ViewSet declares ``query_filters``, mapping query parameters to model
+field lookups. ``IndexedFilterBackend`` applies the ones present in the
+request and rejects the request with a 400 unless at least one filtered
+field is the leading column of an index. Every other filter is then applied
+to rows the index has already narrowed down, never to a full table scan.
+A field that only appears further back in an index can be filtered on
+alongside that index's leading field (``amount_min`` with ``account``).
+"""
+import operator
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.db import models
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .statements import parse_bound
+
+
+def parse_int(value):
+    if not value.isdigit():
+        raise ValueError('Expected a positive integer')
+    return int(value)
+
+
+def parse_decimal(value):
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError('Expected a decimal number')
+    if not number.is_finite():
+        raise ValueError('Expected a decimal number')
+    return number
+
+
+def parse_bool(value):
+    lowered = value.lower()
+    if lowered in ('true', '1'):
+        return True
+    if lowered in ('false', '0'):
+        return False
+    raise ValueError('Expected true or false')
+
+
+def parse_day(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError('Expected a date in YYYY-MM-DD format')
+    return day
+
+
+def moment_parser(end=False):
+    """Parser for ISO dates/datetimes; a bare date as an upper bound covers that whole day."""
+    def parse(value):
+        try:
+            return parse_bound(value, 'value', end=end)
+        except serializers.ValidationError:
+            raise ValueError('Expected an ISO 8601 date or datetime')
+    return parse
+
+
+_COMPARISONS = {
+    'exact': operator.eq, 'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le,
+}
+
+
+def _prefix_range(prefix):
+    """``(low, high)`` bounding every string that starts with ``prefix``."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class QueryFilter:
+    """
+    One query parameter applied as ``field__lookup``. ``lookup='prefix'``
+    becomes a ``>= prefix AND < successor`` range, which (unlike ``LIKE``)
+    every backend can answer from a plain b-tree index.
+    """
+
+    def __init__(self, field, lookup='exact', parse=str, choices=None):
+        self.field = field
+        self.lookup = lookup
+        self.parse = parse
+        self.choices = choices
+
+    def value(self, name, raw):
+        try:
+            value = self.parse(raw)
+        except ValueError as exc:
+            raise serializers.ValidationError({name: str(exc)})
+        if self.choices is not None and value not in self.choices:
+            raise serializers.ValidationError({name: f"Expected one of: {', '.join(self.choices)}"})
+        if self.lookup == 'prefix' and not value:
+            raise serializers.ValidationError({name: 'Expected a non-empty prefix'})
+        return value
+
+    def to_q(self, name, raw):
+        value = self.value(name, raw)
+        if self.lookup == 'prefix':
+            low, high = _prefix_range(value)
+            return models.Q(**{f'{self.field}__gte': low, f'{self.field}__lt': high})
+        return models.Q(**{f'{self.field}__{self.lookup}': value})
+
+    def to_predicate(self, name, raw, model):
+        """The test ``to_q`` makes, for rows held in memory as dicts keyed by attname."""
+        value = self.value(name, raw)
+        attname = model._meta.get_field(self.field).attname
+        if self.lookup == 'prefix':
+            low, high = _prefix_range(value)
+            return lambda row: low <= row[attname] < high
+        compare = _COMPARISONS[self.lookup]
+        return lambda row: compare(row[attname], value)
+
+
+@lru_cache(maxsize=None)
+def index_columns(model):
+    """Field names of every index on ``model`` in index order, including unique and FK indexes."""
+    opts = model._meta
+    indexes = [tuple(name.lstrip('-') for name in index.fields) for index in opts.indexes]
+    indexes += [
+        tuple(constraint.fields) for constraint in opts.constraints
+        if isinstance(constraint, models.UniqueConstraint) and constraint.fields
+    ]
+    indexes += [tuple(fields) for fields in opts.unique_together]
+    indexes += [
+        (field.name,) for field in opts.concrete_fields
+        if field.primary_key or field.unique or field.db_index
+    ]
+    return indexes
+
+
+class IndexedFilterBackend(BaseFilterBackend):
+    """Applies a view's ``query_filters`` to ``list`` requests; see the module docstring."""
+
+    def filter_queryset(self, request, queryset, view):
+        declared = getattr(view, 'query_filters', {})
+        if getattr(view, 'action', 'list') != 'list':
+            return queryset
+        requested = [name for name in declared if name in request.query_params]
+        if not requested:
+            return queryset
+
+        fields = {declared[name].field for name in requested}
+        indexes = index_columns(queryset.model)
+        if not any(columns[0] in fields for columns in indexes):
+            leading = sorted(
+                name for name, query_filter in declared.items()
+                if any(columns[0] == query_filter.field for columns in indexes)
+            )
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    f"No index supports filtering on {', '.join(requested)} alone; "
+                    f"add one of: {', '.join(leading)}"
+                ],
+            })
+
+        condition = models.Q()
+        for name in requested:
+            condition &= declared[name].to_q(name, request.query_params[name])
+        return queryset.filter(condition)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': name, 'required': False, 'in': 'query',
+                'description': f'{query_filter.field} {query_filter.lookup}',
+                'schema': {'type': 'string'},
+            }
+            for name, query_filter in getattr(view, 'query_filters', {}).items()
+        ]
@@ -0,0 +1,201 @@
+"""
+Idempotency-Key support for create endpoints.
+
+A client that retries a POST with the same ``Idempotency-Key`` header gets
+the first response back, marked ``Idempotent-Replayed: true``, instead of
+a second object. Responses are kept in IdempotencyKey rows for
+``BANKING_IDEMPOTENCY_TTL`` seconds, keyed on a hash of the user and the
+key (a single unique-index lookup); ``purge_idempotency_keys`` evicts
+expired rows. Reusing a key for a different request body is a 422.
+
+The key row is inserted in the same database transaction as the object the
+request creates, so the unique index settles races: a retry that loses,
+either on that index or on a constraint of the object itself, rolls back
+its own work and replays the winner's response. The lookup
+before the create is therefore only an optimization, and each process
+skips it for keys it has never seen. A two-generation bloom filter
+remembers the keys this process stored within the TTL, and an LRU keeps
+their recent responses, so a first-time key costs no query beyond the
+INSERT and most replays touch no database at all.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction as db_transaction
+from django.utils import timezone
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .posting import _with_retries
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def ttl():
+    return _setting('BANKING_IDEMPOTENCY_TTL', 24 * 60 * 60)
+
+
+class BloomFilter:
+    """Fixed-size bit array answering "definitely not added" or "maybe added"."""
+
+    def __init__(self, bits, hashes):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray((bits + 7) // 8)
+
+    def _positions(self, digest):
+        # ``digest`` is already a uniform hash; slice it instead of rehashing
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], 'big') % self.bits
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        return all(self.array[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class FrontCache:
+    """
+    Process-local front of the key store: a bloom filter of every key stored
+    here in the last one to two TTLs (two generations, rotated every TTL)
+    and an LRU of the most recent responses.
+    """
+
+    def __init__(self, size=None, bloom_bits=None, hashes=4):
+        self.size = size or _setting('BANKING_IDEMPOTENCY_LRU_SIZE', 10000)
+        self.bloom_bits = bloom_bits or _setting('BANKING_IDEMPOTENCY_BLOOM_BITS', 1 << 23)
+        self.hashes = hashes
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.entries = OrderedDict()
+            self.current = BloomFilter(self.bloom_bits, self.hashes)
+            self.previous = BloomFilter(self.bloom_bits, self.hashes)
+            self.rotated_at = time.monotonic()
+
+    def _rotate(self):
+        if time.monotonic() - self.rotated_at >= ttl():
+            self.previous, self.current = self.current, BloomFilter(self.bloom_bits, self.hashes)
+            self.rotated_at = time.monotonic()
+
+    def might_contain(self, scope):
+        digest = bytes.fromhex(scope)
+        with self._lock:
+            self._rotate()
+            return digest in self.current or digest in self.previous
+
+    def get(self, scope):
+        with self._lock:
+            record = self.entries.get(scope)
+            if record is not None:
+                self.entries.move_to_end(scope)
+            return record
+
+    def remember(self, scope, record):
+        with self._lock:
+            self._rotate()
+            self.current.add(bytes.fromhex(scope))
+            self.entries[scope] = record
+            self.entries.move_to_end(scope)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+front_cache = FrontCache()
+
+
+def scope_for(user, key):
+    return hashlib.sha256(f'{user.pk}:{key}'.encode()).hexdigest()
+
+
+def fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f'{request.method} {request.path}\n{payload}'.encode()).hexdigest()
+
+
+def _record(row):
+    return (row.fingerprint, row.status_code, row.body, row.expires_at)
+
+
+def lookup(scope):
+    """The stored, unexpired ``(fingerprint, status, body, expires_at)`` for ``scope``, or None."""
+    record = front_cache.get(scope)
+    if record is None and front_cache.might_contain(scope):
+        row = IdempotencyKey.objects.filter(scope=scope).first()
+        record = _record(row) if row is not None else None
+    if record is None or record[3] <= timezone.now():
+        return None
+    return record
+
+
+def replay(record, request_fingerprint):
+    stored_fingerprint, status_code, body, _ = record
+    if stored_fingerprint != request_fingerprint:
+        return Response(
+            {'detail': f'{HEADER} was already used for a different request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(json.loads(body), status=status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+class IdempotentCreateMixin:
+    """ViewSet mixin honouring ``Idempotency-Key`` on ``create``; see the module docstring."""
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return super().create(request, *args, **kwargs)
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        scope = scope_for(request.user, key)
+        request_fingerprint = fingerprint(request)
+        record = lookup(scope)
+        if record is not None:
+            return replay(record, request_fingerprint)
+        return _with_retries(self._create_once, request, scope, request_fingerprint, args, kwargs)
+
+    def _create_once(self, request, scope, request_fingerprint, args, kwargs):
+        try:
+            with db_transaction.atomic():
+                response = super().create(request, *args, **kwargs)
+                row = IdempotencyKey.objects.create(
+                    scope=scope,
+                    fingerprint=request_fingerprint,
+                    status_code=response.status_code,
+                    body=json.dumps(response.data, cls=DjangoJSONEncoder),
+                    expires_at=timezone.now() + timedelta(seconds=ttl()),
+                )
+        except (IntegrityError, exceptions.APIException):
+            # the create, or the key insert, may have failed because another
+            # request with this key got there first (the retry of a deposit
+            # trips over the reference it already posted): replay its
+            # response, or clear the way if it has expired
+            row = IdempotencyKey.objects.filter(scope=scope).first()
+            if row is None:
+                raise
+            if row.expires_at <= timezone.now():
+                row.delete()
+                return self._create_once(request, scope, request_fingerprint, args, kwargs)
+            front_cache.remember(scope, _record(row))
+            return replay(_record(row), request_fingerprint)
+        front_cache.remember(scope, _record(row))
+        return response
@@ -0,0 +1,208 @@
+"""
+Monthly interest on savings accounts.
+
+The period is the calendar month ending on ``as_of``, which must be the
+month's last day: the reference below names only the month, so a run
+through the middle of it would leave the rest of the month unpaid. Interest is
+``BANKING_SAVINGS_INTEREST_RATE`` percent a year, accrued daily on actual/365
+over each day's closing balance, and quantized to cents once per account.
+
+Closing balances are never walked day by day. With current balance ``B``
+and ``n`` days in the period, the sum of the daily closing balances is
+``n * B`` minus every movement weighted by the number of period days that
+closed before it: movements after the period count ``n`` times, movements on
+day ``d`` count ``d - first_day`` times. Two grouped queries per chunk
+provide those sums for every account at once.
+
+Credits are posted through ``apply_batch`` (one guarded UPDATE per account
+and one ``bulk_create``), one chunk of accounts per transaction, outside the
+velocity limits, which are for customer activity. Every
+credit carries the reference ``INT-<YYYYMM>-<account id>``, so rerunning a
+period, or resuming one after a crash, skips the accounts already credited
+and only completes the rest. That check, and the daily balances, need the
+period's postings in the Transaction table: a period the archive (archive.py)
+reaches into is refused.
+"""
+import calendar
+import multiprocessing
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, connections, transaction as db_transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import archive
+from .amortization import CENT, money
+from .models import Account, Transaction
+from .posting import _with_retries, apply_batch
+from .snapshots import start_of_day
+from .statements import signed_amount_expression
+
+
+def annual_rate():
+    return Decimal(str(getattr(settings, 'BANKING_SAVINGS_INTEREST_RATE', '2.00')))
+
+
+def period_start(as_of):
+    return as_of.replace(day=1)
+
+
+def period_end(day):
+    """Last day of the calendar month of ``day``."""
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def reference(as_of, account_id):
+    """Deterministic reference of the credit for ``account_id`` in the period of ``as_of``."""
+    return f"INT-{as_of:%Y%m}-{account_id}"
+
+
+def eligible_accounts(as_of):
+    """Active savings accounts opened on or before ``as_of``."""
+    return Account.objects.filter(
+        account_type=Account.SAVINGS, is_active=True,
+        created_at__lt=start_of_day(as_of + timedelta(days=1)),
+    )
+
+
+def balance_days(balance, first_day, as_of, daily_moves, moved_after):
+    """
+    Sum of the closing balances from ``first_day`` through ``as_of`` given
+    the current ``balance``, the ``{day: net movement}`` inside the period
+    and the net movement posted after it.
+    """
+    days = (as_of - first_day).days + 1
+    if days <= 0:
+        return Decimal('0')
+    total = days * (balance - moved_after)
+    for day, moved in daily_moves.items():
+        total -= moved * min(max((day - first_day).days, 0), days)
+    return total
+
+
+def _moves(account_ids, start, end):
+    """Net movement per account per day in ``[start, end)`` and per account from ``end`` on."""
+    txns = Transaction.objects.filter(account_id__in=account_ids).order_by()
+    daily = {}
+    rows = (
+        txns.filter(performed_at__gte=start, performed_at__lt=end)
+        .annotate(day=TruncDate('performed_at'))
+        .values('account_id', 'day')
+        .annotate(total=Sum(signed_amount_expression))
+        .values_list('account_id', 'day', 'total')
+    )
+    for account_id, day, total in rows:
+        # SQLite sums decimals in floating point; amounts are whole cents
+        daily.setdefault(account_id, {})[day] = money(total)
+    after = {
+        account_id: money(total)
+        for account_id, total in txns.filter(performed_at__gte=end)
+        .values('account_id').annotate(total=Sum(signed_amount_expression))
+        .values_list('account_id', 'total')
+    }
+    return daily, after
+
+
+def credit_chunk(account_ids, as_of):
+    """
+    Credit the period's interest to ``account_ids`` in one transaction.
+    Returns counts of ``credited``, ``skipped`` (already credited) and
+    ``zero`` (nothing to pay) accounts and the ``interest`` posted.
+    """
+    rate = annual_rate()
+    start = period_start(as_of)
+    counts = {'credited': 0, 'skipped': 0, 'zero': 0, 'interest': Decimal('0.00')}
+    with db_transaction.atomic():
+        # lock first so balances and movements are read from the same state
+        accounts = list(
+            eligible_accounts(as_of).select_for_update().filter(pk__in=account_ids)
+            .order_by('pk').values_list('pk', 'balance', 'created_at')
+        )
+        credited = set(
+            Transaction.objects.filter(reference__in=[reference(as_of, pk) for pk, _, _ in accounts])
+            .values_list('reference', flat=True)
+        )
+        pending = [row for row in accounts if reference(as_of, row[0]) not in credited]
+        counts['skipped'] = len(accounts) - len(pending)
+        daily, after = _moves(
+            [pk for pk, _, _ in pending], start_of_day(start), start_of_day(as_of + timedelta(days=1)),
+        )
+
+        rows = []
+        for pk, balance, created_at in pending:
+            first_day = max(start, timezone.localdate(created_at))
+            interest = money(
+                balance_days(balance, first_day, as_of, daily.get(pk, {}), after.get(pk, 0))
+                * rate / 100 / 365
+            )
+            if interest < CENT:
+                counts['zero'] += 1
+                continue
+            rows.append({
+                'account': pk, 'txn_type': Transaction.DEPOSIT,
+                'amount': interest, 'reference': reference(as_of, pk),
+            })
+        created, rejected = apply_batch(rows, velocity=False)
+    counts['credited'] = len(created)
+    counts['skipped'] += len(rejected)
+    counts['interest'] = sum((rows[i]['amount'] for i in created), Decimal('0.00'))
+    return counts
+
+
+def _init_worker():
+    # every transaction a worker opens writes; on SQLite, take the write lock
+    # at BEGIN so workers queue on busy_timeout instead of failing to upgrade
+    # a read snapshot another worker has already moved past
+    if connection.vendor == 'sqlite':
+        options = connection.settings_dict['OPTIONS']
+        connection.settings_dict['OPTIONS'] = {**options, 'transaction_mode': 'IMMEDIATE'}
+
+
+def _run_chunk(args):
+    counts = _with_retries(credit_chunk, *args)
+    connection.close()
+    return counts
+
+
+def credit_interest(as_of, chunk_size=1000, workers=1, progress=None):
+    """
+    Credit interest for the period of ``as_of`` to every eligible account;
+    returns the summed counts of ``credit_chunk``.
+
+    Raises ValueError when ``as_of`` is not the last day of its month and
+    ArchiveError when postings of the period have been archived.
+    ``progress(counts)`` is called after every finished chunk. Chunks run in
+    ``workers`` processes when the database is reachable from them (not an
+    in-memory SQLite database).
+    """
+    if as_of != period_end(as_of):
+        raise ValueError(f"Interest is credited for whole months; {as_of} is not the last day of {as_of:%Y-%m}")
+    archived = archive.horizon()
+    if archived is not None and archived >= start_of_day(period_start(as_of)):
+        raise archive.ArchiveError(
+            f"Postings of {as_of:%Y-%m} have been archived; its interest can no longer be credited"
+        )
+    account_ids = list(eligible_accounts(as_of).order_by('pk').values_list('pk', flat=True))
+    tasks = [(account_ids[i:i + chunk_size], as_of) for i in range(0, len(account_ids), chunk_size)]
+    totals = {'credited': 0, 'skipped': 0, 'zero': 0, 'interest': Decimal('0.00')}
+
+    def collect(counts):
+        for name, value in counts.items():
+            totals[name] += value
+        if progress:
+            progress(dict(totals))
+
+    in_memory = connection.vendor == 'sqlite' and connection.is_in_memory_db()
+    if workers > 1 and len(tasks) > 1 and not in_memory:
+        # children must open their own connections, never share the parent's
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers, _init_worker) as pool:
+            for counts in pool.imap_unordered(_run_chunk, tasks):
+                collect(counts)
+    else:
+        for task in tasks:
+            collect(_with_retries(credit_chunk, *task))
+    return totals
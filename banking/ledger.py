@@ -0,0 +1,197 @@
+"""
+Ledger checkpoints and reconciliation.
+
+Transaction rows are the ledger's postings: append-only, one per account
+movement, with transfers grouped into balanced JournalEntry rows.
+``Account.balance`` is the cached running total the posting engine keeps
+up to date in the same database transaction as each posting.
+
+BalanceCheckpoint rows derive balances from the postings alone: an opening
+checkpoint is recorded when an account is created, and ``take_checkpoints``
+periodically adds the postings made since an account's last checkpoint.
+``ledger_balance`` then needs the latest checkpoint plus the few postings
+after it, never the whole history. ``reconcile`` re-derives everything in
+one streaming pass over postings and checkpoints ordered by account.
+
+Archived postings (archive.py) are a prefix of each account's postings by
+id; ``reconcile`` takes them from the ArchiveSegment totals instead.
+"""
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .amortization import money
+from .models import Account, ArchiveSegment, BalanceCheckpoint, Transaction
+from .posting import signed_amount
+from .statements import signed_amount_expression
+
+
+def checkpoint_interval():
+    return getattr(settings, 'BANKING_CHECKPOINT_EVERY', 1000)
+
+
+def _covered():
+    """Id of the last transaction covered by the latest checkpoint of the row's account."""
+    return Coalesce(
+        Subquery(
+            BalanceCheckpoint.objects.filter(account=OuterRef('account'))
+            .order_by('-last_transaction_id').values('last_transaction_id')[:1]
+        ),
+        Value(0),
+    )
+
+
+def ledger_balance(account_id):
+    """Latest checkpoint plus the postings after it."""
+    last_id, balance = (
+        BalanceCheckpoint.objects.filter(account_id=account_id)
+        .order_by('-last_transaction_id').values_list('last_transaction_id', 'balance').first()
+        or (0, Decimal('0.00'))
+    )
+    moved = (
+        Transaction.objects.filter(account_id=account_id, id__gt=last_id)
+        .aggregate(total=Sum(signed_amount_expression))['total']
+    )
+    return balance + money(moved or Decimal('0'))
+
+
+def take_checkpoints(every=None, batch_size=1000):
+    """
+    Checkpoint every account with at least ``every`` postings since its last
+    checkpoint (default ``BANKING_CHECKPOINT_EVERY``). Returns the number of
+    checkpoints written.
+
+    Each batch locks its accounts first. Postings change an account under the
+    same lock, so its transaction ids up to the checkpoint are all committed.
+    """
+    every = every or checkpoint_interval()
+    due = list(
+        Transaction.objects.alias(covered=_covered()).filter(id__gt=F('covered'))
+        .values('account').annotate(pending=Count('id')).filter(pending__gte=every)
+        .order_by('account').values_list('account', flat=True)
+    )
+    written = 0
+    for start in range(0, len(due), batch_size):
+        ids = due[start:start + batch_size]
+        with db_transaction.atomic():
+            list(Account.objects.select_for_update().filter(pk__in=ids).order_by('pk').values_list('pk'))
+            latest = {
+                account_id: balance
+                for account_id, balance in BalanceCheckpoint.objects.filter(
+                    account__in=ids,
+                    last_transaction_id=Subquery(
+                        BalanceCheckpoint.objects.filter(account=OuterRef('account'))
+                        .order_by('-last_transaction_id').values('last_transaction_id')[:1]
+                    ),
+                ).values_list('account', 'balance')
+            }
+            moved = (
+                Transaction.objects.filter(account__in=ids).alias(covered=_covered())
+                .filter(id__gt=F('covered')).values('account')
+                .annotate(last=Max('id'), total=Sum(signed_amount_expression))
+                .order_by().values_list('account', 'last', 'total')
+            )
+            written += len(BalanceCheckpoint.objects.bulk_create([
+                BalanceCheckpoint(
+                    account_id=account_id, last_transaction_id=last,
+                    balance=latest.get(account_id, Decimal('0.00')) + money(total),
+                )
+                for account_id, last, total in moved
+            ]))
+    return written
+
+
+def _by_account(rows):
+    """
+    ``take(account_id)`` yielding that account's rows from ``rows`` ordered
+    by account. Accounts must be asked for in ascending order.
+    """
+    groups = groupby(rows, key=itemgetter(0))
+    current = next(groups, None)
+
+    def take(account_id):
+        nonlocal current
+        if current is None or current[0] != account_id:
+            return ()
+        group = current[1]
+        # groupby moves on only once the previous group is exhausted
+        yield from group
+        current = next(groups, None)
+    return take
+
+
+def reconcile(chunk_size=2000):
+    """
+    Re-derive every account's checkpoints and cached balance from its raw
+    postings and check that journal entries balance.
+
+    Accounts, postings and checkpoints are each streamed once in account
+    order and merged, so memory stays flat however long the history is.
+    Returns counts and a list of mismatches.
+    """
+    accounts = Account.objects.order_by('pk').values_list('pk', 'balance').iterator(chunk_size=chunk_size)
+    postings = _by_account(
+        Transaction.objects.order_by('account_id', 'id')
+        .values_list('account_id', 'id', 'txn_type', 'amount').iterator(chunk_size=chunk_size)
+    )
+    checkpoints = _by_account(
+        BalanceCheckpoint.objects.order_by('account_id', 'last_transaction_id')
+        .values_list('account_id', 'last_transaction_id', 'balance').iterator(chunk_size=chunk_size)
+    )
+    archived = _by_account(
+        ArchiveSegment.objects.values('account').annotate(
+            last=Max('last_id'), net=Sum(F('deposit_total') - F('withdrawal_total')), rows=Sum('row_count'),
+        ).order_by('account').values_list('account', 'last', 'net', 'rows').iterator(chunk_size=chunk_size)
+    )
+
+    counts = {'accounts': 0, 'transactions': 0, 'checkpoints': 0, 'archived': 0}
+    mismatches = []
+
+    def check(account_id, name, derived, stored):
+        if derived != stored:
+            mismatches.append({
+                'account': account_id, 'check': name, 'derived': str(derived), 'stored': str(stored),
+            })
+
+    for account_id, balance in accounts:
+        counts['accounts'] += 1
+        pending = list(checkpoints(account_id))
+        counts['checkpoints'] += len(pending)
+        pending.reverse()
+        running = Decimal('0.00')
+        if pending and pending[-1][1] == 0:
+            running = pending.pop()[2]
+        for _, boundary, net, rows in archived(account_id):
+            # checkpoints inside the archived prefix cannot be re-derived;
+            # the one archiving wrote at its boundary is checked below
+            running += money(net)
+            counts['archived'] += rows
+            while pending and pending[-1][1] < boundary:
+                pending.pop()
+        for _, txn_id, txn_type, amount in postings(account_id):
+            while pending and pending[-1][1] < txn_id:
+                _, last_id, stored = pending.pop()
+                check(account_id, f'checkpoint #{last_id}', running, stored)
+            running += signed_amount(txn_type, amount)
+            counts['transactions'] += 1
+        for _, last_id, stored in reversed(pending):
+            check(account_id, f'checkpoint #{last_id}', running, stored)
+        check(account_id, 'balance', running, balance)
+
+    # a transfer whose other leg was archived is left with one leg
+    horizon = ArchiveSegment.objects.aggregate(latest=Max('last_performed_at'))['latest']
+    unbalanced = (
+        Transaction.objects.filter(entry__isnull=False).values('entry')
+        .annotate(total=Sum(signed_amount_expression), legs=Count('id'), performed=Max('performed_at'))
+        .exclude(total=0, legs=2).order_by('entry').values_list('entry', 'total', 'legs', 'performed')
+    )
+    for entry_id, total, legs, performed in unbalanced.iterator(chunk_size=chunk_size):
+        if legs == 1 and horizon is not None and performed <= horizon:
+            continue
+        mismatches.append({'entry': entry_id, 'check': 'unbalanced', 'derived': str(money(total)), 'stored': '0.00'})
+    return {**counts, 'mismatches': mismatches}
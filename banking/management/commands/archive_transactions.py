@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from banking.archive import ArchiveError, archive_dir, archive_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        "Move transactions older than --older-than days into gzip NDJSON segment files per account and month "
+        "under BANKING_ARCHIVE_DIR. Statements and account-filtered transaction lists read them back; "
+        "account balances are not changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, required=True, metavar="DAYS", help="Archive postings older than this")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Postings moved per database transaction")
+
+    def handle(self, *args, **options):
+        # interest credits and velocity windows are computed from recent postings
+        minimum = getattr(settings, "BANKING_ARCHIVE_MIN_DAYS", 62)
+        if options["older_than"] < minimum:
+            raise CommandError(f"--older-than must be at least {minimum} days (BANKING_ARCHIVE_MIN_DAYS)")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+
+        def progress(counts):
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"  {counts['transactions']} postings in {counts['segments']} segment(s)")
+
+        started = time.perf_counter()
+        try:
+            counts = archive_transactions(cutoff, chunk_size=options["chunk_size"], progress=progress)
+        except ArchiveError as exc:
+            raise CommandError(str(exc))
+        if counts["swept"]:
+            self.stdout.write(f"Removed {counts['swept']} file(s) left by an interrupted run")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {counts['transactions']} transaction(s) into {counts['segments']} segment(s) "
+            f"under {archive_dir()} in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from banking.snapshots import build_snapshots
+
+
+class Command(BaseCommand):
+    help = "Roll complete days of transactions into DailyBalanceSnapshot rows, resuming after the last snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--until", help="Last day to snapshot, YYYY-MM-DD (default: yesterday)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        until = None
+        if options["until"]:
+            until = parse_date(options["until"])
+            if until is None:
+                raise CommandError("--until must be a date in YYYY-MM-DD format")
+        written = build_snapshots(until=until, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} snapshot(s)"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from banking.ledger import checkpoint_interval, take_checkpoints
+
+
+class Command(BaseCommand):
+    help = "Checkpoint ledger balances of accounts with enough postings since their last checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every", type=int,
+            help="Postings since the last checkpoint that make an account due (default: BANKING_CHECKPOINT_EVERY)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Accounts per database transaction")
+
+    def handle(self, *args, **options):
+        every = options["every"] or checkpoint_interval()
+        if every < 1 or options["batch_size"] < 1:
+            raise CommandError("--every and --batch-size must be positive")
+        written = take_checkpoints(every=every, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} checkpoint(s)"))
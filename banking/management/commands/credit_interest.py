@@ -0,0 +1,57 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from banking.archive import ArchiveError
+from banking.interest import annual_rate, credit_interest, period_end
+
+
+class Command(BaseCommand):
+    help = (
+        "Credit monthly interest to active savings accounts for the month of --as-of. "
+        "Safe to rerun: accounts already credited for the period are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--as-of", help="Last day of the period, YYYY-MM-DD (default: end of last month)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Accounts per database transaction")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes crediting chunks in parallel")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        as_of = today.replace(day=1) - timedelta(days=1)
+        if options["as_of"]:
+            as_of = parse_date(options["as_of"])
+            if as_of is None:
+                raise CommandError("--as-of must be a date in YYYY-MM-DD format")
+        if as_of >= today:
+            raise CommandError("--as-of must be a day that has already ended")
+        if as_of != period_end(as_of):
+            raise CommandError(f"--as-of must be the last day of a month, e.g. {period_end(as_of)}")
+        if options["chunk_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--chunk-size and --workers must be positive")
+
+        def progress(counts):
+            done = counts["credited"] + counts["skipped"] + counts["zero"]
+            self.stdout.write(f"{done} accounts, {counts['credited']} credited, {counts['interest']} interest")
+
+        started = time.perf_counter()
+        try:
+            counts = credit_interest(
+                as_of,
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                progress=progress if options["verbosity"] > 1 else None,
+            )
+        except ArchiveError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Credited {counts['interest']} interest at {annual_rate()}% to {counts['credited']} account(s) "
+            f"for {as_of:%Y-%m} in {time.perf_counter() - started:.1f}s "
+            f"({counts['skipped']} already credited, {counts['zero']} with nothing to pay)"
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from banking.models import Account, Loan, Transaction
+from banking.urls import router
+
+
+class Command(BaseCommand):
+    help = "Print the database query plan for each ViewSet list query and the statement hot path."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=50,
+            help="Rows fetched per page when explaining list queries (default: 50)",
+        )
+
+    def hot_queries(self, limit):
+        """Yield (label, queryset) pairs for the queries worth watching."""
+        for prefix, viewset, basename in router.registry:
+            queryset = viewset.queryset.all()
+            ordering = getattr(viewset.pagination_class, "ordering", None)
+            if ordering:
+                queryset = queryset.order_by(*ordering)
+            yield f"{basename}-list", queryset[:limit]
+
+        account_id = Account.objects.values_list("pk", flat=True).first() or 1
+        customer_id = Account.objects.values_list("customer_id", flat=True).first() or 1
+        yield "account statement", (
+            Transaction.objects.filter(account_id=account_id).order_by("-performed_at")[:limit]
+        )
+        yield "transactions by type", (
+            Transaction.objects.filter(txn_type=Transaction.DEPOSIT).order_by("performed_at")[:limit]
+        )
+        yield "active accounts of customer", (
+            Account.objects.filter(customer_id=customer_id, is_active=True)
+        )
+        yield "loans of customer by status", (
+            Loan.objects.filter(customer_id=customer_id, status=Loan.APPROVED)
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Database vendor: {connection.vendor}")
+        for label, queryset in self.hot_queries(options["limit"]):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label}"))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from banking.ledger import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-derive every checkpoint and cached account balance from the raw postings in one "
+        "streaming pass, and check that journal entries balance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per round trip")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = reconcile(chunk_size=options["chunk_size"])
+        for mismatch in result["mismatches"]:
+            subject = f"account {mismatch['account']}" if "account" in mismatch else f"entry {mismatch['entry']}"
+            self.stderr.write(
+                f"{subject}: {mismatch['check']} derived {mismatch['derived']}, stored {mismatch['stored']}"
+            )
+        summary = (
+            f"{result['accounts']} accounts, {result['transactions']} postings "
+            f"({result['archived']} archived), {result['checkpoints']} checkpoints in {time.perf_counter() - started:.1f}s"
+        )
+        if result["mismatches"]:
+            raise CommandError(f"{len(result['mismatches'])} mismatch(es) across {summary}")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {summary}"))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from banking.seeding import MODELS, seed
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate synthetic customers, accounts, cards, loans and transaction history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, required=True)
+        parser.add_argument("--accounts-per-customer", type=int, default=2)
+        parser.add_argument("--txns-per-account", type=int, default=50)
+        parser.add_argument("--loans-per-customer", type=int, default=1)
+        parser.add_argument("--branches", type=int, default=10)
+        parser.add_argument("--days", type=int, default=365, help="Spread history over this many past days")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Customers per database transaction")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows per INSERT")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes writing chunks in parallel")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed")
+        parser.add_argument(
+            "--no-pragmas", action="store_true",
+            help="Keep SQLite's default journal/sync settings while loading",
+        )
+
+    def handle(self, *args, **options):
+        if options["customers"] < 1 or options["chunk_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--customers, --chunk-size and --workers must be positive")
+        if not 0 < options["accounts_per_customer"] < 1000:
+            raise CommandError("--accounts-per-customer must be between 1 and 999")
+
+        def progress(counts, elapsed):
+            rows = sum(counts.values())
+            self.stdout.write(
+                f"{counts['customers']}/{options['customers']} customers, "
+                f"{rows} rows, {rows / elapsed:,.0f} rows/s"
+            )
+
+        started = time.perf_counter()
+        counts = seed(
+            options["customers"],
+            accounts_per_customer=options["accounts_per_customer"],
+            txns_per_account=options["txns_per_account"],
+            loans_per_customer=options["loans_per_customer"],
+            branches=options["branches"],
+            days=options["days"],
+            chunk_size=options["chunk_size"],
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            seed=options["seed"],
+            sqlite_pragmas=not options["no_pragmas"],
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+        elapsed = time.perf_counter() - started
+        for name in MODELS:
+            self.stdout.write(f"{name:<13} {counts[name]:>10}  {counts[name] / elapsed:>12,.0f} rows/s")
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)"
+        ))
@@ -0,0 +1,130 @@
+"""
+In-process request metrics per resolved endpoint.
+
+Latencies go into fixed, log-spaced histogram buckets, so recording is a
+bisect plus a few integer adds under a lock, and p50/p95/p99 are read back
+from the buckets (upper bound of the bucket holding the quantile).
+"""
+import threading
+from bisect import bisect_left
+
+# seconds; the last bucket catches everything slower
+BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'),
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class EndpointStats:
+    __slots__ = ('count', 'latency_sum', 'buckets', 'queries', 'sql_time')
+
+    def __init__(self):
+        self.count = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.queries = 0
+        self.sql_time = 0.0
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, hits in zip(BUCKETS, self.buckets):
+            seen += hits
+            if seen >= rank:
+                return bound
+        return BUCKETS[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, latency, queries, sql_time):
+        index = bisect_left(BUCKETS, latency)
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.count += 1
+            stats.latency_sum += latency
+            stats.buckets[index] += 1
+            stats.queries += queries
+            stats.sql_time += sql_time
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def snapshot(self):
+        """Copy of the per-endpoint stats, safe to read without the lock."""
+        with self._lock:
+            copies = {}
+            for endpoint, stats in self._endpoints.items():
+                copy = EndpointStats()
+                copy.count, copy.latency_sum = stats.count, stats.latency_sum
+                copy.buckets = list(stats.buckets)
+                copy.queries, copy.sql_time = stats.queries, stats.sql_time
+                copies[endpoint] = copy
+            return copies
+
+
+registry = MetricsRegistry()
+
+
+def _label(endpoint):
+    return endpoint.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _bound(value):
+    return '+Inf' if value == float('inf') else repr(value)
+
+
+def render_prometheus(snapshot=None):
+    """Render the registry in the Prometheus text exposition format."""
+    snapshot = registry.snapshot() if snapshot is None else snapshot
+    lines = [
+        '# HELP banking_request_duration_seconds Request latency by endpoint.',
+        '# TYPE banking_request_duration_seconds histogram',
+    ]
+    for endpoint, stats in sorted(snapshot.items()):
+        name = _label(endpoint)
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, stats.buckets):
+            cumulative += hits
+            lines.append(
+                f'banking_request_duration_seconds_bucket{{endpoint="{name}",le="{_bound(bound)}"}} {cumulative}'
+            )
+        lines.append(f'banking_request_duration_seconds_sum{{endpoint="{name}"}} {stats.latency_sum}')
+        lines.append(f'banking_request_duration_seconds_count{{endpoint="{name}"}} {stats.count}')
+
+    lines += [
+        '# HELP banking_request_latency_quantile_seconds Latency quantile estimated from the histogram.',
+        '# TYPE banking_request_latency_quantile_seconds gauge',
+    ]
+    for endpoint, stats in sorted(snapshot.items()):
+        for q in QUANTILES:
+            lines.append(
+                f'banking_request_latency_quantile_seconds{{endpoint="{_label(endpoint)}",quantile="{q}"}} '
+                f'{_bound(stats.quantile(q))}'
+            )
+
+    lines += [
+        '# HELP banking_sql_queries_total SQL queries executed by endpoint.',
+        '# TYPE banking_sql_queries_total counter',
+    ]
+    lines += [
+        f'banking_sql_queries_total{{endpoint="{_label(e)}"}} {s.queries}' for e, s in sorted(snapshot.items())
+    ]
+    lines += [
+        '# HELP banking_sql_duration_seconds_total Time spent in SQL by endpoint.',
+        '# TYPE banking_sql_duration_seconds_total counter',
+    ]
+    lines += [
+        f'banking_sql_duration_seconds_total{{endpoint="{_label(e)}"}} {s.sql_time}'
+        for e, s in sorted(snapshot.items())
+    ]
+    return '\n'.join(lines) + '\n'
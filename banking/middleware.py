@@ -0,0 +1,92 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+from .metrics import registry
+
+
+class _QueryTimer:
+    """``execute_wrapper`` that counts queries and sums their wall time."""
+    __slots__ = ('count', 'elapsed')
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Opt-in per-endpoint latency and SQL metrics.
+
+    Requests are keyed by the resolved URL name (``transaction-list``,
+    ``account-detail``, ...); unresolved requests are grouped under
+    ``<unresolved>``. Streaming bodies are timed up to the point the
+    response is returned, not while they are consumed. Queries are counted
+    on every database alias. Read the data from ``GET /api/_metrics/``.
+
+    The middleware is async-capable, so under ASGI the async views keep
+    their native path. Connections are per thread and the async ORM runs
+    queries in the request's ``sync_to_async`` thread, so the query timer
+    is attached to that thread's connections.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _wrap(timer):
+        """Add ``timer`` to every alias's connection in this thread; returns their wrapper lists."""
+        wrappers = [connections[alias].execute_wrappers for alias in connections]
+        for chain in wrappers:
+            chain.append(timer)
+        return wrappers
+
+    @staticmethod
+    def _unwrap(wrappers, timer):
+        for chain in wrappers:
+            chain.remove(timer)
+
+    def _record(self, request, started, timer):
+        elapsed = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.view_name if match else None) or '<unresolved>'
+        registry.record(endpoint, elapsed, timer.count, timer.elapsed)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        wrappers = self._wrap(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            self._unwrap(wrappers, timer)
+        self._record(request, started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        wrappers = await sync_to_async(self._wrap)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            # the request's queries are over, so no thread hop back is needed
+            self._unwrap(wrappers, timer)
+        self._record(request, started, timer)
+        return response
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0002_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='account',
+            name='acct_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='txn_performed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['-created_at', '-id'], name='acct_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='branch',
+            index=models.Index(fields=['-created_at', '-id'], name='branch_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['-created_at', '-id'], name='card_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['-created_at', '-id'], name='cust_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['-created_at', '-id'], name='loan_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-performed_at', '-id'], name='txn_performed_id_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('closing_balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('deposit_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('withdrawal_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('txn_count', models.PositiveIntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='banking.account')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('account', 'date'), name='snapshot_account_date_uniq')],
+            },
+        ),
+    ]
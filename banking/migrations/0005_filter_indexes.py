@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0004_daily_balance_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['account_type', 'balance'], name='acct_type_balance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', 'start_date'], name='loan_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'amount'], name='txn_account_amount_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def opening_checkpoints(apps, schema_editor):
+    """Record each existing account's opening balance: today's balance minus its whole history."""
+    Account = apps.get_model('banking', 'Account')
+    Transaction = apps.get_model('banking', 'Transaction')
+    BalanceCheckpoint = apps.get_model('banking', 'BalanceCheckpoint')
+    signed = models.Case(
+        models.When(txn_type='DEPOSIT', then=models.F('amount')),
+        default=-models.F('amount'),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+    )
+    moved = dict(
+        Transaction.objects.values('account').annotate(total=models.Sum(signed))
+        .order_by().values_list('account', 'total')
+    )
+    BalanceCheckpoint.objects.bulk_create(
+        (
+            BalanceCheckpoint(
+                account_id=pk, last_transaction_id=0,
+                balance=(balance - moved.get(pk, 0)).quantize(balance),
+            )
+            for pk, balance in Account.objects.values_list('pk', 'balance').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0005_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('entry_type', models.CharField(choices=[('TRANSFER', 'Transfer')], max_length=8)),
+                ('reference', models.CharField(max_length=60, unique=True)),
+                ('posted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'journal entries',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='entry_created_id_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='entry',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='legs', to='banking.journalentry'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'id'], name='txn_account_id_idx'),
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_transaction_id', models.PositiveBigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='banking.account')),
+            ],
+            options={
+                'ordering': ['-last_transaction_id'],
+                'constraints': [models.UniqueConstraint(fields=('account', 'last_transaction_id'), name='checkpoint_account_txn_uniq')],
+            },
+        ),
+        migrations.RunPython(opening_checkpoints, migrations.RunPython.noop),
+    ]
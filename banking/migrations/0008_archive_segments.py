@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0007_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('month', models.DateField()),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('first_id', models.PositiveBigIntegerField()),
+                ('last_id', models.PositiveBigIntegerField()),
+                ('first_performed_at', models.DateTimeField()),
+                ('last_performed_at', models.DateTimeField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('deposit_total', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('withdrawal_total', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('sha256', models.CharField(max_length=64)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_segments', to='banking.account')),
+            ],
+            options={
+                'ordering': ['account', 'first_id'],
+                'indexes': [models.Index(fields=['account', 'last_performed_at'], name='segment_account_last_idx')],
+            },
+        ),
+    ]
@@ -22,6 +22,11 @@ class Customer(TimeStampedModel):
     )
     address = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='cust_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -31,6 +36,11 @@ class Branch(TimeStampedModel):
     code = models.CharField(max_length=10, unique=True)
     city = models.CharField(max_length=120)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='branch_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.code})"
 
@@ -52,6 +62,11 @@ class Account(TimeStampedModel):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='acct_created_id_idx'),
+            models.Index(fields=['customer', 'is_active'], name='acct_customer_active_idx'),
+            models.Index(fields=['account_type', 'balance'], name='acct_type_balance_idx'),
+        ]
 
     def __str__(self):
         return f"{self.account_number} ({self.get_account_type_display()})"
@@ -71,6 +86,11 @@ class Card(TimeStampedModel):
     expiry_date = models.DateField()
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='card_created_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.card_number} ({self.card_type})"
 
@@ -92,10 +112,42 @@ class Loan(TimeStampedModel):
     start_date = models.DateField(default=timezone.now)
     end_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='loan_created_id_idx'),
+            models.Index(fields=['customer', 'status'], name='loan_customer_status_idx'),
+            models.Index(fields=['status', 'start_date'], name='loan_status_start_idx'),
+        ]
+
     def __str__(self):
         return f"Loan {self.id} - {self.customer}"
 
 
+class JournalEntry(TimeStampedModel):
+    """
+    One balanced movement of money between accounts. Its legs are the
+    Transaction rows that point at it; their signed amounts sum to zero.
+    """
+    TRANSFER = 'TRANSFER'
+    TYPES = [
+        (TRANSFER, 'Transfer'),
+    ]
+
+    entry_type = models.CharField(max_length=8, choices=TYPES)
+    reference = models.CharField(max_length=60, unique=True)
+    posted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'journal entries'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='entry_created_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entry_type} {self.reference}"
+
+
 class Transaction(TimeStampedModel):
     DEPOSIT = 'DEPOSIT'
     WITHDRAW = 'WITHDRAW'
@@ -109,10 +161,101 @@ class Transaction(TimeStampedModel):
     amount = models.DecimalField(max_digits=14, decimal_places=2, validators=[MinValueValidator(0.01)])
     reference = models.CharField(max_length=64, unique=True)
     performed_at = models.DateTimeField(default=timezone.now)
+    entry = models.ForeignKey(
+        JournalEntry, on_delete=models.PROTECT, related_name='legs', null=True, blank=True,
+    )
 
     class Meta:
         ordering = ['-performed_at']
+        indexes = [
+            models.Index(fields=['-performed_at', '-id'], name='txn_performed_id_idx'),
+            models.Index(fields=['account', '-performed_at'], name='txn_account_performed_idx'),
+            models.Index(fields=['txn_type', 'performed_at'], name='txn_type_performed_idx'),
+            models.Index(fields=['account', 'amount'], name='txn_account_amount_idx'),
+            models.Index(fields=['account', 'id'], name='txn_account_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.txn_type} {self.amount} on {self.account}"
 
+
+
+class DailyBalanceSnapshot(TimeStampedModel):
+    """End-of-day balance and activity totals for one account on one day."""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='snapshots')
+    date = models.DateField()
+    closing_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    deposit_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    withdrawal_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    txn_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'date'], name='snapshot_account_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.account} @ {self.date}: {self.closing_balance}"
+
+
+class BalanceCheckpoint(TimeStampedModel):
+    """
+    Balance of an account derived from its opening balance and every
+    transaction up to and including ``last_transaction_id``. The checkpoint
+    with ``last_transaction_id=0`` is the opening balance.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='checkpoints')
+    last_transaction_id = models.PositiveBigIntegerField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+
+    class Meta:
+        ordering = ['-last_transaction_id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account', 'last_transaction_id'], name='checkpoint_account_txn_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.account} through #{self.last_transaction_id}: {self.balance}"
+
+
+class IdempotencyKey(models.Model):
+    """First response to a create request, replayed to retries sending the same Idempotency-Key."""
+    scope = models.CharField(max_length=64, unique=True)  # sha256 of user id and key
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    body = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.scope[:12]} ({self.status_code})"
+
+
+class ArchiveSegment(TimeStampedModel):
+    """
+    Index of one gzip NDJSON file of archived transactions: postings
+    ``first_id`` through ``last_id`` of one account within one month.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='archive_segments')
+    month = models.DateField()
+    path = models.CharField(max_length=255, unique=True)  # relative to BANKING_ARCHIVE_DIR
+    first_id = models.PositiveBigIntegerField()
+    last_id = models.PositiveBigIntegerField()
+    first_performed_at = models.DateTimeField()
+    last_performed_at = models.DateTimeField()
+    row_count = models.PositiveIntegerField()
+    deposit_total = models.DecimalField(max_digits=14, decimal_places=2)
+    withdrawal_total = models.DecimalField(max_digits=14, decimal_places=2)
+    sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        ordering = ['account', 'first_id']
+        indexes = [
+            models.Index(fields=['account', 'last_performed_at'], name='segment_account_last_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.account} {self.month:%Y-%m} #{self.first_id}-{self.last_id}"
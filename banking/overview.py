@@ -0,0 +1,140 @@
+"""
+Customer 360: a customer with their accounts (each with its card and most
+recent transactions), loans and balance totals in one response.
+
+``overview_queryset`` loads everything in a fixed four queries however many
+accounts the customer has: the customer, accounts joined to their cards, one
+windowed query for the last N transactions of every account (a sliced
+``Prefetch`` becomes ``ROW_NUMBER() OVER (PARTITION BY account ...)``) and
+the loans. ``aoverview`` builds the same document from the async ORM, in five
+sequential reads.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+
+from .fast_serializers import plan_for
+from .models import Account, Card, Customer, Loan, Transaction
+from .serializers import (
+    AccountSerializer, CardSerializer, CustomerSerializer, LoanSerializer, TransactionSerializer,
+)
+
+RECENT_ORDERING = ('-performed_at', '-id')
+
+
+def recent_limit(query_params):
+    """``?transactions=N`` per account, default ``BANKING_OVERVIEW_TRANSACTIONS``."""
+    default = getattr(settings, 'BANKING_OVERVIEW_TRANSACTIONS', 5)
+    maximum = getattr(settings, 'BANKING_OVERVIEW_MAX_TRANSACTIONS', 50)
+    value = query_params.get('transactions')
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = -1
+    if not 0 <= limit <= maximum:
+        raise serializers.ValidationError({'transactions': f'Expected an integer from 0 to {maximum}'})
+    return limit
+
+
+def overview_queryset(limit):
+    return Customer.objects.prefetch_related(
+        Prefetch('accounts', queryset=Account.objects.select_related('card').order_by('id')),
+        Prefetch(
+            'accounts__transactions',
+            queryset=Transaction.objects.order_by(*RECENT_ORDERING)[:limit],
+            to_attr='recent_transactions',
+        ),
+        Prefetch('loans', queryset=Loan.objects.order_by('id')),
+    )
+
+
+def _sum(rows, field, include=lambda row: True):
+    return str(sum((Decimal(row[field]) for row in rows if include(row)), Decimal('0.00')))
+
+
+def assemble(customer, accounts, cards, transactions, loans):
+    """
+    The overview document from serialized rows. ``cards`` maps account id to
+    card and ``transactions`` maps account id to its newest transactions.
+    """
+    outstanding = lambda loan: loan['status'] != Loan.REPAID  # noqa: E731
+    return {
+        **customer,
+        'accounts': [
+            {
+                **account,
+                'card': cards.get(account['id']),
+                'recent_transactions': transactions.get(account['id'], []),
+            }
+            for account in accounts
+        ],
+        'loans': loans,
+        'totals': {
+            'accounts': len(accounts),
+            'active_accounts': sum(1 for account in accounts if account['is_active']),
+            'balance': _sum(accounts, 'balance'),
+            'active_balance': _sum(accounts, 'balance', lambda account: account['is_active']),
+            'loans': len(loans),
+            'outstanding_principal': _sum(loans, 'principal_amount', outstanding),
+        },
+    }
+
+
+def build_overview(customer):
+    """Overview for a customer fetched through ``overview_queryset``."""
+    accounts = list(customer.accounts.all())
+    cards, transactions = {}, {}
+    for account in accounts:
+        try:
+            cards[account.pk] = CardSerializer(account.card).data
+        except Card.DoesNotExist:
+            pass
+        transactions[account.pk] = TransactionSerializer(account.recent_transactions, many=True).data
+    return assemble(
+        CustomerSerializer(customer).data,
+        AccountSerializer(accounts, many=True).data,
+        cards,
+        transactions,
+        LoanSerializer(customer.loans.all(), many=True).data,
+    )
+
+
+async def _rows(queryset, serializer_class):
+    plan = plan_for(serializer_class)
+    return plan.render([row async for row in queryset.values(*set(plan.columns))])
+
+
+async def aoverview(pk, limit):
+    """
+    ``build_overview`` for async views. The five reads are awaited one
+    after another: Django's async ORM runs each through ``sync_to_async`` on
+    one shared thread and connection, so gathering them would not overlap
+    them. The view still frees its worker while they run.
+    """
+    recent = (
+        Transaction.objects.filter(account__customer_id=pk)
+        .annotate(position=Window(
+            RowNumber(), partition_by=[F('account_id')],
+            order_by=[F('performed_at').desc(), F('id').desc()],
+        ))
+        .filter(position__lte=limit)
+        .order_by('account_id', *RECENT_ORDERING)
+    )
+    customer = await _rows(Customer.objects.filter(pk=pk), CustomerSerializer)
+    if not customer:
+        raise Customer.DoesNotExist
+    accounts = await _rows(Account.objects.filter(customer_id=pk).order_by('id'), AccountSerializer)
+    cards = await _rows(Card.objects.filter(account__customer_id=pk), CardSerializer)
+    transactions = await _rows(recent, TransactionSerializer) if limit else []
+    loans = await _rows(Loan.objects.filter(customer_id=pk).order_by('id'), LoanSerializer)
+    by_account = {}
+    for row in transactions:
+        by_account.setdefault(row['account'], []).append(row)
+    return assemble(
+        customer[0], accounts, {card['account']: card for card in cards}, by_account, loans,
+    )
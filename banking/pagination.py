@@ -0,0 +1,197 @@
+import heapq
+import json
+from base64 import b64decode, b64encode
+from itertools import dropwhile, islice
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _to_string(value):
+    # mirrors Field.value_to_string for the column types used in orderings
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination on a composite, unique ordering.
+
+    The cursor carries the ordering values of the last row on the page and
+    the next page is fetched with ``WHERE (a, b) < (x, y) ... LIMIT n``, so a
+    deep page costs the same index seek as the first one. Ordering must end
+    in a unique column (``id``) so that ties are broken deterministically.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _fields(self, queryset):
+        opts = queryset.model._meta
+        return [
+            (name.lstrip('-'), name.startswith('-'), opts.get_field(name.lstrip('-')))
+            for name in self.ordering
+        ]
+
+    def dump_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        return b64encode(payload.encode('ascii')).decode('ascii')
+
+    def load_cursor(self, encoded, fields):
+        """``(values, reverse)`` from a cursor string; ValueError if it is malformed."""
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')).decode('ascii'))
+            raw = payload['v']
+            if len(raw) != len(fields):
+                raise ValueError
+            values = [field.to_python(value) for value, (_, _, field) in zip(raw, fields)]
+            return values, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise ValueError(self.invalid_cursor_message)
+
+    def encode_cursor(self, values, reverse):
+        return replace_query_param(self.base_url, self.cursor_query_param, self.dump_cursor(values, reverse))
+
+    def decode_cursor(self, request, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            return self.load_cursor(encoded, fields)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def row_values(self, obj, fields):
+        """Cursor values for a model instance or a ``.values()`` row."""
+        if isinstance(obj, dict):
+            return [_to_string(obj[field.attname]) for _, _, field in fields]
+        return [field.value_to_string(obj) for _, _, field in fields]
+
+    def seek(self, fields, values, reverse):
+        """Build the ``Q`` for rows strictly after ``values`` in page order."""
+        condition = Q()
+        for i, (name, descending, _) in enumerate(fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            for j in range(i):
+                step &= Q(**{fields[j][0]: values[j]})
+            condition |= step
+        # a plain range on the leading column lets the index bound the scan
+        name, descending, _ = fields[0]
+        lookup = 'lte' if descending != reverse else 'gte'
+        return Q(**{f'{name}__{lookup}': values[0]}) & condition
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self._fields_cache = fields = self._fields(queryset)
+        self._values, self._reverse = values, reverse = self.decode_cursor(request, fields)
+
+        order_by = [
+            (name if descending == reverse else f'-{name}')
+            for name, descending, _ in fields
+        ]
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self.seek(fields, values, reverse))
+        return queryset[:self.page_size + 1]
+
+    def _finish_page(self, rows):
+        fields, values, reverse = self._fields_cache, self._values, self._reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_link = self.previous_link = None
+        if rows:
+            # walking backwards there is always a page after this one and
+            # only ``has_more`` tells whether one exists before it
+            if has_more or reverse:
+                self.next_link = self.encode_cursor(self.row_values(rows[-1], fields), reverse=False)
+            if (has_more if reverse else values is not None):
+                self.previous_link = self.encode_cursor(self.row_values(rows[0], fields), reverse=True)
+        return rows
+
+    def _merge_extra(self, queryset, rows, view):
+        """
+        Merge rows kept outside ``queryset`` into a fetched page. A view may
+        define ``extra_rows(queryset, descending, after)`` returning rows of
+        the same shape in page order, or None; the ordering must run one way.
+        """
+        source = getattr(view, 'extra_rows', None)
+        fields, values, reverse = self._fields_cache, self._values, self._reverse
+        descending = fields[0][1] != reverse
+        extra = source(queryset, descending, values) if source is not None else None
+        if extra is None:
+            return rows
+
+        def key(row):
+            if isinstance(row, dict):
+                return tuple(row[field.attname] for _, _, field in fields)
+            return tuple(getattr(row, field.attname) for _, _, field in fields)
+
+        if values is not None:
+            bound = tuple(values)
+            extra = dropwhile(lambda row: key(row) >= bound if descending else key(row) <= bound, extra)
+        return list(islice(heapq.merge(rows, extra, key=key, reverse=descending), self.page_size + 1))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = list(self._page_queryset(queryset, request))
+        return self._finish_page(self._merge_extra(queryset, rows, view))
+
+    async def apaginate_queryset(self, queryset, request):
+        """``paginate_queryset`` for async views, fetching the page with the async ORM."""
+        return self._finish_page([row async for row in self._page_queryset(queryset, request)])
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        }
+
+    def get_next_link(self):
+        return self.next_link
+
+    def get_previous_link(self):
+        return self.previous_link
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    """Newest-first paging on ``(created_at, id)``."""
+    ordering = ('-created_at', '-id')
+
+
+class PerformedAtKeysetPagination(KeysetPagination):
+    """Newest-first paging on ``(performed_at, id)`` for transactions."""
+    ordering = ('-performed_at', '-id')
@@ -0,0 +1,319 @@
+"""
+Balance posting engine.
+
+Every deposit or withdrawal is applied as a single conditional UPDATE on the
+account row (``balance = balance +/- amount``) followed by the INSERT of the
+Transaction row, both inside one atomic block. The database does the
+read-modify-write, so concurrent postings on the same account cannot lose
+updates, and a withdrawal that would overdraw simply matches zero rows. A
+card payment also requires its card to be active and unexpired in the same
+UPDATE.
+"""
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction as db_transaction
+from django.db.models import Case, Exists, F, OuterRef, Value, When
+from django.utils import timezone
+
+from .models import Account, Card, JournalEntry, Transaction
+from .signals import balances_changed
+from .velocity import ACCOUNT, limits as velocity_limits
+
+
+class PostingError(Exception):
+    """Raised when a posting is rejected by the account state."""
+
+
+class AccountInactive(PostingError):
+    def __init__(self):
+        super().__init__("Account is not active")
+
+
+class InsufficientFunds(PostingError):
+    def __init__(self):
+        super().__init__("Insufficient balance for withdrawal")
+
+
+class CardUnusable(PostingError):
+    def __init__(self):
+        super().__init__("Card is inactive or expired")
+
+
+class SameAccount(PostingError):
+    def __init__(self):
+        super().__init__("Source and destination must be different accounts")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _observe(events):
+    """Count ``(account_id, txn_type, amount, performed_at)`` postings in the velocity windows once committed."""
+    db_transaction.on_commit(lambda: velocity_limits.record(ACCOUNT, events))
+
+
+def signed_amount(txn_type, amount):
+    """Return the balance delta a posting of ``txn_type`` applies."""
+    if txn_type == Transaction.DEPOSIT:
+        return amount
+    if txn_type == Transaction.WITHDRAW:
+        return -amount
+    raise ValueError(f"Unknown transaction type: {txn_type}")
+
+
+def _usable_cards(card_id):
+    return Card.objects.filter(pk=card_id, is_active=True, expiry_date__gte=timezone.localdate())
+
+
+def _rejection(account_id, card_id=None):
+    """Work out why the conditional update matched no row."""
+    is_active = (
+        Account.objects.filter(pk=account_id)
+        .values_list('is_active', flat=True)
+        .first()
+    )
+    if not is_active:
+        return AccountInactive()
+    if card_id is not None and not _usable_cards(card_id).filter(account_id=account_id).exists():
+        return CardUnusable()
+    return InsufficientFunds()
+
+
+def apply_posting(account_id, txn_type, amount, reference, performed_at=None, card_id=None):
+    """
+    Apply one posting and record its Transaction in a single atomic block.
+    Raises PostingError when the account is inactive or would be overdrawn,
+    or when ``card_id`` is given and that card of the account is inactive
+    or expired.
+    """
+    delta = signed_amount(txn_type, amount)
+    with db_transaction.atomic():
+        rows = Account.objects.filter(pk=account_id, is_active=True)
+        if delta < 0:
+            rows = rows.filter(balance__gte=-delta)
+        if card_id is not None:
+            rows = rows.filter(Exists(_usable_cards(card_id).filter(account_id=OuterRef('pk'))))
+        if not rows.update(balance=F('balance') + delta, updated_at=timezone.now()):
+            raise _rejection(account_id, card_id)
+        balances_changed.send(sender=Account, account_ids=[account_id])
+        txn = Transaction.objects.create(
+            account_id=account_id,
+            txn_type=txn_type,
+            amount=amount,
+            reference=reference,
+            performed_at=performed_at or timezone.now(),
+        )
+        _observe([(account_id, txn_type, amount, txn.performed_at)])
+        return txn
+
+
+def _with_retries(func, *args):
+    """
+    Call ``func``, retrying lock and serialization failures with backoff.
+
+    Retries are only attempted when the caller is not already inside an
+    atomic block; otherwise the enclosing transaction owns the failure.
+    """
+    retries = _setting('BANKING_POSTING_MAX_RETRIES', 5)
+    backoff = _setting('BANKING_POSTING_BACKOFF', 0.005)
+    backoff_cap = _setting('BANKING_POSTING_BACKOFF_CAP', 0.1)
+    attempt = 0
+    while True:
+        try:
+            return func(*args)
+        except OperationalError:
+            if attempt >= retries or db_transaction.get_connection().in_atomic_block:
+                raise
+            delay = min(backoff_cap, backoff * (2 ** attempt))
+            time.sleep(delay * (1 + random.random()))
+            attempt += 1
+
+
+def post_transaction(account_id, txn_type, amount, reference, performed_at=None, card_id=None):
+    """Apply a posting, retrying lock and serialization failures with backoff."""
+    return _with_retries(apply_posting, account_id, txn_type, amount, reference, performed_at, card_id)
+
+
+class BatchConflict(OperationalError):
+    """An account balance moved under a batch between its read and its update."""
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def apply_batch(rows, batch_size=None, velocity=True):
+    """
+    Apply many postings with a fixed number of queries per batch.
+
+    ``rows`` is a list of dicts with ``account``, ``txn_type``, ``amount`` and
+    ``reference``. Accounts and existing references are fetched in one pass
+    each, rows are checked in order against a running balance per account
+    and, unless ``velocity`` is off, against the account velocity limits
+    counting the rows accepted before them, accounts the batch could
+    overdraw get one guarded UPDATE each, the rest
+    share one UPDATE per chunk, and accepted rows are written with
+    ``bulk_create``. Returns ``(created, rejected)`` where
+    ``created`` maps row index to Transaction and ``rejected`` maps row index
+    to an error message.
+    """
+    batch_size = batch_size or _setting('BANKING_BULK_BATCH_SIZE', 1000)
+    lookup_size = _setting('BANKING_BULK_LOOKUP_SIZE', 500)
+    now = timezone.now()
+    rejected = {}
+    accepted = []
+
+    with db_transaction.atomic():
+        account_ids = sorted({row['account'] for row in rows})
+        accounts = {}
+        for ids in _chunks(account_ids, lookup_size):
+            # lock in primary key order so concurrent batches cannot deadlock
+            accounts.update(
+                (pk, (balance, is_active))
+                for pk, balance, is_active in Account.objects.select_for_update()
+                .filter(pk__in=ids).order_by('pk')
+                .values_list('pk', 'balance', 'is_active')
+            )
+
+        references = [row['reference'] for row in rows]
+        taken = set()
+        for refs in _chunks(references, lookup_size):
+            taken.update(
+                Transaction.objects.filter(reference__in=refs).order_by()
+                .values_list('reference', flat=True)
+            )
+
+        # running balance and lowest point reached, per account
+        running = {pk: balance for pk, (balance, _) in accounts.items()}
+        deltas = {}
+        low_points = {}
+        held = {}
+        for index, row in enumerate(rows):
+            pk, reference = row['account'], row['reference']
+            if pk not in accounts:
+                rejected[index] = f"Account {pk} does not exist"
+                continue
+            if not accounts[pk][1]:
+                rejected[index] = str(AccountInactive())
+                continue
+            if reference in taken:
+                rejected[index] = "Transaction with this reference already exists"
+                continue
+            delta = signed_amount(row['txn_type'], row['amount'])
+            if running[pk] + delta < 0:
+                rejected[index] = str(InsufficientFunds())
+                continue
+            if velocity:
+                broken = velocity_limits.check(ACCOUNT, pk, row['txn_type'], row['amount'], held=held)
+                if broken:
+                    rejected[index] = f"Velocity limit exceeded: {broken}"
+                    continue
+                velocity_limits.hold(ACCOUNT, pk, row['txn_type'], row['amount'], held)
+            taken.add(reference)
+            running[pk] += delta
+            deltas[pk] = deltas.get(pk, 0) + delta
+            low_points[pk] = min(low_points.get(pk, 0), running[pk] - accounts[pk][0])
+            accepted.append(index)
+
+        # accounts the batch never takes below their starting balance need no
+        # balance guard, so they share one UPDATE per lookup chunk
+        unguarded = sorted(pk for pk in deltas if not low_points[pk])
+        for ids in _chunks(unguarded, lookup_size):
+            updated = Account.objects.filter(pk__in=ids, is_active=True).update(
+                balance=F('balance') + Case(
+                    *[When(pk=pk, then=Value(deltas[pk])) for pk in ids],
+                    output_field=Account._meta.get_field('balance'),
+                ),
+                updated_at=now,
+            )
+            if updated != len(ids):
+                raise BatchConflict("An account was deactivated during the batch")
+        for pk, delta in deltas.items():
+            if not low_points[pk]:
+                continue
+            guarded = Account.objects.filter(
+                pk=pk, is_active=True, balance__gte=-low_points[pk]
+            )
+            if not guarded.update(balance=F('balance') + delta, updated_at=now):
+                raise BatchConflict(f"Balance of account {pk} changed during the batch")
+        if deltas:
+            balances_changed.send(sender=Account, account_ids=list(deltas))
+
+        created = Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    account_id=rows[i]['account'],
+                    txn_type=rows[i]['txn_type'],
+                    amount=rows[i]['amount'],
+                    reference=rows[i]['reference'],
+                    performed_at=now,
+                )
+                for i in accepted
+            ],
+            batch_size=batch_size,
+        )
+        if created:
+            _observe([(txn.account_id, txn.txn_type, txn.amount, now) for txn in created])
+    return dict(zip(accepted, created)), rejected
+
+
+def post_batch(rows, batch_size=None):
+    """Apply a batch, retrying the whole batch on lock or balance conflicts."""
+    return _with_retries(apply_batch, rows, batch_size)
+
+
+def apply_transfer(source_id, destination_id, amount, reference, performed_at=None):
+    """
+    Move ``amount`` between two accounts as one balanced JournalEntry: a
+    WITHDRAW leg on the source and a DEPOSIT leg on the destination, with
+    references ``<reference>:out`` and ``<reference>:in``.
+
+    Both account rows are locked in primary key order before either is
+    changed, so transfers running in opposite directions cannot deadlock.
+    """
+    if source_id == destination_id:
+        raise SameAccount()
+    performed_at = performed_at or timezone.now()
+    with db_transaction.atomic():
+        active = dict(
+            Account.objects.select_for_update()
+            .filter(pk__in=sorted((source_id, destination_id))).order_by('pk')
+            .values_list('pk', 'is_active')
+        )
+        if not (active.get(source_id) and active.get(destination_id)):
+            raise AccountInactive()
+        now = timezone.now()
+        if not Account.objects.filter(pk=source_id, balance__gte=amount).update(
+            balance=F('balance') - amount, updated_at=now,
+        ):
+            raise InsufficientFunds()
+        Account.objects.filter(pk=destination_id).update(balance=F('balance') + amount, updated_at=now)
+        balances_changed.send(sender=Account, account_ids=[source_id, destination_id])
+
+        entry = JournalEntry.objects.create(
+            entry_type=JournalEntry.TRANSFER, reference=reference, posted_at=performed_at,
+        )
+        Transaction.objects.bulk_create([
+            Transaction(
+                entry=entry, account_id=source_id, txn_type=Transaction.WITHDRAW,
+                amount=amount, reference=f"{reference}:out", performed_at=performed_at,
+            ),
+            Transaction(
+                entry=entry, account_id=destination_id, txn_type=Transaction.DEPOSIT,
+                amount=amount, reference=f"{reference}:in", performed_at=performed_at,
+            ),
+        ])
+        _observe([
+            (source_id, Transaction.WITHDRAW, amount, performed_at),
+            (destination_id, Transaction.DEPOSIT, amount, performed_at),
+        ])
+    return entry
+
+
+def post_transfer(source_id, destination_id, amount, reference, performed_at=None):
+    """Apply a transfer, retrying lock and serialization failures with backoff."""
+    return _with_retries(apply_transfer, source_id, destination_id, amount, reference, performed_at)
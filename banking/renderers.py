@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, see FastJSONRenderer
+    orjson = None
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render a list as newline-delimited JSON, anything else as one line."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(row, cls=JSONEncoder) + '\n' for row in rows).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """Render a list of flat dicts (or a single dict) as CSV with a header row."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        out = io.StringIO()
+        if rows:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return out.getvalue().encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that hands payloads already reduced to plain JSON types
+    (responses flagged ``plain_json`` by the fast list path) to ``orjson``
+    when it is installed. The bytes match JSONRenderer's compact output;
+    everything else goes through JSONRenderer unchanged.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if (
+            orjson is None
+            or data is None
+            or not getattr(response, 'plain_json', False)
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data)
+        # JSONRenderer always escapes these to stay a strict JavaScript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
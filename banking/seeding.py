@@ -0,0 +1,253 @@
+"""
+Synthetic data for local load testing.
+
+``seed`` writes customers, accounts (each with a card) and loans with
+``bulk_create`` and the much larger transaction history with COPY-style
+raw inserts, one chunk of customers per
+database transaction. Every generated unique value (email, phone,
+account/card number, reference) is derived from a global customer index
+that continues after the highest index already in the database, so repeated
+runs never collide. Each account's balance equals the sum of its history,
+which never dips below zero.
+
+Chunks are independent and seeded from their own index, so the data is the
+same whether it is written by one process or several.
+"""
+import multiprocessing
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, connections
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .models import Account, Branch, Card, Customer, Loan, Transaction
+
+EMAIL_DOMAIN = 'seed.example'
+BRANCH_PREFIX = 'SB'
+MODELS = ('customers', 'accounts', 'cards', 'loans', 'transactions')
+TRANSACTION_FIELDS = (
+    'account', 'txn_type', 'amount', 'reference', 'performed_at', 'created_at', 'updated_at',
+)
+
+# Trade durability for speed while bulk loading; only the seeding
+# connection is affected.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=OFF',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-262144',
+    'PRAGMA busy_timeout=60000',
+)
+
+
+def apply_sqlite_pragmas():
+    # journal_mode can't change inside a transaction (e.g. under a TestCase)
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+
+
+def next_customer_index():
+    """First free global customer index (indexes are zero-padded in the email)."""
+    last = (
+        Customer.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+        .order_by('-email').values_list('email', flat=True).first()
+    )
+    return int(last[len('seed'):].split('@')[0]) + 1 if last else 0
+
+
+def ensure_branches(count):
+    Branch.objects.bulk_create([
+        Branch(name=f'Seed Branch {b}', code=f'{BRANCH_PREFIX}{b:05d}', city=f'City {b % 50}')
+        for b in range(count)
+    ], ignore_conflicts=True)
+    return list(
+        Branch.objects.filter(code__startswith=BRANCH_PREFIX)
+        .order_by('code').values_list('pk', flat=True)[:count]
+    )
+
+
+def copy_rows(model, fields, rows):
+    """
+    COPY-style load of ``rows`` (tuples of database-ready values for
+    ``fields``), skipping model instances and per-row SQL compilation.
+    Uses ``COPY ... FROM STDIN`` on PostgreSQL with psycopg 3 and a single
+    ``executemany`` INSERT elsewhere.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in fields)
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if connection.vendor == 'postgresql' and hasattr(raw, 'copy'):
+            with raw.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row)
+        else:
+            placeholders = ', '.join(['%s'] * len(fields))
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', rows)
+
+
+def _history(rng, count, start, span):
+    """
+    ``count`` (txn_type, amount, performed_at) rows, values already adapted
+    for the database, whose running balance never dips below zero.
+    """
+    ops = connection.ops
+    moments = sorted(start + timedelta(seconds=rng.randrange(span)) for _ in range(count))
+    rows, balance = [], Decimal('0.00')
+    for performed_at in moments:
+        amount = Decimal(rng.randrange(100, 50000)) / 100
+        if rng.random() < 0.35 and amount <= balance:
+            balance -= amount
+            txn_type = Transaction.WITHDRAW
+        else:
+            balance += amount
+            txn_type = Transaction.DEPOSIT
+        rows.append((
+            txn_type, ops.adapt_decimalfield_value(amount, 14, 2),
+            ops.adapt_datetimefield_value(performed_at),
+        ))
+    return rows, balance
+
+
+def seed_chunk(first, last, options):
+    """Write customers ``first``..``last - 1`` and everything they own; returns row counts."""
+    if options.get('sqlite_pragmas', True):
+        apply_sqlite_pragmas()
+    rng = random.Random(options['seed'] * 1000003 + first)
+    branch_ids = options['branch_ids']
+    batch_size = options['batch_size']
+    now = timezone.now()
+    window = timedelta(days=options['days'])
+    today = date.today()
+
+    # Generate everything before taking the write lock so parallel workers
+    # only serialize on the inserts themselves.
+    customers, loans, accounts, histories = [], [], [], []
+    for c in range(first, last):
+        customers.append(Customer(
+            first_name=f'First{c}', last_name=f'Last{c}',
+            email=f'seed{c:09d}@{EMAIL_DOMAIN}', phone=f'+9{c:012d}',
+        ))
+        for _ in range(options['loans_per_customer']):
+            start = today - timedelta(days=rng.randrange(30, 1500))
+            loans.append(Loan(
+                principal_amount=Decimal(rng.randrange(1000, 500000)),
+                interest_rate=Decimal(rng.randrange(100, 2500)) / 100,
+                status=rng.choice([Loan.PENDING, Loan.APPROVED, Loan.APPROVED, Loan.REPAID]),
+                start_date=start, end_date=start + timedelta(days=365 * rng.randrange(1, 6)),
+            ))
+        for a in range(options['accounts_per_customer']):
+            history, balance = _history(
+                rng, options['txns_per_account'], now - window, int(window.total_seconds()),
+            )
+            accounts.append(Account(
+                branch_id=rng.choice(branch_ids), account_number=f'SB{c:09d}{a:03d}',
+                account_type=rng.choice([Account.SAVINGS, Account.CURRENT]), balance=balance,
+            ))
+            histories.append(history)
+    stamp = connection.ops.adapt_datetimefield_value(now)
+
+    with db_transaction.atomic():
+        created = Customer.objects.bulk_create(customers, batch_size=batch_size)
+        if created and created[0].pk is None:
+            created = list(Customer.objects.filter(
+                email__gte=f'seed{first:09d}@', email__lt=f'seed{last:09d}@',
+            ).order_by('email'))
+        customer_ids = [customer.pk for customer in created]
+
+        loans_per, accounts_per = options['loans_per_customer'], options['accounts_per_customer']
+        for n, loan in enumerate(loans):
+            loan.customer_id = customer_ids[n // loans_per]
+        Loan.objects.bulk_create(loans, batch_size=batch_size)
+
+        for n, account in enumerate(accounts):
+            account.customer_id = customer_ids[n // accounts_per]
+        created = Account.objects.bulk_create(accounts, batch_size=batch_size)
+        if created and created[0].pk is None:
+            created = list(Account.objects.filter(
+                account_number__gte=f'SB{first:09d}', account_number__lt=f'SB{last:09d}',
+            ).order_by('account_number'))
+
+        Card.objects.bulk_create([
+            Card(
+                account_id=account.pk, card_number=f'5{int(account.account_number[2:]):015d}',
+                expiry_date=today + timedelta(days=365 * 3),
+            )
+            for account in created
+        ], batch_size=batch_size)
+
+        rows, txn_count = [], 0
+        for account, history in zip(created, histories):
+            number = account.account_number
+            rows.extend(
+                (account.pk, txn_type, amount, f'SEED-{number}-{n}', performed_at, stamp, stamp)
+                for n, (txn_type, amount, performed_at) in enumerate(history)
+            )
+            if len(rows) >= batch_size:
+                copy_rows(Transaction, TRANSACTION_FIELDS, rows)
+                txn_count += len(rows)
+                rows = []
+        copy_rows(Transaction, TRANSACTION_FIELDS, rows)
+        txn_count += len(rows)
+
+    return {
+        'customers': len(customers), 'accounts': len(accounts), 'cards': len(accounts),
+        'loans': len(loans), 'transactions': txn_count,
+    }
+
+
+def _run_chunk(args):
+    counts = seed_chunk(*args)
+    connection.close()
+    return counts
+
+
+def _in_memory_sqlite():
+    return connection.vendor == 'sqlite' and connection.is_in_memory_db()
+
+
+def seed(customers, accounts_per_customer=2, txns_per_account=50, loans_per_customer=1,
+         branches=10, days=365, chunk_size=1000, batch_size=2000, workers=1, seed=1,
+         sqlite_pragmas=True, progress=None):
+    """
+    Generate ``customers`` customers and everything they own; returns row counts.
+
+    ``progress(counts, elapsed)`` is called after every finished chunk.
+    Several ``workers`` need a database other processes can reach, so an
+    in-memory SQLite database always seeds in-process.
+    """
+    options = {
+        'accounts_per_customer': accounts_per_customer, 'txns_per_account': txns_per_account,
+        'loans_per_customer': loans_per_customer, 'days': days, 'batch_size': batch_size,
+        'seed': seed, 'sqlite_pragmas': sqlite_pragmas, 'branch_ids': ensure_branches(branches),
+    }
+    first = next_customer_index()
+    tasks = [
+        (start, min(start + chunk_size, first + customers), options)
+        for start in range(first, first + customers, chunk_size)
+    ]
+    totals = dict.fromkeys(MODELS, 0)
+    started = time.perf_counter()
+
+    def collect(counts):
+        for name, value in counts.items():
+            totals[name] += value
+        if progress:
+            progress(dict(totals), time.perf_counter() - started)
+
+    if workers > 1 and len(tasks) > 1 and not _in_memory_sqlite():
+        # children must open their own connections, never share the parent's
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            for counts in pool.imap_unordered(_run_chunk, tasks):
+                collect(counts)
+    else:
+        for task in tasks:
+            collect(seed_chunk(*task))
+    return totals
@@ -1,7 +1,9 @@
 from rest_framework import serializers
-from django.db import transaction as db_transaction
-from .models import Customer, Branch, Account, Card, Loan, Transaction
+from .models import Customer, Branch, Account, Card, Loan, Transaction, JournalEntry
+from .posting import PostingError, SameAccount, post_transaction, post_transfer
+from .velocity import ACCOUNT, limits as velocity_limits
 from datetime import date
+from decimal import Decimal
 
 
 
@@ -37,6 +39,8 @@ class AccountSerializer(serializers.ModelSerializer):
         """Ensure account balance is not negative."""
         if value < 0:
             raise serializers.ValidationError("Balance cannot be negative")
+        if self.instance is not None and value != self.instance.balance:
+            raise serializers.ValidationError("Balance only changes through transactions")
         return value
     
     def validate_account_number(self, value):
@@ -97,7 +101,7 @@ class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = '__all__'
-        read_only_fields = ['performed_at']
+        read_only_fields = ['performed_at', 'entry']
 
     def validate(self, attrs):
         """Validate transaction rules."""
@@ -114,24 +118,89 @@ class TransactionSerializer(serializers.ModelSerializer):
         if not account.is_active:
             raise serializers.ValidationError("Account is not active")
 
+        broken = velocity_limits.check(ACCOUNT, account.pk, txn_type, amount)
+        if broken:
+            raise serializers.ValidationError(f"Velocity limit exceeded: {broken}")
+
         return attrs
 
     def create(self, validated_data):
         """
         Create a transaction and update account balance atomically.
-        Ensures withdrawals cannot exceed the account balance.
+        The balance change is applied by the posting engine as a conditional
+        update, so withdrawals cannot exceed the account balance even under
+        concurrent postings.
         """
-        with db_transaction.atomic():
-            account = validated_data['account']
-            amount = validated_data['amount']
-            txn_type = validated_data['txn_type']
-
-            if txn_type == Transaction.DEPOSIT:
-                account.balance += amount
-            elif txn_type == Transaction.WITHDRAW:
-                if account.balance < amount:
-                    raise serializers.ValidationError("Insufficient balance for withdrawal")
-                account.balance -= amount
-
-            account.save(update_fields=['balance', 'updated_at'])
-            return super().create(validated_data)
+        try:
+            return post_transaction(
+                account_id=validated_data['account'].pk,
+                txn_type=validated_data['txn_type'],
+                amount=validated_data['amount'],
+                reference=validated_data['reference'],
+            )
+        except PostingError as exc:
+            raise serializers.ValidationError(str(exc))
+
+
+class BulkTransactionRowSerializer(serializers.Serializer):
+    """
+    Shape check for one row of a bulk post. Account lookups and reference
+    uniqueness are checked for the whole batch at once by the posting engine.
+    """
+    account = serializers.IntegerField(min_value=1)
+    txn_type = serializers.ChoiceField(choices=Transaction.TYPES)
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal('0.01'))
+    reference = serializers.CharField(max_length=64)
+
+
+class JournalLegSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Transaction
+        fields = ['id', 'account', 'txn_type', 'amount', 'reference']
+
+
+class CardAuthorizationSerializer(serializers.Serializer):
+    """A card payment to authorize; ``reference`` defaults to a generated one."""
+    card_number = serializers.CharField(min_length=16, max_length=16)
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal('0.01'))
+    reference = serializers.CharField(max_length=64, required=False)
+
+
+class TransferSerializer(serializers.ModelSerializer):
+    """
+    Transfer between two accounts, posted as one balanced journal entry
+    whose two legs show up in each account's transactions.
+    """
+    source = serializers.PrimaryKeyRelatedField(queryset=Account.objects.all(), write_only=True)
+    destination = serializers.PrimaryKeyRelatedField(queryset=Account.objects.all(), write_only=True)
+    amount = serializers.DecimalField(
+        max_digits=14, decimal_places=2, min_value=Decimal('0.01'), write_only=True,
+    )
+    legs = JournalLegSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = JournalEntry
+        fields = ['id', 'entry_type', 'reference', 'posted_at', 'source', 'destination', 'amount', 'legs']
+        read_only_fields = ['entry_type', 'posted_at']
+
+    def validate(self, attrs):
+        if attrs['source'] == attrs['destination']:
+            raise serializers.ValidationError(str(SameAccount()))
+        reference = attrs['reference']
+        if Transaction.objects.filter(reference__in=[f"{reference}:out", f"{reference}:in"]).exists():
+            raise serializers.ValidationError({"reference": "A transaction already uses this reference"})
+        broken = velocity_limits.check(ACCOUNT, attrs['source'].pk, Transaction.WITHDRAW, attrs['amount'])
+        if broken:
+            raise serializers.ValidationError(f"Velocity limit exceeded: {broken}")
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return post_transfer(
+                source_id=validated_data['source'].pk,
+                destination_id=validated_data['destination'].pk,
+                amount=validated_data['amount'],
+                reference=validated_data['reference'],
+            )
+        except PostingError as exc:
+            raise serializers.ValidationError(str(exc))
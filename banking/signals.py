@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+
+from . import cache
+from .authentication import token_cache
+from .models import Account, BalanceCheckpoint, Branch, Card, Customer
+
+# Sent by the posting engine after it changes balances with a queryset
+# update, which bypasses post_save. ``account_ids`` lists the touched rows.
+balances_changed = Signal()
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Branch)
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Branch)
+@receiver(post_delete, sender=Account)
+def invalidate_cached_row(sender, instance, **kwargs):
+    cache.invalidate(sender, instance.pk)
+
+
+@receiver(balances_changed)
+def invalidate_cached_accounts(sender, account_ids, **kwargs):
+    for pk in account_ids:
+        cache.invalidate(Account, pk)
+
+
+@receiver(post_save, sender=Account)
+def record_opening_balance(sender, instance, created, raw=False, **kwargs):
+    """The opening checkpoint every later ledger balance is derived from."""
+    if created and not raw:
+        BalanceCheckpoint.objects.create(account=instance, last_transaction_id=0, balance=instance.balance)
+
+
+@receiver(post_save, sender=Card)
+@receiver(post_delete, sender=Card)
+def refresh_indexed_card(sender, instance, **kwargs):
+    # cards imports posting, which imports this module
+    from .cards import card_index
+    pk = instance.pk
+    db_transaction.on_commit(lambda: card_index.refresh(card_ids=[pk]))
+
+
+@receiver(post_save, sender=Account)
+def refresh_indexed_account(sender, instance, created, **kwargs):
+    from .cards import card_index
+    if not created:
+        pk = instance.pk
+        db_transaction.on_commit(lambda: card_index.refresh(account_ids=[pk]))
+
+
+@receiver(post_delete, sender=Token)
+def revoke_cached_token(sender, instance, **kwargs):
+    token_cache.discard(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_cached_user_tokens(sender, instance, **kwargs):
+    # cached tokens carry the user row; deactivation or permission changes
+    # must not outlive the save
+    token_cache.discard_user(instance.pk)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """The 'tuned' database profile's pragmas, on every new SQLite connection."""
+    pragmas = getattr(settings, 'BANKING_SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
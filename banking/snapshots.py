@@ -0,0 +1,142 @@
+"""
+Daily balance snapshots.
+
+``build_snapshots`` rolls complete days of Transaction history into one
+DailyBalanceSnapshot row per account per active day, picking up after the
+last snapshot of each account. ``balance_at`` answers point-in-time balance
+queries from the nearest snapshot plus the few transactions around it,
+archived ones included.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction as db_transaction
+from django.db.models import (
+    Case, Count, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import archive
+from .models import Account, DailyBalanceSnapshot, Transaction
+from .statements import opening_balance, signed_amount_expression
+
+
+def start_of_day(day):
+    """Aware datetime at midnight of ``day`` in the current time zone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _total(txn_type):
+    amount_field = DecimalField(max_digits=14, decimal_places=2)
+    return Sum(Case(
+        When(txn_type=txn_type, then=F('amount')),
+        default=Value(0, output_field=amount_field),
+        output_field=amount_field,
+    ))
+
+
+def build_snapshots(until=None, batch_size=1000):
+    """
+    Write snapshots for every complete day up to and including ``until``
+    (default: yesterday) that is not covered yet. Returns the number of rows.
+    """
+    if until is None:
+        until = timezone.localdate() - timedelta(days=1)
+
+    last_dates, closing = {}, {}
+    latest = DailyBalanceSnapshot.objects.filter(
+        date=Subquery(
+            DailyBalanceSnapshot.objects.filter(account=OuterRef('account'))
+            .order_by('-date').values('date')[:1]
+        )
+    )
+    for account_id, day, balance in latest.values_list('account', 'date', 'closing_balance'):
+        last_dates[account_id] = day
+        closing[account_id] = balance
+
+    # accounts never snapshotted start from their opening balance, which is
+    # the current balance minus every movement ever posted to them
+    unseen = Account.objects.filter(
+        ~Exists(DailyBalanceSnapshot.objects.filter(account=OuterRef('pk')))
+    )
+    moved = dict(
+        Transaction.objects.filter(account__in=unseen.values('pk'))
+        .values('account').annotate(total=Sum(signed_amount_expression))
+        .order_by().values_list('account', 'total')
+    )
+    for account_id, balance in unseen.values_list('pk', 'balance'):
+        closing[account_id] = balance - moved.get(account_id, 0)
+
+    scope = Q(account__in=unseen.values('pk'))
+    if last_dates:
+        scope |= Q(performed_at__gte=start_of_day(min(last_dates.values()) + timedelta(days=1)))
+    days = (
+        Transaction.objects.filter(scope, performed_at__lt=start_of_day(until + timedelta(days=1)))
+        .annotate(day=TruncDate('performed_at'))
+        .values('account_id', 'day')
+        .annotate(
+            deposits=_total(Transaction.DEPOSIT),
+            withdrawals=_total(Transaction.WITHDRAW),
+            count=Count('id'),
+        )
+        .order_by('account_id', 'day')
+        .values_list('account_id', 'day', 'deposits', 'withdrawals', 'count')
+    )
+
+    written = 0
+    batch = []
+    with db_transaction.atomic():
+        for account_id, day, deposits, withdrawals, count in days.iterator(chunk_size=batch_size):
+            last = last_dates.get(account_id)
+            if last is not None and day <= last:
+                continue
+            closing[account_id] += deposits - withdrawals
+            batch.append(DailyBalanceSnapshot(
+                account_id=account_id, date=day, closing_balance=closing[account_id],
+                deposit_total=deposits, withdrawal_total=withdrawals, txn_count=count,
+            ))
+            if len(batch) >= batch_size:
+                DailyBalanceSnapshot.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        DailyBalanceSnapshot.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def balance_at(account, day):
+    """
+    Closing balance of ``account`` at the end of ``day``.
+
+    Starts from the nearest snapshot on or before ``day`` and adds the
+    movements after it; with no earlier snapshot it works back from the
+    nearest later snapshot, or from the live balance if there is none.
+    """
+    end = start_of_day(day + timedelta(days=1))
+    txns = Transaction.objects.filter(account=account)
+
+    before = (
+        DailyBalanceSnapshot.objects.filter(account=account, date__lte=day)
+        .order_by('-date').values_list('date', 'closing_balance').first()
+    )
+    if before is not None:
+        snap_day, balance = before
+        since = start_of_day(snap_day + timedelta(days=1))
+        moved = txns.filter(
+            performed_at__gte=since, performed_at__lt=end,
+        ).aggregate(total=Sum(signed_amount_expression))['total'] or 0
+        return balance + moved + archive.movement(account.pk, since, end)
+
+    after = (
+        DailyBalanceSnapshot.objects.filter(account=account, date__gt=day)
+        .order_by('date').values_list('date', 'closing_balance').first()
+    )
+    if after is not None:
+        snap_day, balance = after
+        until = start_of_day(snap_day + timedelta(days=1))
+        moved = txns.filter(
+            performed_at__gte=end, performed_at__lt=until,
+        ).aggregate(total=Sum(signed_amount_expression))['total'] or 0
+        return balance - moved - archive.movement(account.pk, end, until)
+
+    return opening_balance(account, end)
@@ -0,0 +1,216 @@
+"""
+Streaming account statements.
+
+Rows are read straight from the database as tuples in chunks and written out
+line by line, so memory use stays flat however long the statement is.
+Postings moved to the archive (archive.py) are merged back in by
+``(performed_at, id)``, one segment file at a time, where the range reaches
+them.
+
+The opening balance and the rows must describe the same ledger. The
+account's balance and the id of its latest posting are read in one
+statement; the movement behind the opening balance and the row stream both
+stop at that id, so a posting committed while a statement is being read is
+left out of both. Postings to one account get increasing ids in commit
+order, because each takes the account row lock before it inserts.
+"""
+import csv
+import heapq
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+
+from . import archive
+from .models import Account, Transaction
+
+STATEMENT_COLUMNS = ('id', 'performed_at', 'reference', 'txn_type', 'amount', 'balance')
+
+signed_amount_expression = Case(
+    When(txn_type=Transaction.DEPOSIT, then=F('amount')),
+    default=-F('amount'),
+    output_field=DecimalField(max_digits=14, decimal_places=2),
+)
+
+
+def parse_bound(value, name, end=False):
+    """
+    Parse a ``from``/``to`` query value as a datetime or a date.
+    A bare ``to`` date covers the whole day.
+    """
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    elif moment is None:
+        raise serializers.ValidationError({name: "Expected an ISO 8601 date or datetime"})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _opening(account, start):
+    """
+    Balance just before ``start`` and the id of the last posting it accounts
+    for: the current balance minus everything since, archived or not.
+    """
+    latest = Transaction.objects.filter(account=OuterRef('pk')).order_by('-id').values('id')[:1]
+    # one read transaction, so an archive run cannot move rows between the
+    # table aggregate and the segment totals (SQLite; REPEATABLE READ on PostgreSQL)
+    with db_transaction.atomic():
+        balance, last_id = (
+            Account.objects.filter(pk=account.pk).annotate(last_id=Subquery(latest))
+            .values_list('balance', 'last_id').get()
+        )
+        last_id = last_id or 0
+        later = Transaction.objects.filter(account=account, id__lte=last_id)
+        if start is not None:
+            later = later.filter(performed_at__gte=start)
+        moved = later.aggregate(total=Sum(signed_amount_expression))['total'] or 0
+        return balance - moved - archive.movement(account.pk, start), last_id
+
+
+def opening_balance(account, start):
+    """Balance just before ``start``."""
+    return _opening(account, start)[0]
+
+
+def _statement_queryset(account, start, end, last_id):
+    rows = Transaction.objects.filter(account=account, id__lte=last_id)
+    if start is not None:
+        rows = rows.filter(performed_at__gte=start)
+    if end is not None:
+        rows = rows.filter(performed_at__lt=end)
+    return rows.order_by('performed_at', 'id')
+
+
+def _archived_rows(account, start, end):
+    for record in archive.rows(account.pk, start, end):
+        yield tuple(record[name] for name in STATEMENT_COLUMNS[:-1])
+
+
+# merge key of statement tuples: (performed_at, id)
+_by_time = itemgetter(1, 0)
+
+
+async def _amerge(rows, archived):
+    """Merge the async ``rows`` with the sync ``archived`` iterator, read in worker-thread batches."""
+    take = sync_to_async(lambda: list(islice(archived, 500)))
+    batch, position = await take(), 0
+    async for row in rows:
+        while position < len(batch) and _by_time(batch[position]) < _by_time(row):
+            yield batch[position]
+            position += 1
+            if position == len(batch):
+                batch, position = await take(), 0
+        yield row
+    while batch:
+        for row in batch[position:]:
+            yield row
+        batch, position = await take(), 0
+
+
+def statement_rows(account, start=None, end=None, chunk_size=2000):
+    """Yield statement tuples oldest first, each with the running balance."""
+    balance, last_id = _opening(account, start)
+    deposit = Transaction.DEPOSIT
+    rows = _statement_queryset(account, start, end, last_id).values_list(*STATEMENT_COLUMNS[:-1])
+    merged = heapq.merge(rows.iterator(chunk_size=chunk_size), _archived_rows(account, start, end), key=_by_time)
+    for pk, performed_at, reference, txn_type, amount in merged:
+        balance = balance + amount if txn_type == deposit else balance - amount
+        yield pk, performed_at, reference, txn_type, amount, balance
+
+
+async def astatement_rows(account, start=None, end=None, chunk_size=2000):
+    """Async counterpart of ``statement_rows`` built on ``aiterator``."""
+    balance, last_id = await sync_to_async(_opening)(account, start)
+    deposit = Transaction.DEPOSIT
+    # values() rather than values_list(): a plain values_list iterable runs
+    # its query as soon as aiterator() builds it, outside the sync thread
+    rows = _statement_queryset(account, start, end, last_id).values(*STATEMENT_COLUMNS[:-1])
+    tuples = (
+        (row['id'], row['performed_at'], row['reference'], row['txn_type'], row['amount'])
+        async for row in rows.aiterator(chunk_size=chunk_size)
+    )
+    async for pk, performed_at, reference, txn_type, amount in _amerge(tuples, _archived_rows(account, start, end)):
+        balance = balance + amount if txn_type == deposit else balance - amount
+        yield pk, performed_at, reference, txn_type, amount, balance
+
+
+def _isoformat(value):
+    # same shape DRF renders for DateTimeField
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_values(row):
+    pk, performed_at, reference, txn_type, amount, balance = row
+    return pk, _isoformat(performed_at), reference, txn_type, amount, balance
+
+
+def _ndjson_line(row):
+    pk, performed_at, reference, txn_type, amount, balance = row
+    return json.dumps({
+        'id': pk,
+        'performed_at': _isoformat(performed_at),
+        'reference': reference,
+        'txn_type': txn_type,
+        'amount': str(amount),
+        'balance': str(balance),
+    }) + '\n'
+
+
+def render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(STATEMENT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(_csv_values(row))
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield _ndjson_line(row)
+
+
+async def arender_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(STATEMENT_COLUMNS)
+    async for row in rows:
+        yield writer.writerow(_csv_values(row))
+
+
+async def arender_ndjson(rows):
+    async for row in rows:
+        yield _ndjson_line(row)
+
+
+RENDERERS = {
+    'csv': ('text/csv', render_csv),
+    'ndjson': ('application/x-ndjson', render_ndjson),
+}
+
+ASYNC_RENDERERS = {
+    'csv': ('text/csv', arender_csv),
+    'ndjson': ('application/x-ndjson', arender_ndjson),
+}
@@ -1,7 +1,10 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from banking import async_views
 from banking.views import (
     CustomerViewSet, BranchViewSet, AccountViewSet,
-    CardViewSet, LoanViewSet, TransactionViewSet
+    CardViewSet, LoanViewSet, TransactionViewSet, TransferViewSet,
+    CacheStatsView, MetricsView, TokenView,
 )
 
 router = DefaultRouter()
@@ -11,5 +14,16 @@ router.register(r'accounts', AccountViewSet)
 router.register(r'cards', CardViewSet)
 router.register(r'loans', LoanViewSet)
 router.register(r'transactions', TransactionViewSet)
+router.register(r'transfers', TransferViewSet, basename='transfer')
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path('auth/token/', TokenView.as_view(), name='auth-token'),
+    path('_cache/', CacheStatsView.as_view(), name='cache-stats'),
+    path('_metrics/', MetricsView.as_view(), name='metrics'),
+    path('async/accounts/', async_views.account_list, name='async-account-list'),
+    path('async/accounts/<int:pk>/', async_views.account_detail, name='async-account-detail'),
+    path('async/accounts/<int:pk>/statement/', async_views.account_statement, name='async-account-statement'),
+    path('async/transactions/', async_views.transaction_list, name='async-transaction-list'),
+    path('async/transactions/<int:pk>/', async_views.transaction_detail, name='async-transaction-detail'),
+    path('async/customers/<int:pk>/overview/', async_views.customer_overview, name='async-customer-overview'),
+]
@@ -0,0 +1,193 @@
+"""
+Velocity limits on postings, from in-memory sliding windows.
+
+``BANKING_VELOCITY_RULES`` lists the limits. Each rule has a ``name``, a
+``scope``, optionally a ``txn_type`` it counts (default: every posting), a
+``window`` in seconds, and ``max_count`` and/or ``max_amount``. The scope is
+``account``, checked by transaction and transfer validation and for each row
+of a bulk batch, or ``card``, checked by card authorization.
+
+Each (rule, account or card) pair keeps a deque of the postings inside its
+window plus their running count and total. A check expires old events from
+the left and compares: O(1) amortized, with no query. The posting engine
+records postings once they commit, and card authorization records card
+spends. The windows are per process. They are rebuilt from the recent
+Transaction history on first use, so a restarted worker starts from what
+the database already holds. Card windows are rebuilt from the withdrawals of
+the card's account (cards are one per account), which may over-count. Checks
+and records are not one atomic step and each worker counts its own traffic,
+so limits are soft by up to the postings in flight across workers.
+"""
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Card, Transaction
+
+Rule = namedtuple('Rule', 'name scope txn_type window max_count max_amount')
+
+ACCOUNT = 'account'
+CARD = 'card'
+# every this many recorded postings, windows that have emptied are dropped
+SWEEP_EVERY = 10000
+
+
+def load_rules():
+    rules = []
+    for spec in getattr(settings, 'BANKING_VELOCITY_RULES', []):
+        if spec['scope'] not in (ACCOUNT, CARD):
+            raise ValueError(f"Velocity rule {spec['name']!r}: scope must be 'account' or 'card'")
+        max_amount = spec.get('max_amount')
+        rules.append(Rule(
+            spec['name'], spec['scope'], spec.get('txn_type'), spec['window'],
+            spec.get('max_count'), Decimal(str(max_amount)) if max_amount is not None else None,
+        ))
+    return rules
+
+
+class Window:
+    __slots__ = ('events', 'count', 'total')
+
+    def __init__(self):
+        self.events = deque()
+        self.count = 0
+        self.total = Decimal('0')
+
+    def expire(self, cutoff):
+        events = self.events
+        while events and events[0][0] <= cutoff:
+            _, amount = events.popleft()
+            self.count -= 1
+            self.total -= amount
+
+    def add(self, at, amount):
+        self.events.append((at, amount))
+        self.count += 1
+        self.total += amount
+
+
+class VelocityLimits:
+    """Sliding windows for every rule, keyed on ``(rule index, account or card id)``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop every window and reread the rules; the next check rebuilds from history."""
+        with self._lock:
+            self.rules = None
+            self.windows = {}
+            self.applicable = {}
+            self.recorded = 0
+
+    def _ensure_loaded(self):
+        if self.rules is None:
+            rules = load_rules()
+            self.windows = {}
+            self.applicable = {}
+            self.rules = rules
+            self._rebuild()
+
+    def _rules_for(self, scope, txn_type):
+        """``(index, rule)`` pairs that count postings of ``txn_type`` in ``scope``."""
+        found = self.applicable.get((scope, txn_type))
+        if found is None:
+            found = self.applicable[scope, txn_type] = [
+                (index, rule) for index, rule in enumerate(self.rules)
+                if rule.scope == scope and rule.txn_type in (None, txn_type)
+            ]
+        return found
+
+    def _rebuild(self):
+        if not self.rules:
+            return
+        now = time.time()
+        since = timezone.now() - timedelta(seconds=max(rule.window for rule in self.rules))
+        card_of = {}
+        if any(rule.scope == CARD for rule in self.rules):
+            card_of = dict(Card.objects.values_list('account_id', 'pk'))
+        history = (
+            Transaction.objects.filter(performed_at__gt=since).order_by('performed_at', 'id')
+            .values_list('account_id', 'txn_type', 'amount', 'performed_at')
+        )
+        for account_id, txn_type, amount, performed_at in history.iterator(chunk_size=5000):
+            at = performed_at.timestamp()
+            for index, rule in enumerate(self.rules):
+                if rule.txn_type not in (None, txn_type) or at <= now - rule.window:
+                    continue
+                if rule.scope == ACCOUNT:
+                    self._window(index, account_id).add(at, amount)
+                elif txn_type == Transaction.WITHDRAW and account_id in card_of:
+                    self._window(index, card_of[account_id]).add(at, amount)
+
+    def _window(self, index, key):
+        window = self.windows.get((index, key))
+        if window is None:
+            window = self.windows[index, key] = Window()
+        return window
+
+    def check(self, scope, key, txn_type, amount, now=None, held=None):
+        """
+        The name of the first rule a posting of ``amount`` would break, or
+        None. ``held`` is a batch's dict of postings accepted by ``hold``
+        but not recorded yet; they count as well.
+        """
+        now = now or time.time()
+        with self._lock:
+            self._ensure_loaded()
+            for index, rule in self._rules_for(scope, txn_type):
+                window = self.windows.get((index, key))
+                if window is None:
+                    count, total = 0, 0
+                else:
+                    window.expire(now - rule.window)
+                    count, total = window.count, window.total
+                if held:
+                    held_count, held_total = held.get((index, key), (0, 0))
+                    count, total = count + held_count, total + held_total
+                if rule.max_count is not None and count + 1 > rule.max_count:
+                    return rule.name
+                if rule.max_amount is not None and total + amount > rule.max_amount:
+                    return rule.name
+        return None
+
+    def hold(self, scope, key, txn_type, amount, held):
+        """Count a posting accepted by ``check`` in ``held``, for the checks after it in the same batch."""
+        with self._lock:
+            self._ensure_loaded()
+            for index, _ in self._rules_for(scope, txn_type):
+                count, total = held.get((index, key), (0, 0))
+                held[index, key] = (count + 1, total + amount)
+
+    def record(self, scope, events):
+        """Add committed postings, ``(key, txn_type, amount, at)`` tuples, to the windows of ``scope``."""
+        with self._lock:
+            if self.rules is None:
+                # not loaded yet: the rebuild will read these from the database
+                return
+            now = time.time()
+            for key, txn_type, amount, at in events:
+                at = at.timestamp()
+                for index, rule in self._rules_for(scope, txn_type):
+                    # postings back-dated out of the window never count
+                    if at > now - rule.window:
+                        self._window(index, key).add(at, amount)
+            self.recorded += len(events)
+            if self.recorded >= SWEEP_EVERY:
+                self.recorded = 0
+                self._sweep(now)
+
+    def _sweep(self, now):
+        for (index, key), window in list(self.windows.items()):
+            window.expire(now - self.rules[index].window)
+            if not window.count:
+                del self.windows[index, key]
+
+
+limits = VelocityLimits()
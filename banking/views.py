@@ -1,43 +1,370 @@
-from rest_framework import viewsets, permissions
-from .models import Customer, Branch, Account, Card, Loan, Transaction
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.authtoken.models import Token
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import archive
+from .amortization import portfolio_summary, schedule as amortization_schedule
+from .cache import CachedReadMixin, get_cache, stats as cache_stats
+from .cards import APPROVED, DUPLICATE_REFERENCE, authorize as authorize_card
+from .conditional import ConditionalGetMixin
+from .fast_serializers import FastListMixin
+from .idempotency import IdempotentCreateMixin
+from .filters import (
+    IndexedFilterBackend, QueryFilter, moment_parser, parse_bool, parse_day, parse_decimal, parse_int,
+)
+from .metrics import render_prometheus
+from .ledger import ledger_balance
+from .models import Customer, Branch, Account, Card, Loan, Transaction, JournalEntry
+from .overview import build_overview, overview_queryset, recent_limit
+from .pagination import PerformedAtKeysetPagination
+from .parsers import NDJSONParser
+from .posting import BatchConflict, post_batch
+from .renderers import CSVRenderer, NDJSONRenderer
+from .snapshots import balance_at
+from .statements import RENDERERS, parse_bound, statement_rows
 from .serializers import (
     CustomerSerializer, BranchSerializer, AccountSerializer,
-    CardSerializer, LoanSerializer, TransactionSerializer
+    CardSerializer, LoanSerializer, TransactionSerializer,
+    BulkTransactionRowSerializer, TransferSerializer, CardAuthorizationSerializer,
 )
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(
+    IdempotentCreateMixin, CachedReadMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet,
+):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        if self.action == 'overview':
+            return overview_queryset(recent_limit(self.request.query_params))
+        return super().get_queryset()
+
+    @action(detail=True, methods=['get'])
+    def overview(self, request, pk=None):
+        """
+        The customer with accounts (card and last ``?transactions=N``
+        transactions each), loans and balance totals, in four queries.
+        """
+        return Response(build_overview(self.get_object()))
 
-class BranchViewSet(viewsets.ModelViewSet):
+
+class BranchViewSet(
+    IdempotentCreateMixin, CachedReadMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet,
+):
     queryset = Branch.objects.all()
     serializer_class = BranchSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class AccountViewSet(viewsets.ModelViewSet):
+class AccountViewSet(
+    IdempotentCreateMixin, CachedReadMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet,
+):
     queryset = Account.objects.select_related('customer', 'branch').all()
     serializer_class = AccountSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [IndexedFilterBackend]
+    query_filters = {
+        'customer': QueryFilter('customer', parse=parse_int),
+        'branch': QueryFilter('branch', parse=parse_int),
+        'account_type': QueryFilter('account_type', choices=[c for c, _ in Account.ACCOUNT_TYPES]),
+        'is_active': QueryFilter('is_active', parse=parse_bool),
+        'balance_min': QueryFilter('balance', 'gte', parse=parse_decimal),
+        'balance_max': QueryFilter('balance', 'lte', parse=parse_decimal),
+    }
+
+    def perform_content_negotiation(self, request, force=False):
+        # ``?format=`` is also DRF's renderer override, which would answer an
+        # unknown value with 404 before ``statement`` can explain it
+        if self.action == 'statement' and request.query_params.get('format', 'csv') not in RENDERERS:
+            return JSONRenderer(), JSONRenderer.media_type
+        return super().perform_content_negotiation(request, force)
+
+    @action(detail=True, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer, JSONRenderer])
+    def statement(self, request, pk=None):
+        """
+        Stream the account's transactions oldest first with a running balance.
+        Query params: ``from``, ``to`` (ISO date or datetime) and ``format``
+        (``csv`` or ``ndjson``).
+        """
+        account = self.get_object()
+        fmt = request.query_params.get('format', 'csv')
+        if fmt not in RENDERERS:
+            return Response(
+                {"format": f"Expected one of: {', '.join(RENDERERS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        start = parse_bound(request.query_params.get('from'), 'from')
+        end = parse_bound(request.query_params.get('to'), 'to', end=True)
+
+        content_type, render = RENDERERS[fmt]
+        chunk_size = getattr(settings, 'BANKING_STATEMENT_CHUNK_SIZE', 2000)
+        response = StreamingHttpResponse(
+            render(statement_rows(account, start, end, chunk_size)),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="statement-{account.account_number}.{fmt}"'
+        )
+        return response
+
+    @action(detail=True, methods=['get'], url_path='balance-at')
+    def balance_at(self, request, pk=None):
+        """Closing balance at the end of ``?date=YYYY-MM-DD``."""
+        account = self.get_object()
+        try:
+            day = parse_date(request.query_params.get('date', ''))
+        except ValueError:
+            day = None
+        if day is None:
+            return Response(
+                {"date": "Expected a date in YYYY-MM-DD format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({
+            "account": account.pk,
+            "date": day.isoformat(),
+            "balance": str(balance_at(account, day)),
+        })
+
 
+    @action(detail=True, methods=['get'], url_path='ledger-balance')
+    def ledger_balance(self, request, pk=None):
+        """Balance derived from the ledger (latest checkpoint plus later postings) next to the cached one."""
+        account = self.get_object()
+        return Response({
+            "account": account.pk,
+            "balance": str(account.balance),
+            "ledger_balance": str(ledger_balance(account.pk)),
+        })
 
-class CardViewSet(viewsets.ModelViewSet):
+
+class CardViewSet(IdempotentCreateMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Card.objects.select_related('account').all()
     serializer_class = CardSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @action(detail=False, methods=['post'], serializer_class=CardAuthorizationSerializer)
+    def authorize(self, request):
+        """
+        Authorize a card payment and post it as a withdrawal in one step:
+        201 with the transaction when approved, 402 with the decline reason
+        otherwise (409 for a reference already used).
+        """
+        serializer = CardAuthorizationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reason, state, transaction = authorize_card(**serializer.validated_data)
+        if reason != APPROVED:
+            code = status.HTTP_409_CONFLICT if reason == DUPLICATE_REFERENCE else status.HTTP_402_PAYMENT_REQUIRED
+            return Response({"approved": False, "reason": reason}, status=code)
+        return Response({
+            "approved": True,
+            "account": state.account_id,
+            "transaction": transaction.pk,
+            "reference": transaction.reference,
+            "amount": str(transaction.amount),
+        }, status=status.HTTP_201_CREATED)
+
 
-class LoanViewSet(viewsets.ModelViewSet):
+class LoanViewSet(IdempotentCreateMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Loan.objects.select_related('customer').all()
     serializer_class = LoanSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [IndexedFilterBackend]
+    query_filters = {
+        'customer': QueryFilter('customer', parse=parse_int),
+        'status': QueryFilter('status', choices=[c for c, _ in Loan.STATUSES]),
+        'start_from': QueryFilter('start_date', 'gte', parse=parse_day),
+        'start_to': QueryFilter('start_date', 'lte', parse=parse_day),
+    }
+
+    @action(detail=True, methods=['get'])
+    def schedule(self, request, pk=None):
+        """Monthly amortization schedule: payment, interest, principal and remaining balance."""
+        return Response(amortization_schedule(self.get_object()))
+
+    @action(detail=False, methods=['get'], url_path='portfolio-summary')
+    def portfolio_summary(self, request):
+        """Outstanding principal and accrued interest over approved loans at ``?as_of=YYYY-MM-DD``."""
+        as_of = None
+        if 'as_of' in request.query_params:
+            try:
+                as_of = parse_day(request.query_params['as_of'])
+            except ValueError as exc:
+                return Response({"as_of": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(portfolio_summary(as_of=as_of))
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(
+    IdempotentCreateMixin, ConditionalGetMixin, FastListMixin,
+    mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet,
+):
+    """Transactions are ledger postings: they can be created and read, never changed or deleted."""
     queryset = Transaction.objects.select_related('account').all()
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
- 
\ No newline at end of file
+    pagination_class = PerformedAtKeysetPagination
+    filter_backends = [IndexedFilterBackend]
+    query_filters = {
+        'account': QueryFilter('account', parse=parse_int),
+        'txn_type': QueryFilter('txn_type', choices=[c for c, _ in Transaction.TYPES]),
+        'amount_min': QueryFilter('amount', 'gte', parse=parse_decimal),
+        'amount_max': QueryFilter('amount', 'lte', parse=parse_decimal),
+        'performed_from': QueryFilter('performed_at', 'gte', parse=moment_parser()),
+        'performed_to': QueryFilter('performed_at', 'lt', parse=moment_parser(end=True)),
+        'reference_prefix': QueryFilter('reference', 'prefix'),
+    }
+
+    def extra_rows(self, queryset, descending, after):
+        """
+        Archived transactions merged into ``list`` pages filtered to one
+        ``account``, narrowed by the same filters and read from the segment
+        files the requested range and cursor reach.
+        """
+        params = self.request.query_params
+        if self.action != 'list' or 'account' not in params:
+            return None
+        bounds = {
+            name: self.query_filters[name].value(name, params[name]) if name in params else None
+            for name in ('account', 'performed_from', 'performed_to')
+        }
+        start, end = bounds['performed_from'], bounds['performed_to']
+        if after is not None:
+            # cursors are (performed_at, id); rows tied on performed_at are dropped by id later
+            moment = after[0]
+            if descending:
+                end = min(end, moment + timedelta(microseconds=1)) if end else moment + timedelta(microseconds=1)
+            else:
+                start = max(start, moment) if start else moment
+        predicates = [
+            query_filter.to_predicate(name, params[name], Transaction)
+            for name, query_filter in self.query_filters.items() if name in params
+        ]
+        as_dicts = bool(queryset.query.values_select)
+        return (
+            record if as_dicts else Transaction(**record)
+            for record in archive.rows(bounds['account'], start, end, descending)
+            if all(test(record) for test in predicates)
+        )
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Post many deposits/withdrawals in one request.
+        Accepts a JSON array or an NDJSON body and returns one result per row.
+        """
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response(
+                {"detail": "Expected a JSON array or NDJSON body"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_rows = getattr(settings, 'BANKING_BULK_MAX_ROWS', 50000)
+        if len(rows) > max_rows:
+            return Response(
+                {"detail": f"Batch exceeds {max_rows} rows"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = [None] * len(rows)
+        valid, positions = [], []
+        for index, row in enumerate(rows):
+            row_serializer = BulkTransactionRowSerializer(data=row)
+            if row_serializer.is_valid():
+                valid.append(row_serializer.validated_data)
+                positions.append(index)
+            else:
+                results[index] = {"index": index, "status": "rejected", "errors": row_serializer.errors}
+
+        try:
+            created, rejected = post_batch(valid) if valid else ({}, {})
+        except BatchConflict as exc:
+            # balances kept moving under every retry; nothing was written
+            return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+        for i, index in enumerate(positions):
+            if i in created:
+                txn = created[i]
+                results[index] = {
+                    "index": index, "status": "created",
+                    "id": txn.pk, "reference": txn.reference,
+                }
+            else:
+                results[index] = {
+                    "index": index, "status": "rejected",
+                    "errors": {"non_field_errors": [rejected[i]]},
+                }
+
+        return Response({
+            "created": len(created),
+            "rejected": len(rows) - len(created),
+            "results": results,
+        })
+
+
+class TransferViewSet(
+    IdempotentCreateMixin,
+    mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet,
+):
+    queryset = JournalEntry.objects.filter(entry_type=JournalEntry.TRANSFER).prefetch_related('legs')
+    serializer_class = TransferSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class CacheStatsView(APIView):
+    """Hit/miss counters of the read-through cache in this process."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        cache = get_cache()
+        return Response({
+            "backend": f"{type(cache).__module__}.{type(cache).__name__}",
+            "max_entries": getattr(cache, "_max_entries", None),
+            "default_timeout": cache.default_timeout,
+            **cache_stats.as_dict(),
+        })
+
+
+class MetricsView(APIView):
+    """Per-endpoint request metrics in the Prometheus text format."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(
+            render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+class TokenView(APIView):
+    """
+    The caller's API token for ``Authorization: Token <key>``: POST issues it
+    (or returns the current one), PUT rotates it and DELETE revokes it.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def render(self, token, code):
+        return Response({"token": token.key, "created": token.created}, status=code)
+
+    def post(self, request):
+        token, created = Token.objects.get_or_create(user=request.user)
+        return self.render(token, status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def put(self, request):
+        # post_delete evicts the old token from this process's token cache
+        with db_transaction.atomic():
+            Token.objects.filter(user=request.user).delete()
+            token = Token.objects.create(user=request.user)
+        return self.render(token, status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        Token.objects.filter(user=request.user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bankingsystem.settings')
 
 application = get_asgi_application()
+
+# load the card index before the first authorization rather than during it
+from banking.cards import warm  # noqa: E402
+
+warm()
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,14 +58,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in per-endpoint latency/SQL metrics, served at /api/_metrics/.
+BANKING_METRICS = os.environ.get('BANKING_METRICS', '') == '1'
+if BANKING_METRICS:
+    MIDDLEWARE.insert(0, 'banking.middleware.RequestMetricsMiddleware')
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'banking.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'banking.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'banking.pagination.CreatedAtKeysetPagination',
+    'PAGE_SIZE': 50,
      "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 SPECTACULAR_SETTINGS = {
@@ -98,13 +113,125 @@ WSGI_APPLICATION = 'bankingsystem.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# BANKING_DB_ENGINE picks SQLite (default) or PostgreSQL (configured from the
+# usual PG* environment variables). BANKING_DB_PROFILE picks how connections
+# are managed:
+# - 'default': Django's stock behaviour, one connection per request.
+# - 'tuned': persistent connections. On SQLite, every new connection also
+#   gets BANKING_SQLITE_PRAGMAS (banking/signals.py), and transactions take
+#   the write lock at BEGIN, so concurrent writers wait on busy_timeout
+#   instead of failing with "database is locked". On PostgreSQL, a psycopg
+#   connection pool is used (needs psycopg[pool]).
+
+BANKING_DB_ENGINE = os.environ.get('BANKING_DB_ENGINE', 'sqlite')
+BANKING_DB_PROFILE = os.environ.get('BANKING_DB_PROFILE', 'default')
+BANKING_SQLITE_PRAGMAS = {}
+
+if BANKING_DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+elif BANKING_DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('PGDATABASE', 'banking'),
+            'USER': os.environ.get('PGUSER', ''),
+            'PASSWORD': os.environ.get('PGPASSWORD', ''),
+            'HOST': os.environ.get('PGHOST', ''),
+            'PORT': os.environ.get('PGPORT', ''),
+        }
     }
+else:
+    raise ImproperlyConfigured(f"BANKING_DB_ENGINE must be 'sqlite' or 'postgresql', not {BANKING_DB_ENGINE!r}")
+
+if BANKING_DB_PROFILE == 'tuned':
+    if BANKING_DB_ENGINE == 'sqlite':
+        DATABASES['default'].update({
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 10},
+        })
+        BANKING_SQLITE_PRAGMAS = {
+            'journal_mode': 'WAL',
+            # WAL stays consistent after a crash; only commits not yet
+            # checkpointed can be lost when the OS itself goes down
+            'synchronous': 'NORMAL',
+            'busy_timeout': 10000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+            'temp_store': 'MEMORY',
+        }
+    else:
+        # pooled connections are reused by Django itself; CONN_MAX_AGE must stay 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {'min_size': 2, 'max_size': 20, 'timeout': 10},
+        }
+elif BANKING_DB_PROFILE != 'default':
+    raise ImproperlyConfigured(f"BANKING_DB_PROFILE must be 'default' or 'tuned', not {BANKING_DB_PROFILE!r}")
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'banking' backs the read-through API cache (banking/cache.py). LocMemCache is
+# per-process and evicts least recently used entries past MAX_ENTRIES; switch
+# to 'django.core.cache.backends.filebased.FileBasedCache' (LOCATION = a
+# directory) to share entries between workers on one host.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'banking': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'banking-api',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_FREQUENCY': 10},
+    },
 }
 
+BANKING_CACHE_ALIAS = 'banking'
+
+# Validated API tokens are kept per process (banking/authentication.py);
+# revocation is immediate in the revoking process and within the TTL elsewhere.
+BANKING_TOKEN_CACHE_SIZE = 10000
+BANKING_TOKEN_CACHE_TTL = 60
+
+# The card index (banking/cards.py) is loaded when the WSGI/ASGI application
+# starts; with this off it is loaded by the first card authorization instead.
+BANKING_CARD_INDEX_PRELOAD = True
+# Cards issued in other processes reach the index through a query for new
+# card ids, run by an unknown card number at most this often (seconds).
+BANKING_CARD_INDEX_SWEEP_SECONDS = 5
+
+# Velocity limits (banking/velocity.py), checked from in-memory sliding
+# windows when transactions, transfers and card payments are validated.
+# scope is 'account' or 'card'; txn_type is optional; window is in seconds.
+BANKING_VELOCITY_RULES = [
+    {'name': 'withdrawals_per_minute', 'scope': 'account', 'txn_type': 'WITHDRAW',
+     'window': 60, 'max_count': 30},
+    {'name': 'withdrawn_per_day', 'scope': 'account', 'txn_type': 'WITHDRAW',
+     'window': 24 * 60 * 60, 'max_amount': '50000.00'},
+    {'name': 'card_payments_per_minute', 'scope': 'card',
+     'window': 60, 'max_count': 10},
+]
+
+# Admin performance mode (banking/admin.py) for the Customer, Branch, Account,
+# Card, Loan and Transaction changelists: keyset cursor paging on
+# (created_at, id), or (performed_at, id) for transactions, counts estimated
+# above BANKING_ADMIN_EXACT_COUNT_LIMIT rows and index-only search.
+BANKING_ADMIN_PERFORMANCE_MODE = True
+BANKING_ADMIN_EXACT_COUNT_LIMIT = 1000
+
+# Cold storage for old transactions (banking/archive.py), written by
+# `manage.py archive_transactions --older-than DAYS`. DAYS may not be below
+# BANKING_ARCHIVE_MIN_DAYS: interest credits read the postings of their month.
+BANKING_ARCHIVE_DIR = BASE_DIR / 'archive'
+BANKING_ARCHIVE_MIN_DAYS = 62
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
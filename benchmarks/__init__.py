@@ -0,0 +1,6 @@
+"""
+Benchmarks for the banking API.
+
+Each module is runnable on its own, e.g. ``python -m benchmarks.posting``.
+They build a throwaway test database, so they never touch ``db.sqlite3``.
+"""
@@ -0,0 +1,43 @@
+"""Shared bootstrap for benchmark scripts."""
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup():
+    """Configure Django and create a throwaway test database."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bankingsystem.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def make_account(suffix='0001', balance='0.00'):
+    """Create a customer, branch and account to post against."""
+    from decimal import Decimal
+    from banking.models import Account, Branch, Customer
+
+    customer = Customer.objects.create(
+        first_name='Bench', last_name=suffix,
+        email=f'bench{suffix}@example.com', phone=f'+1555{suffix:0>7}',
+    )
+    branch, _ = Branch.objects.get_or_create(
+        code='BENCH', defaults={'name': 'Bench', 'city': 'Bench'},
+    )
+    return Account.objects.create(
+        customer=customer, branch=branch,
+        account_number=f'BENCH{suffix}', balance=Decimal(balance),
+    )
+
+
+@contextmanager
+def timed(label, count, unit='ops'):
+    """Print throughput for ``count`` operations done inside the block."""
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    print(f'{label}: {count} {unit} in {elapsed:.3f}s ({count / elapsed:,.0f} {unit}/s)')
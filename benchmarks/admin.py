@@ -0,0 +1,100 @@
+"""
+Transaction changelist latency with admin performance mode off and on.
+
+    python -m benchmarks.admin --rows 1000000 --repeat 5
+
+Seeds ``--rows`` transactions over 1000 accounts, then times the admin
+Transaction changelist (median of ``--repeat`` requests, with its SQL query
+count) for:
+
+* ``first``   the first page
+* ``deep``    a page half way through (``?p=`` off, ``?cursor=`` on)
+* ``search``  a reference search
+* ``filter``  the first page filtered by transaction type
+"""
+import argparse
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks._django import setup
+
+
+def seed(rows):
+    from django.utils import timezone
+    from banking.models import Account, Branch, Customer, Transaction
+
+    branch = Branch.objects.create(name='Admin', code='ADMIN', city='Bench')
+    customer = Customer.objects.create(first_name='A', last_name='B', email='admin@bench.example', phone='+15550000002')
+    account_ids = [a.pk for a in Account.objects.bulk_create([
+        Account(customer=customer, branch=branch, account_number=f'AB{n:08d}', balance=Decimal('0.00'))
+        for n in range(1000)
+    ])]
+    now = timezone.now()
+    types = (Transaction.DEPOSIT, Transaction.WITHDRAW)
+    for start in range(0, rows, 20000):
+        Transaction.objects.bulk_create([
+            Transaction(
+                account_id=account_ids[n % 1000], txn_type=types[n % 2], amount=Decimal('5.00'),
+                reference=f'AB-{n:09d}', performed_at=now - timedelta(seconds=rows - n),
+            )
+            for n in range(start, min(rows, start + 20000))
+        ])
+
+
+def measure(client, url, params, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    samples = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            began = time.perf_counter()
+            response = client.get(url, params)
+            samples.append(time.perf_counter() - began)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(samples) * 1e3, len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.test import Client, override_settings
+    from django.urls import reverse
+    from banking.models import Transaction
+    from banking.pagination import KeysetPagination
+
+    started = time.perf_counter()
+    seed(args.rows)
+    print(f'seeded {args.rows} transactions in {time.perf_counter() - started:.1f}s')
+
+    client = Client()
+    client.force_login(User.objects.create_superuser(username='bench-admin', password='bench'))
+    url = reverse('admin:banking_transaction_changelist')
+    keyset = KeysetPagination()
+    keyset.ordering = ('-performed_at', '-id')
+    fields = keyset._fields(Transaction.objects.all())
+    middle = Transaction.objects.order_by(*keyset.ordering)[args.rows // 2]
+    cursor = keyset.dump_cursor(keyset.row_values(middle, fields), False)
+    search = {'q': f'AB-{args.rows // 3:09d}'}
+    for mode in (False, True):
+        cases = {
+            'first': {},
+            'deep': {'cursor': cursor} if mode else {'p': args.rows // 200},
+            'search': search,
+            'filter': {'txn_type__exact': Transaction.WITHDRAW},
+        }
+        with override_settings(BANKING_ADMIN_PERFORMANCE_MODE=mode):
+            for label, params in cases.items():
+                ms, queries = measure(client, url, params, args.repeat)
+                print(f'{"on" if mode else "off":>3} {label:>6}: {ms:9.1f} ms  {queries:3d} queries')
+
+
+if __name__ == '__main__':
+    main()
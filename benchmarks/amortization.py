@@ -0,0 +1,140 @@
+"""
+Loan book summary: per-month loops vs the closed-form grouped pass.
+
+    python -m benchmarks.amortization --loans 1000000
+    python -m benchmarks.amortization --loans 1000000 --db
+
+In memory it compares, over the same synthetic book:
+
+* ``naive``   a Decimal loop per loan per elapsed month (timed on a
+              ``--sample`` and extrapolated)
+* ``closed``  ``summarize_terms`` with every loan as its own group
+* ``grouped`` loans grouped on identical terms first (what ``GROUP BY``
+              does in ``portfolio_summary``), then ``summarize_terms``
+
+``--db`` also loads the book into a throwaway database and times
+``portfolio_summary`` end to end.
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+AS_OF = date(2026, 6, 30)
+
+
+def synthetic_book(count, seed=7):
+    """``(principal, annual_rate, start, end)`` tuples with realistic rate and term clustering."""
+    from banking.amortization import add_months
+
+    rng = random.Random(seed)
+    rates = [Decimal(bp) / 100 for bp in range(200, 2000, 25)]
+    first = AS_OF - timedelta(days=5 * 365)
+    book = []
+    for _ in range(count):
+        start = first + timedelta(days=rng.randrange(5 * 365))
+        term = rng.choice((12, 24, 36, 48, 60))
+        book.append((
+            Decimal(rng.randrange(100000, 5000000)) / 100, rng.choice(rates), start, add_months(start, term),
+        ))
+    return book
+
+
+def naive(book, as_of):
+    """Walk every due month of every loan in Decimal, rounding each step."""
+    from banking.amortization import add_months, monthly_payment, term_months
+
+    cent = Decimal('0.01')
+    outstanding = Decimal('0')
+    for principal, annual_rate, start, end in book:
+        rate = annual_rate / 1200
+        term = term_months(start, end)
+        payment = Decimal(repr(monthly_payment(float(principal), float(rate), term))).quantize(cent)
+        balance, month = principal, 1
+        while month <= term and add_months(start, month) <= as_of:
+            interest = (balance * rate).quantize(cent, rounding=ROUND_HALF_UP)
+            balance -= min(payment - interest, balance) if month < term else balance
+            month += 1
+        outstanding += balance
+    return outstanding
+
+
+def grouped(book):
+    groups = defaultdict(lambda: [Decimal('0'), 0])
+    for principal, annual_rate, start, end in book:
+        group = groups[annual_rate, start, end]
+        group[0] += principal
+        group[1] += 1
+    return [(rate, start, end, total, loans) for (rate, start, end), (total, loans) in groups.items()]
+
+
+def run_db(book):
+    from banking.models import Customer, Loan
+    from banking.amortization import portfolio_summary
+    from banking.seeding import copy_rows
+    from django.db import connection
+    from django.utils import timezone
+
+    customer = Customer.objects.create(
+        first_name='Loan', last_name='Book', email='loanbook@bench.example', phone='+15550000000',
+    )
+    ops = connection.ops
+    stamp = ops.adapt_datetimefield_value(timezone.now())
+    fields = ('customer', 'principal_amount', 'interest_rate', 'status', 'start_date', 'end_date',
+              'created_at', 'updated_at')
+    started = time.perf_counter()
+    for offset in range(0, len(book), 50000):
+        copy_rows(Loan, fields, [
+            (customer.pk, str(principal), str(rate), Loan.APPROVED,
+             ops.adapt_datefield_value(start), ops.adapt_datefield_value(end), stamp, stamp)
+            for principal, rate, start, end in book[offset:offset + 50000]
+        ])
+    print(f'loaded {len(book)} loans in {time.perf_counter() - started:.1f}s')
+    started = time.perf_counter()
+    summary = portfolio_summary(as_of=AS_OF)
+    print(f"portfolio_summary: {time.perf_counter() - started:.2f}s "
+          f"(outstanding {summary['outstanding_principal']}, accrued {summary['accrued_interest']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--loans', type=int, default=1000000)
+    parser.add_argument('--sample', type=int, default=20000, help='loans timed for the naive loop')
+    parser.add_argument('--db', action='store_true')
+    args = parser.parse_args()
+
+    from benchmarks._django import setup
+    setup()
+    from banking.amortization import summarize_terms
+
+    book = synthetic_book(args.loans)
+    print(f'{args.loans} loans as of {AS_OF}')
+
+    sample = book[:args.sample]
+    started = time.perf_counter()
+    naive(sample, AS_OF)
+    per_loan = (time.perf_counter() - started) / len(sample)
+    print(f'naive:   {per_loan * args.loans:8.2f}s (extrapolated from {len(sample)} loans)')
+
+    started = time.perf_counter()
+    closed = summarize_terms(((r, s, e, p, 1) for p, r, s, e in book), AS_OF)
+    print(f'closed:  {time.perf_counter() - started:8.2f}s')
+
+    started = time.perf_counter()
+    groups = grouped(book)
+    grouping = time.perf_counter() - started
+    started = time.perf_counter()
+    totals = summarize_terms(groups, AS_OF)
+    print(f'grouped: {time.perf_counter() - started:8.2f}s over {len(groups)} groups '
+          f'(+{grouping:.2f}s grouping in Python; the database does this in portfolio_summary)')
+    drift = abs(closed['outstanding_principal'] - totals['outstanding_principal'])
+    print(f"outstanding {totals['outstanding_principal']:,.2f} (closed vs grouped differ by {drift:.6f})")
+
+    if args.db:
+        run_db(book)
+
+
+if __name__ == '__main__':
+    main()
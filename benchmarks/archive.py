@@ -0,0 +1,121 @@
+"""
+Archiving old transactions and reading them back.
+
+    python -m benchmarks.archive --accounts 200 --rows 500000 --years 3
+
+Seeds ``--rows`` postings spread evenly over ``--years`` across
+``--accounts`` accounts, then reports:
+
+* ``archive``    ``archive_transactions`` for everything older than a year:
+                 postings per second, segment count and bytes on disk
+* ``statement``  a full-history statement of one account, before and after
+* ``list``       the first and a deep page of one account's transaction list,
+                 before and after
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks._django import setup
+
+
+def seed(accounts, rows, years):
+    from django.utils import timezone
+    from banking.models import Account, BalanceCheckpoint, Branch, Customer, Transaction
+
+    branch = Branch.objects.create(name='Archive', code='ARCH', city='Bench')
+    customer = Customer.objects.create(first_name='A', last_name='R', email='archive@bench.example', phone='+15550000003')
+    per_account = rows // accounts
+    ids = [a.pk for a in Account.objects.bulk_create([
+        Account(customer=customer, branch=branch, account_number=f'AR{n:08d}', balance=Decimal(per_account))
+        for n in range(accounts)
+    ])]
+    BalanceCheckpoint.objects.bulk_create([
+        BalanceCheckpoint(account_id=pk, last_transaction_id=0, balance=Decimal('0.00')) for pk in ids
+    ])
+    now = timezone.now()
+    step = timedelta(days=365 * years) / rows
+    for start in range(0, rows, 20000):
+        Transaction.objects.bulk_create([
+            Transaction(
+                account_id=ids[n % accounts], txn_type=Transaction.DEPOSIT, amount=Decimal('1.00'),
+                reference=f'AR-{n:09d}', performed_at=now - step * (rows - n),
+            )
+            for n in range(start, min(rows, start + 20000))
+        ])
+    return ids
+
+
+def timed_ms(call, repeat=3):
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--years', type=int, default=3)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+    from django.urls import reverse
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from banking.archive import archive_transactions
+    from banking.models import Account, ArchiveSegment, Transaction
+    from banking.statements import statement_rows
+
+    directory = Path(tempfile.mkdtemp())
+    started = time.perf_counter()
+    ids = seed(args.accounts, args.rows, args.years)
+    print(f'seeded {args.rows} postings in {time.perf_counter() - started:.1f}s')
+
+    account = Account.objects.get(pk=ids[0])
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user(username='bench-archive'))
+    list_url = reverse('transaction-list') + f'?account={account.pk}'
+
+    def first_page():
+        return client.get(list_url).json()
+
+    def deep_page():
+        url = list_url
+        for _ in range(20):
+            url = client.get(url).json()['next']
+        return url
+
+    def measure(label):
+        statement = timed_ms(lambda: sum(1 for _ in statement_rows(account)))
+        print(f'{label:>7}: statement {statement:8.1f} ms  first page {timed_ms(first_page):6.1f} ms  '
+              f'20 pages {timed_ms(deep_page):7.1f} ms')
+
+    try:
+        with override_settings(BANKING_ARCHIVE_DIR=directory):
+            measure('before')
+            started = time.perf_counter()
+            counts = archive_transactions(timezone.now() - timedelta(days=365))
+            elapsed = time.perf_counter() - started
+            size = sum(path.stat().st_size for path in directory.rglob('*.ndjson.gz'))
+            print(f'archive: {counts["transactions"]} postings in {elapsed:.1f}s '
+                  f'({counts["transactions"] / elapsed:,.0f}/s), {ArchiveSegment.objects.count()} segments, '
+                  f'{size / 1e6:.1f} MB ({size / max(counts["transactions"], 1):.0f} B/posting); '
+                  f'{Transaction.objects.count()} postings left in the table')
+            measure('after')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+How read throughput scales with concurrent clients: WSGI vs ASGI.
+
+    python -m benchmarks.asgi_vs_wsgi --concurrency 1 8 32 64 --db-latency 20
+
+Drives Django's own handlers in-process, the way a server would:
+
+* ``wsgi``      ``bankingsystem.wsgi``-style WSGIHandler on a fixed pool of
+                ``--workers`` threads (gunicorn ``gthread``), sync DRF view
+* ``asgi-sync`` ASGIHandler on an event loop (uvicorn), same sync DRF view
+* ``asgi``      ASGIHandler, async view from ``banking.async_views``
+
+``--db-latency`` adds a sleep to every SQL query to stand in for the network
+round trip of a database server; with in-process SQLite every query is
+pure CPU and nothing waits. Against real servers, e.g.
+``uvicorn bankingsystem.asgi:application`` and
+``gunicorn -k gthread --threads 8 bankingsystem.wsgi``, pass ``--url`` (and
+``--username``/``--password``) once per server instead.
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._django import setup
+
+ENDPOINTS = {
+    # name: (sync DRF path, async path); {account} is filled in
+    'list': ('/api/transactions/', '/api/async/transactions/', 'account={account}&page_size=50'),
+    'statement': (
+        '/api/accounts/{account}/statement/', '/api/async/accounts/{account}/statement/', 'format=ndjson',
+    ),
+}
+
+
+def add_db_latency(seconds):
+    """Sleep ``seconds`` inside every SQL query on every connection."""
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all():
+        install(None, connection)
+
+
+def summarize(latencies, elapsed, errors):
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'errors': errors,
+    }
+
+
+def run_wsgi(path, query, cookie, requests, concurrency, workers):
+    from wsgiref.util import setup_testing_defaults
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    latencies, errors, lock = [], [0], threading.Lock()
+
+    def one(started):
+        environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_COOKIE': cookie,
+                   'SERVER_NAME': 'testserver'}
+        setup_testing_defaults(environ)
+        status = []
+        body = handler(environ, lambda s, headers, exc_info=None: status.append(s))
+        for _ in body:
+            pass
+        body.close()
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors[0] += not status[0].startswith('200')
+
+    # ``concurrency`` clients share ``workers`` server threads
+    semaphore = threading.Semaphore(concurrency)
+
+    def client_request(submitted):
+        try:
+            one(submitted)
+        finally:
+            semaphore.release()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        for _ in range(requests):
+            semaphore.acquire()
+            # latency counts the wait for a free server thread
+            pool.submit(client_request, time.perf_counter())
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+async def _asgi_get(app, path, query, cookie):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+    }
+    delivered = False
+    status = []
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()  # no disconnect; cancelled once the response is sent
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def run_asgi(path, query, cookie, requests, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    app = ASGIHandler()
+    latencies, errors = [], 0
+
+    async def client(count):
+        nonlocal errors
+        for _ in range(count):
+            started = time.perf_counter()
+            status = await _asgi_get(app, path, query, cookie)
+            latencies.append(time.perf_counter() - started)
+            errors += status != 200
+
+    async def main():
+        share, extra = divmod(requests, concurrency)
+        await asyncio.gather(*(client(share + (i < extra)) for i in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def run_http(url, requests, concurrency, username, password):
+    from urllib.parse import urlsplit
+    from benchmarks.transports import HTTPTransport
+
+    latencies, errors, lock = [], [0], threading.Lock()
+    parts = urlsplit(url)
+    transport = HTTPTransport(f'{parts.scheme}://{parts.netloc}', username, password)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+
+    def one(_):
+        started = time.perf_counter()
+        status, _ = transport.request('GET', path)
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            errors[0] += status != 200
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def print_row(label, concurrency, result):
+    print(f"{label:<10} {concurrency:>5} {result['rps']:>9.1f} {result['p50_ms']:>9.2f} "
+          f"{result['p95_ms']:>9.2f} {result['errors']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='list')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64])
+    parser.add_argument('--requests', type=int, default=400, help='requests per run')
+    parser.add_argument('--workers', type=int, default=4, help='WSGI server threads')
+    parser.add_argument('--db-latency', type=float, default=20.0, help='ms added to every SQL query')
+    parser.add_argument('--txns', type=int, default=500, help='transactions in the benchmarked account')
+    parser.add_argument('--url', help='full URL of an endpoint on a running server')
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    args = parser.parse_args()
+
+    print(f'{"path":<10} {"conc":>5} {"req/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"errors":>6}')
+    if args.url:
+        for concurrency in args.concurrency:
+            print_row('http', concurrency, run_http(
+                args.url, args.requests, concurrency, args.username, args.password,
+            ))
+        return
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from benchmarks.data import generate
+    from banking.models import Account
+
+    generate(customers=1, accounts_per_customer=1, txns_per_account=args.txns, loans_per_customer=0)
+    account = Account.objects.get()
+    client = Client()
+    client.force_login(User.objects.create_user('bench', password='bench-pass'))
+    cookie = f"sessionid={client.cookies['sessionid'].value}"
+    if args.db_latency:
+        add_db_latency(args.db_latency / 1000)
+
+    sync_path, async_path, query = ENDPOINTS[args.endpoint]
+    sync_path, async_path = (p.format(account=account.pk) for p in (sync_path, async_path))
+    query = query.format(account=account.pk)
+    for concurrency in args.concurrency:
+        print_row('wsgi', concurrency, run_wsgi(
+            sync_path, query, cookie, args.requests, concurrency, args.workers,
+        ))
+        print_row('asgi-sync', concurrency, run_asgi(sync_path, query, cookie, args.requests, concurrency))
+        print_row('asgi', concurrency, run_asgi(async_path, query, cookie, args.requests, concurrency))
+
+
+if __name__ == '__main__':
+    main()
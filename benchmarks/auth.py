@@ -0,0 +1,67 @@
+"""
+Requests per second under each authentication scheme.
+
+    python -m benchmarks.auth --requests 2000 --basic-requests 20
+
+Every request is a GET of a read-through-cached branch (no queries of its
+own), so the differences are the cost of authenticating:
+
+* ``basic``         Basic auth, a PBKDF2 password check per request (fewer
+                    requests: it is slow by design)
+* ``session``       session cookie, a session and a user query per request
+* ``token``         token with the token cache cleared before each request
+                    (one query, what DRF's TokenAuthentication costs)
+* ``cached-token``  CachedTokenAuthentication, a dictionary lookup
+"""
+import argparse
+import base64
+import time
+
+from benchmarks._django import setup
+
+
+def rate(client, url, requests, before=None, **headers):
+    client.get(url, **headers)
+    started = time.perf_counter()
+    for _ in range(requests):
+        if before:
+            before()
+        response = client.get(url, **headers)
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.status_code
+    return requests / elapsed, elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--basic-requests', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+    from banking.authentication import token_cache
+    from banking.models import Branch
+
+    user = User.objects.create_user('bench', password='bench-pass')
+    token = Token.objects.create(user=user)
+    url = f'/api/branches/{Branch.objects.create(name="Bench", code="AUTH", city="Bench").pk}/'
+    basic = base64.b64encode(b'bench:bench-pass').decode()
+    session = Client()
+    session.login(username='bench', password='bench-pass')
+
+    runs = [
+        ('basic', Client(), args.basic_requests, None, {'HTTP_AUTHORIZATION': f'Basic {basic}'}),
+        ('session', session, args.requests, None, {}),
+        ('token', Client(), args.requests, token_cache.clear, {'HTTP_AUTHORIZATION': f'Token {token.key}'}),
+        ('cached-token', Client(), args.requests, None, {'HTTP_AUTHORIZATION': f'Token {token.key}'}),
+    ]
+    for label, client, requests, before, headers in runs:
+        per_second, per_request = rate(client, url, requests, before, **headers)
+        print(f'{label:>12}: {per_second:8,.0f} req/s ({per_request:,.0f} us/request over {requests})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Single posts versus one bulk post through the API.
+
+    python -m benchmarks.bulk --rows 10000
+"""
+import argparse
+import json
+
+from benchmarks._django import make_account, setup, timed
+
+
+def run(rows):
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIClient
+
+    user = User.objects.create_user(username='bench', password='bench-pass')
+    client = APIClient()
+    client.force_authenticate(user)
+    single_account = make_account('0001')
+    bulk_account = make_account('0002')
+
+    with timed('single POST /api/transactions/', rows, 'rows'):
+        for n in range(rows):
+            client.post('/api/transactions/', {
+                'account': single_account.pk, 'txn_type': 'DEPOSIT',
+                'amount': '1.00', 'reference': f'SINGLE-{n}',
+            }, format='json')
+
+    payload = [
+        {'account': bulk_account.pk, 'txn_type': 'DEPOSIT',
+         'amount': '1.00', 'reference': f'BULK-{n}'}
+        for n in range(rows)
+    ]
+    with timed('bulk POST /api/transactions/bulk/ (JSON)', rows, 'rows'):
+        response = client.post('/api/transactions/bulk/', payload, format='json')
+    assert response.data['created'] == rows, response.data['rejected']
+
+    ndjson = '\n'.join(json.dumps(dict(row, reference=f'ND-{n}')) for n, row in enumerate(payload))
+    with timed('bulk POST /api/transactions/bulk/ (NDJSON)', rows, 'rows'):
+        response = client.post(
+            '/api/transactions/bulk/', ndjson, content_type='application/x-ndjson'
+        )
+    assert response.data['created'] == rows, response.data['rejected']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+    setup()
+    run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Card authorization latency.
+
+    python -m benchmarks.cards --cards 100000 --lookups 100000 --payments 2000
+
+Loads ``--cards`` cards, then reports p50/p99/max for:
+
+* ``query``     deciding from a ``select_related`` card lookup (what the
+                separate card, account and transaction calls cost in queries)
+* ``index``     deciding from ``card_index`` (the decision itself)
+* ``authorize`` ``banking.cards.authorize`` end to end, including the
+                guarded withdrawal and its Transaction INSERT
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks._django import setup
+
+
+def report(label, samples):
+    samples.sort()
+    pick = lambda fraction: samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1e6  # noqa: E731
+    print(f'{label:>9}: p50 {pick(0.5):8.1f} us  p99 {pick(0.99):8.1f} us  '
+          f'max {samples[-1] * 1e6:9.1f} us  ({len(samples)} calls)')
+
+
+def load_cards(count):
+    from django.utils import timezone
+    from banking.models import Account, Branch, Card, Customer
+
+    branch = Branch.objects.create(name='Cards', code='CARDS', city='Bench')
+    expiry = timezone.localdate() + timedelta(days=365)
+    for start in range(0, count, 10000):
+        stop = min(count, start + 10000)
+        customers = Customer.objects.bulk_create([
+            Customer(first_name='Card', last_name=str(n), email=f'card{n}@bench.example', phone=f'+1{n:010d}')
+            for n in range(start, stop)
+        ])
+        accounts = Account.objects.bulk_create([
+            Account(customer=c, branch=branch, account_number=f'CB{n:010d}', balance=Decimal('1000000.00'))
+            for n, c in zip(range(start, stop), customers)
+        ])
+        Card.objects.bulk_create([
+            Card(account=a, card_number=f'{n:016d}', expiry_date=expiry, is_active=n % 50 != 0)
+            for n, a in zip(range(start, stop), accounts)
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=100000)
+    parser.add_argument('--payments', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+    from django.utils import timezone
+    from banking.cards import authorize, card_index, decide
+    from banking.models import Card
+
+    started = time.perf_counter()
+    load_cards(args.cards)
+    print(f'loaded {args.cards} cards in {time.perf_counter() - started:.1f}s')
+    started = time.perf_counter()
+    card_index.load()
+    print(f'index built in {(time.perf_counter() - started) * 1e3:.0f} ms')
+
+    rng = random.Random(7)
+    # one in ten lookups is for a card that does not exist
+    numbers = [f'{rng.randrange(args.cards * 10 // 9):016d}' for _ in range(args.lookups)]
+    today = timezone.localdate()
+
+    samples = []
+    for number in numbers[:min(len(numbers), 5000)]:
+        began = time.perf_counter()
+        card = Card.objects.select_related('account').filter(card_number=number).first()
+        if card is not None:
+            not card.is_active or card.expiry_date < today or not card.account.is_active
+        samples.append(time.perf_counter() - began)
+    report('query', samples)
+
+    samples = []
+    for number in numbers:
+        began = time.perf_counter()
+        decide(card_index.get(number), timezone.localdate())
+        samples.append(time.perf_counter() - began)
+    report('index', samples)
+
+    samples, approved = [], 0
+    for n, number in enumerate(numbers[:args.payments]):
+        began = time.perf_counter()
+        reason, _, _ = authorize(number, Decimal('1.00'), f'BENCH-CARD-{n}')
+        samples.append(time.perf_counter() - began)
+        approved += reason == 'approved'
+    report('authorize', samples)
+    print(f'{approved} of {args.payments} payments approved')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""
+Synthetic data for benchmarks.
+
+A thin wrapper over ``banking.seeding`` (the engine behind ``manage.py
+seed_bank``) with dataset sizes that suit a throwaway test database.
+"""
+
+
+def generate(customers=200, accounts_per_customer=2, txns_per_account=50,
+             loans_per_customer=1, branches=10, seed=1):
+    """Populate the database and return a dict of row counts."""
+    from banking.seeding import seed as seed_bank
+
+    counts = seed_bank(
+        customers, accounts_per_customer=accounts_per_customer, txns_per_account=txns_per_account,
+        loans_per_customer=loans_per_customer, branches=branches, seed=seed,
+    )
+    counts['branches'] = branches
+    return counts
@@ -0,0 +1,107 @@
+"""
+Concurrent posting under each database profile (BANKING_DB_PROFILE).
+
+    python -m benchmarks.db_profile --workers 8 --transfers 500
+
+Runs once per profile in a child process with that profile's settings,
+against a throwaway SQLite file (an in-memory database hides locking). Each
+of ``--workers`` processes posts ``--transfers`` transfers between random
+accounts with no retries and ends every one as a request would
+(``close_old_connections``). The benchmark reports committed writes per second and how many
+transfers failed with "database is locked".
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+PROFILES = ('default', 'tuned')
+
+
+def transfer_worker(args):
+    from django.db import OperationalError, close_old_connections, connection
+    from banking.posting import apply_transfer
+    from decimal import Decimal
+
+    worker, account_ids, transfers = args
+    rng = random.Random(worker)
+    committed = locked = 0
+    latencies = []
+    for n in range(transfers):
+        source, destination = rng.sample(account_ids, 2)
+        started = time.perf_counter()
+        try:
+            apply_transfer(source, destination, Decimal('1.00'), f'DBP-{worker}-{n}')
+            committed += 1
+            latencies.append(time.perf_counter() - started)
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+        close_old_connections()
+    connection.close()
+    return committed, locked, latencies
+
+
+def child(workers, transfers, accounts):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bankingsystem.settings')
+    import django
+    django.setup()
+    from django.db import connection, connections
+    from benchmarks._django import make_account
+
+    path = os.path.join(tempfile.mkdtemp(), 'profile.sqlite3')
+    connection.settings_dict['TEST']['NAME'] = path
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        account_ids = [make_account(f'{n:04d}', '1000000.00').pk for n in range(accounts)]
+        connections.close_all()
+        started = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(workers) as pool:
+            results = pool.map(transfer_worker, [(w, account_ids, transfers) for w in range(workers)])
+        elapsed = time.perf_counter() - started
+        latencies = sorted(t for _, _, worker_latencies in results for t in worker_latencies)
+        print(json.dumps({
+            'committed': sum(r[0] for r in results),
+            'locked': sum(r[1] for r in results),
+            'elapsed': elapsed,
+            'p99_ms': latencies[int(len(latencies) * 0.99)] * 1e3 if latencies else None,
+        }))
+    finally:
+        connection.creation.destroy_test_db(path, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--transfers', type=int, default=500, help='transfers per worker')
+    parser.add_argument('--accounts', type=int, default=20)
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.workers, args.transfers, args.accounts)
+        return
+
+    attempted = args.workers * args.transfers
+    print(f'{args.workers} workers x {args.transfers} transfers over {args.accounts} accounts')
+    for profile in args.profiles:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.db_profile', '--child', '--workers', str(args.workers),
+             '--transfers', str(args.transfers), '--accounts', str(args.accounts)],
+            env={**os.environ, 'BANKING_DB_PROFILE': profile}, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        p99 = f"{result['p99_ms']:.1f} ms" if result['p99_ms'] is not None else 'n/a'
+        print(f"{profile:>8}: {result['committed'] / result['elapsed']:7,.0f} writes/s, "
+              f"{result['locked']} of {attempted} locked ({result['locked'] / attempted:.1%}), p99 {p99}")
+
+
+if __name__ == '__main__':
+    main()
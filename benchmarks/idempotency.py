@@ -0,0 +1,100 @@
+"""
+Retry storms against POST /api/transactions/ with Idempotency-Key.
+
+    python -m benchmarks.idempotency --deposits 500 --retries 5
+
+Each logical deposit is sent ``--retries`` times, the attempts interleaved
+the way a client pool retrying after timeouts would send them. Modes:
+
+* ``plain``    no header; every retry after the first fails on the unique
+               reference (400), as before
+* ``local``    header; retries land on the process that stored the key and
+               replay from its front cache
+* ``cold``     header; the front cache is cleared before every attempt, as
+               if each retry reached a different worker process
+
+Reports requests/s, median and p99 latency and SQL queries for first
+attempts and for retries, and checks that exactly one deposit was posted per
+logical request.
+"""
+import argparse
+import logging
+import statistics
+import time
+from decimal import Decimal
+
+from benchmarks._django import setup
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def storm(client, account, mode, deposits, retries):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from banking.idempotency import front_cache
+    from banking.models import Transaction
+
+    front_cache.clear()
+    before = Transaction.objects.count()
+    attempts = {'first': [], 'retry': []}
+    queries = {'first': 0, 'retry': 0}
+    statuses = {}
+    started = time.perf_counter()
+    for attempt in range(retries):
+        for n in range(deposits):
+            headers = {} if mode == 'plain' else {'HTTP_IDEMPOTENCY_KEY': f'{mode}-{n}'}
+            if mode == 'cold':
+                front_cache.clear()
+            kind = 'first' if attempt == 0 else 'retry'
+            # the query log is capped; keep it short so counts stay exact
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as captured:
+                began = time.perf_counter()
+                response = client.post('/api/transactions/', {
+                    'account': account.pk, 'txn_type': 'DEPOSIT', 'amount': '1.00',
+                    'reference': f'{mode.upper()}-{n}',
+                }, format='json', **headers)
+                attempts[kind].append(time.perf_counter() - began)
+            queries[kind] += len(captured)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    posted = Transaction.objects.count() - before
+    total = deposits * retries
+    print(f'{mode:>5}: {total} requests in {elapsed:.2f}s ({total / elapsed:,.0f} req/s), '
+          f'statuses {dict(sorted(statuses.items()))}, {posted} deposits posted')
+    for kind, samples in attempts.items():
+        if samples:
+            print(f'       {kind:>5}: median {statistics.median(samples) * 1e3:.2f} ms, '
+                  f'p99 {percentile(samples, 0.99) * 1e3:.2f} ms, '
+                  f'{queries[kind] / len(samples):.1f} queries/request')
+    assert posted == deposits, f'{mode}: expected {deposits} deposits, posted {posted}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--deposits', type=int, default=500)
+    parser.add_argument('--retries', type=int, default=5, help='attempts per logical deposit')
+    args = parser.parse_args()
+
+    setup()
+    # rejected plain retries would log a warning each
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIClient
+    from benchmarks._django import make_account
+
+    account = make_account(balance='0.00')
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('bench', password='bench-pass'))
+    for mode in ('plain', 'local', 'cold'):
+        storm(client, account, mode, args.deposits, args.retries)
+    account.refresh_from_db()
+    assert account.balance == Decimal(args.deposits * 3), account.balance
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Load-test runner for the banking API.
+
+In-process against a throwaway database filled with synthetic data:
+
+    python -m benchmarks.loadtest --requests 500 --output results.json
+
+Against a running server whose database is already populated:
+
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --username u --password p
+
+Each scenario reports requests/s, latency percentiles and (in-process) SQL
+queries per request. ``--compare baseline.json`` flags scenarios whose
+throughput dropped or whose p95 latency grew by more than ``--threshold``
+and exits non-zero if any did.
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks.scenarios import SCENARIOS
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(scenario, transport_factory, requests, concurrency, sequence):
+    scenario.prepare()
+    latencies, queries, errors = [], [], 0
+    lock = threading.Lock()
+    remaining = itertools.count()
+
+    def worker():
+        nonlocal errors
+        transport = transport_factory()
+        while next(remaining) < requests:
+            n = next(sequence)
+            started = time.perf_counter()
+            try:
+                status, query_count = scenario.step(transport, n)
+            except Exception:
+                status, query_count = 599, None
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if query_count is not None:
+                    queries.append(query_count)
+                if status >= 400:
+                    errors += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'duration_s': round(duration, 4),
+        'rps': round(len(latencies) / duration, 2) if duration else None,
+        'p50_ms': round(percentile(ms, 0.50), 3),
+        'p95_ms': round(percentile(ms, 0.95), 3),
+        'p99_ms': round(percentile(ms, 0.99), 3),
+        'max_ms': round(ms[-1], 3),
+        'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return ``(scenario, message)`` pairs for every regression beyond ``threshold``."""
+    regressions = []
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        if before.get('rps') and result['rps'] < before['rps'] * (1 - threshold):
+            regressions.append((name, f"rps {before['rps']} -> {result['rps']}"))
+        if before.get('p95_ms') and result['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append((name, f"p95 {before['p95_ms']}ms -> {result['p95_ms']}ms"))
+        if before.get('queries_per_request') and result.get('queries_per_request') and (
+            result['queries_per_request'] > before['queries_per_request']
+        ):
+            regressions.append((
+                name, f"queries/request {before['queries_per_request']} -> {result['queries_per_request']}"
+            ))
+    return regressions
+
+
+def print_table(results):
+    print(f'{"scenario":<14} {"reqs":>6} {"err":>5} {"rps":>9} {"p50 ms":>8} '
+          f'{"p95 ms":>8} {"p99 ms":>8} {"q/req":>6}')
+    for name, r in results.items():
+        queries = '-' if r['queries_per_request'] is None else f"{r['queries_per_request']:.1f}"
+        print(f"{name:<14} {r['requests']:>6} {r['errors']:>5} {r['rps']:>9.1f} {r['p50_ms']:>8.2f} "
+              f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {queries:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--url', help='base URL of a running server; omit to run in-process')
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument('--customers', type=int, default=200)
+    parser.add_argument('--accounts-per-customer', type=int, default=2)
+    parser.add_argument('--txns-per-account', type=int, default=50)
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='baseline results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    meta = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'mode': 'http' if args.url else 'in-process',
+        'requests_per_scenario': args.requests,
+        'concurrency': args.concurrency,
+    }
+    if args.url:
+        import os
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bankingsystem.settings')
+        import django
+        django.setup()  # scenarios read target ids through the ORM
+
+        from benchmarks.transports import HTTPTransport
+        factory = lambda: HTTPTransport(args.url, args.username, args.password)  # noqa: E731
+    else:
+        from benchmarks._django import setup
+        setup()
+        from django.conf import settings
+        from django.contrib.auth.models import User
+        from benchmarks.data import generate
+        from benchmarks.transports import TestClientTransport
+
+        # the in-memory test database reports table locks instead of waiting
+        settings.BANKING_POSTING_MAX_RETRIES = 1000
+        started = time.perf_counter()
+        counts = generate(args.customers, args.accounts_per_customer, args.txns_per_account)
+        meta['dataset'] = counts
+        meta['seed_seconds'] = round(time.perf_counter() - started, 2)
+        print(f"seeded {counts} in {meta['seed_seconds']}s")
+        user = User.objects.create_user('loadtest', password='loadtest-pass')
+        factory = lambda: TestClientTransport(user)  # noqa: E731
+
+    sequence = itertools.count()
+    results = {}
+    for name in args.scenarios:
+        results[name] = run_scenario(SCENARIOS[name](), factory, args.requests, args.concurrency, sequence)
+    print_table(results)
+
+    report = {'meta': meta, 'scenarios': results}
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f'results written to {args.output}')
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(report, json.load(fh), args.threshold)
+        for name, message in regressions:
+            print(f'REGRESSION {name}: {message}')
+        if regressions:
+            sys.exit(1)
+        print('no regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Overhead of RequestMetricsMiddleware.
+
+    python -m benchmarks.metrics_overhead --requests 5000
+
+Measures the middleware in isolation (fixed cost per request, sync and
+async, and added cost per SQL query), then times real requests with and
+without it. End-to-end
+numbers are noisy at this scale; the isolated figures are the budget.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks._django import setup
+
+MIDDLEWARE_PATH = 'banking.middleware.RequestMetricsMiddleware'
+
+
+def per_request_us(client, url, requests, rounds=5):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get(url)
+        samples.append((time.perf_counter() - started) / requests * 1e6)
+    return statistics.median(samples)
+
+
+def async_request_us(middleware, request, iterations):
+    from asgiref.sync import ThreadSensitiveContext
+
+    async def loop():
+        # one sync thread per request, as under ASGIHandler
+        async with ThreadSensitiveContext():
+            started = time.perf_counter()
+            for _ in range(iterations):
+                await middleware(request)
+            return (time.perf_counter() - started) / iterations * 1e6
+
+    return asyncio.run(loop())
+
+
+def isolated_costs(iterations=200000):
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.urls import resolve
+    from banking.metrics import registry
+    from banking.middleware import RequestMetricsMiddleware, _QueryTimer
+
+    request = RequestFactory().get('/api/loans/')
+    request.resolver_match = resolve('/api/loans/')
+    middleware = RequestMetricsMiddleware(lambda r: None)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        middleware(request)
+    per_request = (time.perf_counter() - started) / iterations * 1e6
+
+    async def view(request):
+        return None
+
+    per_async_request = async_request_us(RequestMetricsMiddleware(view), request, iterations // 20)
+    registry.reset()
+
+    queries = iterations // 10
+    with connection.cursor() as cursor:
+        started = time.perf_counter()
+        for _ in range(queries):
+            cursor.execute('SELECT 1')
+        bare = time.perf_counter() - started
+        with connection.execute_wrapper(_QueryTimer()):
+            started = time.perf_counter()
+            for _ in range(queries):
+                cursor.execute('SELECT 1')
+            wrapped = time.perf_counter() - started
+    per_query = (wrapped - bare) / queries * 1e6
+    print(f'isolated: {per_request:.2f} us per request ({per_async_request:.2f} us async) '
+          f'+ {per_query:.2f} us per SQL query')
+
+
+def run(requests):
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import modify_settings
+    from rest_framework.test import APIClient
+    from banking.models import Branch, Loan
+    from benchmarks._django import make_account
+
+    account = make_account()
+    for n in range(20):
+        Loan.objects.create(customer=account.customer, principal_amount=100, interest_rate=5)
+    branch = Branch.objects.get()
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('bench', password='bench-pass'))
+    urls = {
+        'branch-detail (cached, 0 queries)': f'/api/branches/{branch.pk}/',
+        'loan-list (2 queries)': '/api/loans/',
+    }
+
+    assert MIDDLEWARE_PATH not in settings.MIDDLEWARE
+    for label, url in urls.items():
+        client.get(url)  # warm caches
+        without = per_request_us(client, url, requests)
+        with modify_settings(MIDDLEWARE={'prepend': MIDDLEWARE_PATH}):
+            with_metrics = per_request_us(client, url, requests)
+        print(f'{label}: {without:.1f} us -> {with_metrics:.1f} us '
+              f'(+{with_metrics - without:.1f} us, {100 * (with_metrics - without) / without:+.1f}%)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+    setup()
+    isolated_costs()
+    run(args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+List latency by page depth: keyset cursor versus LIMIT/OFFSET, and the API
+page itself, fetched in full and revalidated with its ETag (a 304).
+
+    python -m benchmarks.pagination --rows 200000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks._django import make_account, setup
+
+
+def seed(rows):
+    from datetime import timedelta
+    from django.utils import timezone
+    from banking.models import Transaction
+
+    account = make_account()
+    start = timezone.now()
+    batch = []
+    for n in range(rows):
+        batch.append(Transaction(
+            account=account, txn_type=Transaction.DEPOSIT, amount=1,
+            reference=f'PAGE-{n}', performed_at=start - timedelta(seconds=n),
+        ))
+        if len(batch) == 5000:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    Transaction.objects.bulk_create(batch)
+
+
+def median_ms(func, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(rows, page_size):
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIClient
+    from banking.models import Transaction
+    from banking.pagination import PerformedAtKeysetPagination
+
+    seed(rows)
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('bench', password='bench-pass'))
+    ordered = Transaction.objects.order_by('-performed_at', '-id')
+    paginator = PerformedAtKeysetPagination()
+    fields = paginator._fields(ordered)
+
+    print(f'{"depth":>10} {"keyset ms":>10} {"offset ms":>10} {"API ms":>10} {"304 ms":>10}')
+    for depth in (0, rows // 100, rows // 10, rows // 2, rows - page_size - 1):
+        url = f'/api/transactions/?page_size={page_size}'
+        page = ordered
+        if depth:
+            values = paginator.row_values(ordered[depth - 1], fields)
+            paginator.base_url = f'http://testserver{url}'
+            url = paginator.encode_cursor(values, reverse=False)
+            cursor_values = [f.to_python(v) for v, (_, _, f) in zip(values, fields)]
+            page = ordered.filter(paginator.seek(fields, cursor_values, False))
+        keyset = median_ms(lambda: list(page[:page_size]))
+        offset = median_ms(lambda: list(ordered[depth:depth + page_size]))
+        api = median_ms(lambda: client.get(url))
+        etag = client.get(url)['ETag']
+        revalidate = median_ms(lambda: client.get(url, HTTP_IF_NONE_MATCH=etag))
+        print(f'{depth:>10} {keyset:>10.2f} {offset:>10.2f} {api:>10.2f} {revalidate:>10.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+    setup()
+    run(args.rows, args.page_size)
+
+
+if __name__ == '__main__':
+    main()
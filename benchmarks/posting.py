@@ -0,0 +1,57 @@
+"""
+Posting throughput on a single hot account.
+
+    python -m benchmarks.posting --threads 8 --postings 5000
+"""
+import argparse
+import threading
+from decimal import Decimal
+
+from benchmarks._django import make_account, setup, timed
+
+
+def run(threads, postings):
+    from django.db import connection
+    from banking.models import Transaction
+    from banking.posting import post_transaction
+
+    account = make_account()
+    per_thread = postings // threads
+
+    def worker(index):
+        try:
+            for n in range(per_thread):
+                post_transaction(
+                    account.pk, Transaction.DEPOSIT, Decimal('1.00'), f'BENCH-{index}-{n}'
+                )
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    with timed(f'{threads} threads', per_thread * threads, 'postings'):
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+    account.refresh_from_db()
+    expected = Decimal(per_thread * threads)
+    print(f'final balance {account.balance} (expected {expected})')
+    assert account.balance == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--postings', type=int, default=5000)
+    args = parser.parse_args()
+
+    from django.conf import settings
+    setup()
+    # the in-memory test database surfaces table locks immediately
+    settings.BANKING_POSTING_MAX_RETRIES = 1000
+    run(args.threads, args.postings)
+
+
+if __name__ == '__main__':
+    main()
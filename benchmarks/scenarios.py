@@ -0,0 +1,103 @@
+"""
+Load-test scenarios.
+
+A scenario picks its targets once in ``prepare`` (plain ORM reads) and then
+issues one API call per ``step``. Steps must be safe to run from several
+threads at once; ``n`` is a process-wide unique sequence number.
+"""
+import json
+import random
+
+
+class Scenario:
+    name = None
+
+    def prepare(self):
+        pass
+
+    def step(self, transport, n):
+        raise NotImplementedError
+
+
+class MixedReadWrite(Scenario):
+    """80% reads across all list/detail endpoints, 20% deposits and withdrawals."""
+    name = 'mixed'
+
+    def prepare(self):
+        from banking.models import Account, Customer
+        self.account_ids = list(Account.objects.values_list('pk', flat=True)[:1000])
+        self.customer_ids = list(Customer.objects.values_list('pk', flat=True)[:1000])
+        self.rng = random.Random(11)
+
+    def step(self, transport, n):
+        roll = self.rng.random()
+        if roll < 0.2:
+            return transport.request('POST', '/api/transactions/', {
+                'account': self.rng.choice(self.account_ids),
+                'txn_type': 'DEPOSIT' if roll < 0.14 else 'WITHDRAW',
+                'amount': '1.00', 'reference': f'MIX-{n}',
+            })
+        if roll < 0.4:
+            return transport.request('GET', f'/api/accounts/{self.rng.choice(self.account_ids)}/')
+        if roll < 0.55:
+            return transport.request('GET', f'/api/customers/{self.rng.choice(self.customer_ids)}/')
+        path = self.rng.choice([
+            '/api/accounts/', '/api/transactions/', '/api/loans/', '/api/cards/', '/api/customers/',
+        ])
+        return transport.request('GET', path)
+
+
+class HotAccountDeposits(Scenario):
+    """Every request deposits into the same account."""
+    name = 'hot-account'
+
+    def prepare(self):
+        from banking.models import Account
+        self.account_id = Account.objects.values_list('pk', flat=True).first()
+
+    def step(self, transport, n):
+        return transport.request('POST', '/api/transactions/', {
+            'account': self.account_id, 'txn_type': 'DEPOSIT',
+            'amount': '1.00', 'reference': f'HOT-{n}',
+        })
+
+
+class StatementPulls(Scenario):
+    """Full NDJSON statements for random accounts."""
+    name = 'statements'
+
+    def prepare(self):
+        from banking.models import Account
+        self.account_ids = list(Account.objects.values_list('pk', flat=True)[:1000])
+        self.rng = random.Random(13)
+
+    def step(self, transport, n):
+        account_id = self.rng.choice(self.account_ids)
+        return transport.request(
+            'GET', f'/api/accounts/{account_id}/statement/', {'format': 'ndjson'}
+        )
+
+
+class BulkIngestion(Scenario):
+    """NDJSON batches of deposits spread over many accounts."""
+    name = 'bulk'
+    batch_size = 500
+
+    def prepare(self):
+        from banking.models import Account
+        self.account_ids = list(Account.objects.values_list('pk', flat=True)[:1000])
+
+    def step(self, transport, n):
+        body = '\n'.join(
+            json.dumps({
+                'account': self.account_ids[(n * self.batch_size + i) % len(self.account_ids)],
+                'txn_type': 'DEPOSIT', 'amount': '2.50', 'reference': f'BULK-{n}-{i}',
+            })
+            for i in range(self.batch_size)
+        )
+        return transport.request(
+            'POST', '/api/transactions/bulk/', body=body, content_type='application/x-ndjson'
+        )
+
+
+SCENARIOS = {cls.name: cls for cls in (MixedReadWrite, HotAccountDeposits, StatementPulls, BulkIngestion)}
@@ -0,0 +1,64 @@
+"""
+List serialization cost: ModelSerializer versus the fast read path.
+
+    python -m benchmarks.serializers --sizes 10000 100000
+
+Both paths fetch the same rows and render them to JSON bytes; the output is
+checked to be identical before timings are printed.
+"""
+import argparse
+import time
+
+from benchmarks._django import make_account, setup
+
+
+def seed(account, rows):
+    from banking.models import Transaction
+
+    for start in range(0, rows, 10000):
+        Transaction.objects.bulk_create([
+            Transaction(account=account, txn_type=Transaction.DEPOSIT, amount='1.25', reference=f'SER-{n}')
+            for n in range(start, min(start + 10000, rows))
+        ])
+
+
+def run(sizes):
+    from rest_framework.renderers import JSONRenderer
+    from banking.fast_serializers import plan_for
+    from banking.models import Transaction
+    from banking.renderers import FastJSONRenderer, orjson
+    from banking.serializers import TransactionSerializer
+
+    class Plain:
+        plain_json = True
+
+    account = make_account()
+    seed(account, max(sizes))
+    plan = plan_for(TransactionSerializer)
+    ordered = Transaction.objects.order_by('-performed_at', '-id')
+    print(f'orjson installed: {orjson is not None}')
+    print(f'{"rows":>8} {"ModelSerializer s":>18} {"fast path s":>12} {"speed-up":>9}')
+    for size in sizes:
+        started = time.perf_counter()
+        slow = JSONRenderer().render(TransactionSerializer(ordered[:size], many=True).data)
+        slow_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows = plan.render(ordered.values(*set(plan.columns))[:size])
+        fast = FastJSONRenderer().render(rows, renderer_context={'response': Plain()})
+        fast_s = time.perf_counter() - started
+
+        assert fast == slow, 'fast path output differs from ModelSerializer'
+        print(f'{size:>8} {slow_s:>18.3f} {fast_s:>12.3f} {slow_s / fast_s:>8.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    setup()
+    run(args.sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Statement export throughput and memory for a very long account history.
+
+    python -m benchmarks.statement --rows 1000000 --format ndjson
+
+RSS is sampled while the stream is consumed and the run fails if it grows by
+more than ``--max-growth-mb`` over the level before the export started.
+"""
+import argparse
+import resource
+
+from benchmarks._django import make_account, setup, timed
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(account, rows):
+    from banking.models import Transaction
+
+    for start in range(0, rows, 10000):
+        Transaction.objects.bulk_create([
+            Transaction(account=account, txn_type=Transaction.DEPOSIT, amount=1, reference=f'S-{n}')
+            for n in range(start, min(start + 10000, rows))
+        ])
+
+
+def run(rows, fmt, max_growth_mb):
+    import gc
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIClient
+
+    account = make_account()
+    seed(account, rows)
+    gc.collect()
+
+    client = APIClient()
+    client.force_authenticate(User.objects.create_user('bench', password='bench-pass'))
+    baseline = peak = rss_mb()
+    lines = 0
+    with timed(f'{fmt} statement', rows, 'rows'):
+        response = client.get(f'/api/accounts/{account.pk}/statement/', {'format': fmt})
+        for chunk in response.streaming_content:
+            lines += chunk.count(b'\n')
+            if lines % 10000 == 0:
+                peak = max(peak, rss_mb())
+    peak = max(peak, rss_mb())
+    print(f'{lines} lines, RSS {baseline:.1f} MB -> peak {peak:.1f} MB')
+    assert peak - baseline < max_growth_mb, 'statement export memory is not bounded'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='ndjson')
+    parser.add_argument('--max-growth-mb', type=float, default=50)
+    args = parser.parse_args()
+    setup()
+    run(args.rows, args.format, args.max_growth_mb)
+
+
+if __name__ == '__main__':
+    main()
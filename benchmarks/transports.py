@@ -0,0 +1,70 @@
+"""
+How load-test scenarios reach the API.
+
+Both transports expose ``request(method, path, data=None, body=None,
+content_type=None)`` and return ``(status_code, query_count)``; the query
+count is only known in-process and is ``None`` over HTTP.
+"""
+import base64
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+
+class TestClientTransport:
+    """In-process requests through DRF's APIClient, with SQL query counts."""
+    counts_queries = True
+
+    def __init__(self, user):
+        from rest_framework.test import APIClient
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def request(self, method, path, data=None, body=None, content_type=None):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        call = getattr(self.client, method.lower())
+        with CaptureQueriesContext(connection) as queries:
+            if body is not None:
+                response = call(path, body, content_type=content_type)
+            elif data is not None and method.upper() != 'GET':
+                response = call(path, data, format='json')
+            else:
+                response = call(path, data)
+            if getattr(response, 'streaming', False):
+                for _ in response.streaming_content:
+                    pass
+        return response.status_code, len(queries)
+
+
+class HTTPTransport:
+    """Requests to a running server (``runserver``, gunicorn, uvicorn ...) with Basic auth."""
+    counts_queries = False
+
+    def __init__(self, base_url, username, password):
+        self.base_url = base_url.rstrip('/')
+        token = base64.b64encode(f'{username}:{password}'.encode()).decode()
+        self.headers = {'Authorization': f'Basic {token}'}
+
+    def request(self, method, path, data=None, body=None, content_type=None):
+        url = self.base_url + path
+        headers = dict(self.headers)
+        payload = None
+        if body is not None:
+            payload = body.encode() if isinstance(body, str) else body
+            headers['Content-Type'] = content_type
+        elif data is not None and method.upper() != 'GET':
+            payload = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data:
+            url += '?' + urllib.parse.urlencode(data)
+        request = urllib.request.Request(url, data=payload, headers=headers, method=method.upper())
+        try:
+            with urllib.request.urlopen(request) as response:
+                while response.read(65536):
+                    pass
+                return response.status, None
+        except urllib.error.HTTPError as exc:
+            return exc.code, None
@@ -0,0 +1,98 @@
+"""
+Cost of velocity checks per posting.
+
+    python -m benchmarks.velocity --accounts 10000 --history 200000 --checks 200000
+
+Seeds ``--history`` withdrawals from the last day over ``--accounts``
+accounts, then times:
+
+* ``rebuild``  loading the windows from that history (once per process)
+* ``check``    ``limits.check`` for a random account (what validation adds)
+* ``record``   ``limits.record`` of one committed posting
+* ``query``    the COUNT/SUM queries the windows replace, for comparison
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from benchmarks._django import setup
+
+
+def percentiles(samples):
+    samples.sort()
+    pick = lambda fraction: samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1e6  # noqa: E731
+    return f'p50 {pick(0.5):7.2f} us  p99 {pick(0.99):7.2f} us'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, default=10000)
+    parser.add_argument('--history', type=int, default=200000)
+    parser.add_argument('--checks', type=int, default=200000)
+    args = parser.parse_args()
+
+    setup()
+    from django.db.models import Count, Sum
+    from django.utils import timezone
+    from banking.models import Account, Branch, Customer, Transaction
+    from banking.velocity import ACCOUNT, limits
+
+    branch = Branch.objects.create(name='Velocity', code='VELO', city='Bench')
+    customer = Customer.objects.create(first_name='V', last_name='B', email='v@bench.example', phone='+15550000001')
+    account_ids = [a.pk for a in Account.objects.bulk_create([
+        Account(customer=customer, branch=branch, account_number=f'VB{n:08d}', balance=Decimal('1000000.00'))
+        for n in range(args.accounts)
+    ])]
+    rng = random.Random(3)
+    now = timezone.now()
+    for start in range(0, args.history, 20000):
+        Transaction.objects.bulk_create([
+            Transaction(
+                account_id=rng.choice(account_ids), txn_type=Transaction.WITHDRAW, amount=Decimal('5.00'),
+                reference=f'VH-{n}', performed_at=now - timedelta(seconds=rng.randrange(86000)),
+            )
+            for n in range(start, min(args.history, start + 20000))
+        ])
+
+    limits.reset()
+    started = time.perf_counter()
+    limits.check(ACCOUNT, account_ids[0], Transaction.WITHDRAW, Decimal('1.00'))
+    print(f'rebuild: {args.history} postings into {len(limits.windows)} windows '
+          f'in {time.perf_counter() - started:.2f}s')
+
+    amount = Decimal('1.00')
+    samples = []
+    for _ in range(args.checks):
+        pk = rng.choice(account_ids)
+        began = time.perf_counter()
+        limits.check(ACCOUNT, pk, Transaction.WITHDRAW, amount)
+        samples.append(time.perf_counter() - began)
+    print(f'  check: {percentiles(samples)}')
+
+    samples = []
+    for _ in range(args.checks):
+        event = [(rng.choice(account_ids), Transaction.WITHDRAW, amount, timezone.now())]
+        began = time.perf_counter()
+        limits.record(ACCOUNT, event)
+        samples.append(time.perf_counter() - began)
+    print(f' record: {percentiles(samples)}')
+
+    samples = []
+    for _ in range(min(args.checks, 200)):
+        pk = rng.choice(account_ids)
+        began = time.perf_counter()
+        since = timezone.now()
+        Transaction.objects.filter(
+            account_id=pk, txn_type=Transaction.WITHDRAW, performed_at__gt=since - timedelta(minutes=1),
+        ).aggregate(n=Count('id'))
+        Transaction.objects.filter(
+            account_id=pk, txn_type=Transaction.WITHDRAW, performed_at__gt=since - timedelta(days=1),
+        ).aggregate(total=Sum('amount'))
+        samples.append(time.perf_counter() - began)
+    print(f'  query: {percentiles(samples)}')
+
+
+if __name__ == '__main__':
+    main()